@@ -1,3 +1,3 @@
-from .docker_client import get_docker_client
+from .docker_client import get_docker_client, get_docker_engine
 
-__all__ = ["get_docker_client"]
+__all__ = ["get_docker_client", "get_docker_engine"]
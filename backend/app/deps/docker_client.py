@@ -1,13 +1,37 @@
+import os
 from functools import lru_cache
 
 import docker
 from docker.client import DockerClient
 
+from app.services.docker_engine import (
+    DOCKER_POOL_SIZE,
+    DOCKER_TIMEOUT,
+    AsyncDockerEngine,
+    DockerEngine,
+    ThreadedDockerEngine,
+)
+
+# async — Engine API через httpx; sync — прежний docker-py в пуле потоков
+DOCKER_CLIENT_MODE = os.getenv("MIRA_DOCKER_CLIENT", "async").lower()
+
 
 @lru_cache
 def get_docker_client() -> DockerClient:
     """
     Клиент Docker, использующий переменные окружения.
     В контейнере мы будем пробрасывать /var/run/docker.sock.
+    Размер пула — MIRA_DOCKER_POOL_SIZE, как у асинхронного клиента.
+    """
+    return docker.from_env(max_pool_size=DOCKER_POOL_SIZE, timeout=int(DOCKER_TIMEOUT))
+
+
+@lru_cache
+def get_docker_engine() -> DockerEngine:
+    """
+    Клиент Engine API для роутеров. Фоновые сервисы (инвентарь, статистика,
+    хаб событий) работают в своих потоках и остаются на docker-py.
     """
-    return docker.from_env()
+    if DOCKER_CLIENT_MODE == "sync":
+        return ThreadedDockerEngine(get_docker_client())
+    return AsyncDockerEngine()
@@ -1,4 +1,7 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers import (
@@ -8,12 +11,61 @@ from app.routers import (
     images_router,
     volumes_router,
     templates_router,
+    stacks_router,
     networks_router,
+    jobs_router,
+    metrics_router,
 )
+from app.deps import get_docker_engine
+from app.routers.responses import FastJSONResponse
+from app.services.containers_inventory import get_container_inventory
+from app.services.events_hub import get_events_hub
+from app.services.image_prewarm import get_image_prewarmer
+from app.services.jobs import get_job_registry
+from app.services.resource_versions import get_resource_versions
+from app.services.stats_sampler import get_stats_sampler
+from app.services.telemetry import get_telemetry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # фоновые сервисы ходят в демон при старте — не блокируем event loop
+    services = []
+    for factory in (get_resource_versions, get_container_inventory, get_stats_sampler):
+        try:
+            service = factory()
+        except Exception:
+            # демон недоступен — роутеры сами пойдут в него напрямую
+            service = None
+        if service is not None:
+            await run_in_threadpool(service.start)
+            services.append(service)
+
+    # сверка образов шаблонов (и прогрев при MIRA_PREWARM=1) — в фоне
+    prewarmer = get_image_prewarmer()
+    prewarmer.start()
+
+    yield
+
+    prewarmer.stop()
+    get_job_registry().shutdown()
+    for service in reversed(services):
+        service.stop()
+    try:
+        get_events_hub().shutdown()
+    except Exception:
+        pass
+    try:
+        await get_docker_engine().aclose()
+    except Exception:
+        pass
+
 
 app = FastAPI(
     title="Mira API",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 app.add_middleware(
@@ -22,6 +74,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # ETag — для long-poll списков (?wait_for_change), остальное — постраничность
+    expose_headers=["ETag", "X-Total-Count", "X-Next-Cursor", "Link"],
 )
 
 app.include_router(system_router, prefix="/api/v1/system", tags=["system"])
@@ -29,10 +83,20 @@ app.include_router(containers_router, prefix="/api/v1/containers", tags=["contai
 app.include_router(events_router, prefix="/api/v1/events", tags=["events"])
 app.include_router(images_router, prefix="/api/v1/images", tags=["images"])
 app.include_router(volumes_router, prefix="/api/v1/volumes", tags=["volumes"])
+# стеки раньше шаблонов: иначе /stacks поймает GET /templates/{template_id}
+app.include_router(stacks_router, prefix="/api/v1/templates/stacks", tags=["stacks"])
 app.include_router(templates_router, prefix="/api/v1/templates", tags=["templates"])
 app.include_router(networks_router, prefix="/api/v1/networks", tags=["networks"])
+app.include_router(jobs_router, prefix="/api/v1/jobs", tags=["jobs"])
 
 
 @app.get("/")
 def root():
     return {"service": "mira-api", "docs": "/docs"}
+
+
+# Prometheus: /metrics и замеры роутов — после подключения всех роутеров
+telemetry = get_telemetry()
+if telemetry is not None:
+    app.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
+    telemetry.instrument(app)
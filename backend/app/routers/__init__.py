@@ -4,7 +4,10 @@ from .events import router as events_router
 from .images import router as images_router
 from .volumes import router as volumes_router
 from .templates import router as templates_router
+from .stacks import router as stacks_router
 from .networks import router as networks_router
+from .jobs import router as jobs_router
+from .metrics import router as metrics_router
 
 __all__ = [
     "system_router",
@@ -13,5 +16,8 @@ __all__ = [
     "images_router",
     "volumes_router",
     "templates_router",
+    "stacks_router",
     "networks_router",
+    "jobs_router",
+    "metrics_router",
 ]
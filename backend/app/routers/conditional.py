@@ -0,0 +1,63 @@
+"""
+Условные GET для списков: ETag по поколению ресурса (resource_versions).
+
+Зависимость выполняется раньше тела роута, поэтому на совпавший
+If-None-Match 304 уходит без обращений к демону и без сериализации.
+?wait_for_change=30s — long-poll: ответ задерживается, пока поколение
+не сдвинется (или до таймаута — тогда 304, если ETag клиента ещё верен).
+"""
+
+from typing import Optional
+
+from fastapi import HTTPException, Query, Request, Response
+
+from app.routers.responses import strip_encoding
+from app.services.metrics_store import parse_duration
+from app.services.resource_versions import get_resource_versions
+
+
+def _client_etags(header: str | None) -> set[str]:
+    # для If-None-Match сравнение слабое: W/"x" совпадает с "x";
+    # ETag сжатого ответа сверяем по представлению без сжатия
+    if not header:
+        return set()
+    return {
+        strip_encoding(tag.strip().removeprefix("W/")) for tag in header.split(",") if tag.strip()
+    }
+
+
+def conditional_list(resource: str):
+    async def check(
+        request: Request,
+        response: Response,
+        wait_for_change: Optional[str] = Query(
+            None, description="long-poll: ждать изменения, например 30s"
+        ),
+    ) -> None:
+        timeout = None
+        if wait_for_change:
+            try:
+                timeout = parse_duration(wait_for_change)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid wait_for_change: {e}")
+
+        try:
+            versions = get_resource_versions()
+        except Exception:
+            # демон был недоступен при старте — отдаём списки как раньше
+            versions = None
+        if versions is None or not versions.ready:
+            return
+
+        known = _client_etags(request.headers.get("if-none-match"))
+        generation = versions.generation(resource)
+        if timeout is not None and (not known or versions.etag(resource, generation) in known):
+            await versions.wait_for_change(resource, generation, timeout)
+            generation = versions.generation(resource)
+
+        headers = {"ETag": versions.etag(resource, generation), "Cache-Control": "no-cache"}
+        if headers["ETag"] in known or "*" in known:
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return check
@@ -1,57 +1,66 @@
+import asyncio
+import json
+import re
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
-from docker.client import DockerClient
-from docker.models.containers import Container
-
-from app.deps import get_docker_client
+from app.deps import get_docker_engine
+from app.routers.conditional import conditional_list
+from app.routers.listing import field_selection, list_query, paged_response
+from app.routers.responses import fast_json
 from app.schemas import (
     ContainerSummary,
     ContainerDetail,
+    ContainerStats,
+    ContainerMetrics,
+    ContainerMetricsBulk,
+    ContainerMetricsSeries,
     PortMapping,
     ContainerCreateRequest,
+    ContainerBulkActionRequest,
+)
+from app.services.container_actions import resolve_targets, run_bulk_action
+from app.services.containers_inventory import (
+    ContainerInventory,
+    InventoryEntry,
+    get_container_inventory,
+    list_container_entries,
+)
+from app.services.container_create import create_and_start
+from app.services.containers_listing import (
+    image_display_name,
+    map_ports as _map_ports,
+)
+from app.services.docker_engine import DockerEngine, EngineError, EngineNotFound
+from app.services.image_pull import PullManager, get_pull_manager
+from app.services.jobs import Job, JobRegistry, get_job_registry
+from app.services.log_stream import (
+    LogPage,
+    LogStream,
+    api_timestamp,
+    decode_cursor,
+    line_matcher,
+    parse_time_param,
+)
+from app.services.listing import (
+    FieldSelection,
+    ListQuery,
+    label_matcher,
+    name_pattern,
+    split_values,
 )
+from app.services.metrics_store import MetricsStore, get_metrics_store, parse_duration
+from app.services.stats_sampler import ContainerStatsSampler, get_stats_sampler
 
 router = APIRouter()
 
 
-def _map_ports(port_data) -> list[PortMapping]:
-    ports: list[PortMapping] = []
-    if not port_data:
-        return ports
-
-    for container_port, bindings in port_data.items():
-        try:
-            port_str, proto = container_port.split("/")
-            c_port = int(port_str)
-        except ValueError:
-            continue
-
-        if not bindings:
-            ports.append(
-                PortMapping(
-                    host_port=None,
-                    container_port=c_port,
-                    protocol=proto,
-                )
-            )
-        else:
-            for b in bindings:
-                host_port = int(b.get("HostPort", 0)) if b.get("HostPort") else None
-                ports.append(
-                    PortMapping(
-                        host_port=host_port,
-                        container_port=c_port,
-                        protocol=proto,
-                    )
-                )
-
-    return ports
-
-
 def _format_uptime(started_at: str | None) -> str | None:
     if not started_at:
         return None
@@ -81,227 +90,642 @@ def _format_uptime(started_at: str | None) -> str | None:
     return f"{seconds}s"
 
 
-@router.get("", response_model=list[ContainerSummary])
-def list_containers(
+def _set_inventory_headers(response: Response, inventory: ContainerInventory) -> None:
+    response.headers["X-Mira-Generation"] = str(inventory.generation)
+    if inventory.synced_at is not None:
+        response.headers["X-Mira-Synced-At"] = datetime.fromtimestamp(
+            inventory.synced_at, timezone.utc
+        ).isoformat()
+
+
+async def _inventory_entry(inventory: ContainerInventory, ref: str):
+    """
+    Запись инвентаря из памяти. Промах или ещё не дочитанный started_at
+    требуют обращения к демону — это редкий путь, он уходит в пул потоков.
+    """
+    entry = inventory.lookup(ref)
+    if entry is None or entry.started_at is None:
+        entry = await run_in_threadpool(inventory.get, ref)
+    return entry
+
+
+_CONTAINER_STATES = {"created", "restarting", "running", "removing", "paused", "exited", "dead"}
+_CONTAINER_SORTS = {
+    "created": lambda e: e.created,
+    "name": lambda e: e.summary.name,
+    "state": lambda e: e.summary.state,
+    "image": lambda e: e.summary.image,
+}
+
+
+def _image_matches(entry: InventoryEntry, image: str) -> bool:
+    # "nginx" == "nginx:latest"; id — полный или от 12 символов
+    if entry.summary.image in (image, f"{image}:latest"):
+        return True
+    ref = image.removeprefix("sha256:")
+    return len(ref) >= 12 and entry.image_id.removeprefix("sha256:").startswith(ref)
+
+
+def _container_matcher(
+    statuses: list[str],
+    name: str | None,
+    labels: list[str],
+    image: str | None,
+):
+    """
+    Фильтр записей. Применяется и к ответу демона: то, что можно, уходит
+    демону в filters, но итог совпадает с путём через инвентарь.
+    """
+    checks = []
+    if statuses:
+        checks.append(lambda e: e.summary.state in statuses)
+    if name:
+        needle = name.casefold()
+        checks.append(lambda e: needle in e.summary.name.casefold())
+    match_labels = label_matcher(labels)
+    if match_labels is not None:
+        checks.append(lambda e: match_labels(e.labels))
+    if image:
+        checks.append(lambda e: _image_matches(e, image))
+    if not checks:
+        return None
+    return lambda e: all(check(e) for check in checks)
+
+
+@router.get(
+    "",
+    response_model=list[ContainerSummary],
+    dependencies=[Depends(conditional_list("containers"))],
+)
+async def list_containers(
+    request: Request,
+    response: Response,
     all: bool = True,
-    client: DockerClient = Depends(get_docker_client),
+    status: List[str] = Query([], description="состояния через запятую: running,exited,..."),
+    name: Optional[str] = Query(None, description="подстрока имени, без учёта регистра"),
+    label: List[str] = Query([], description="key или key=value; несколько — все сразу"),
+    image: Optional[str] = Query(None, description="образ (repo:tag) или его id"),
+    query: ListQuery = Depends(list_query(tuple(_CONTAINER_SORTS), "-created")),
+    fields: FieldSelection = Depends(field_selection(tuple(ContainerSummary.model_fields))),
+    engine: DockerEngine = Depends(get_docker_engine),
+    inventory: ContainerInventory | None = Depends(get_container_inventory),
 ) -> List[ContainerSummary]:
-    docker_containers: list[Container] = client.containers.list(all=all)
-    result: list[ContainerSummary] = []
-
-    for c in docker_containers:
-        attrs = c.attrs or {}
-        state = attrs.get("State", {}) or {}
-        status = state.get("Status") or c.status or "unknown"
-
-        net = attrs.get("NetworkSettings", {}) or {}
-        port_data = net.get("Ports") or {}
-
-        image_name = ""
-        if c.image:
-            if c.image.tags:
-                image_name = c.image.tags[0]
-            else:
-                image_name = c.image.short_id
-
-        result.append(
-            ContainerSummary(
-                id=c.id,
-                name=c.name,
-                image=image_name,
-                status=status,
-                state=status,
-                ports=_map_ports(port_data),
+    """
+    Фильтры, sort/limit/cursor, fields — см. app/routers/listing.py. Без них —
+    все контейнеры, новые первыми. Без image в fields (и в фильтре/сортировке)
+    демону не нужен /images/json, без ports — порты не разбираются.
+    """
+    statuses = split_values(status)
+    unknown = set(statuses) - _CONTAINER_STATES
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown status {sorted(unknown)}")
+    match = _container_matcher(statuses, name, label, image)
+    # как `docker ps -f status=exited`: фильтр по статусу сам включает all
+    all = all or bool(statuses)
+
+    # основной путь — из памяти, без обращений к демону
+    if inventory is not None and inventory.ready:
+        _set_inventory_headers(response, inventory)
+        entries = inventory.entries(all=all)
+    else:
+        filters: dict = {}
+        if statuses:
+            filters["status"] = statuses
+        if label:
+            filters["label"] = label
+        if name:
+            filters["name"] = [name_pattern(name)]
+        try:
+            entries = await list_container_entries(
+                engine,
+                all=all,
+                filters=filters or None,
+                with_image="image" in fields or bool(image) or query.sort == "image",
+                with_ports="ports" in fields,
             )
-        )
+        except EngineError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to list containers: {e}")
+
+    if match is not None:
+        entries = [e for e in entries if match(e)]
+    return paged_response(
+        entries,
+        query,
+        _CONTAINER_SORTS,
+        lambda e: e.summary.id,
+        request,
+        response,
+        render=lambda e: fields.project(e.summary),
+    )
 
-    return result
+
+@router.get("/stats", response_model=list[ContainerStats])
+async def list_container_stats(
+    sampler: ContainerStatsSampler | None = Depends(get_stats_sampler),
+) -> List[ContainerStats]:
+    """
+    Последние замеры CPU/памяти всех запущенных контейнеров — из памяти.
+    """
+    if sampler is None:
+        return []
+    return sampler.all()
+
+
+def _plan_metrics(range_: str, step: str) -> tuple[bool, int, int, list[int]]:
+    try:
+        range_seconds = parse_duration(range_)
+        step_seconds = parse_duration(step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid range/step: {e}")
+
+    use_fine, step_seconds, timestamps = MetricsStore.plan(range_seconds, step_seconds)
+    return use_fine, step_seconds * len(timestamps), step_seconds, timestamps
+
+
+async def _resolve_container_id(
+    container_id: str,
+    engine: DockerEngine,
+    inventory: ContainerInventory | None,
+) -> str | None:
+    if inventory is not None and inventory.ready:
+        entry = inventory.lookup(container_id)
+        if entry is None:
+            entry = await run_in_threadpool(inventory.get, container_id)
+        return entry.summary.id if entry is not None else None
+    try:
+        return (await engine.inspect_container(container_id))["Id"]
+    except EngineError:
+        return None
+
+
+@router.get("/metrics", response_model=ContainerMetricsBulk)
+async def get_containers_metrics(
+    ids: list[str] = Query(..., description="id или имена контейнеров"),
+    range_: str = Query("15m", alias="range"),
+    step: str = Query("1s"),
+    engine: DockerEngine = Depends(get_docker_engine),
+    inventory: ContainerInventory | None = Depends(get_container_inventory),
+    store: MetricsStore = Depends(get_metrics_store),
+) -> ContainerMetricsBulk:
+    """
+    История нескольких контейнеров в столбцах на общей сетке времени.
+    ids можно передать повтором параметра или через запятую.
+    """
+    use_fine, range_seconds, step_seconds, timestamps = _plan_metrics(range_, step)
+
+    series: dict[str, ContainerMetricsSeries] = {}
+    for ref in (i for raw in ids for i in raw.split(",") if i):
+        cid = await _resolve_container_id(ref, engine, inventory)
+        data = store.query(cid, use_fine, step_seconds, timestamps) if cid else None
+        if data is not None:
+            series[ref] = ContainerMetricsSeries(**data)
+
+    return ContainerMetricsBulk(
+        range=range_seconds,
+        step=step_seconds,
+        timestamps=timestamps,
+        series=series,
+    )
 
 
 @router.get("/{container_id}", response_model=ContainerDetail)
-def get_container(
+async def get_container(
     container_id: str,
-    client: DockerClient = Depends(get_docker_client),
+    response: Response,
+    fields: FieldSelection = Depends(field_selection(tuple(ContainerDetail.model_fields))),
+    engine: DockerEngine = Depends(get_docker_engine),
+    inventory: ContainerInventory | None = Depends(get_container_inventory),
+    sampler: ContainerStatsSampler | None = Depends(get_stats_sampler),
 ) -> ContainerDetail:
+    """
+    fields — только эти поля; без uptime не нужен inspect, без image —
+    inspect образа, без cpu_percent/memory_usage — последний замер.
+    """
+    with_stats = sampler is not None and ("cpu_percent" in fields or "memory_usage" in fields)
+
+    if inventory is not None and inventory.ready:
+        if "uptime" in fields:
+            entry = await _inventory_entry(inventory, container_id)
+        else:
+            entry = inventory.lookup(container_id) or await run_in_threadpool(
+                inventory.get, container_id
+            )
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Container not found")
+
+        stats = sampler.latest(entry.summary.id) if with_stats else None
+        _set_inventory_headers(response, inventory)
+        detail = ContainerDetail(
+            **entry.summary.model_dump(),
+            cpu_percent=stats.cpu_percent if stats else None,
+            memory_usage=stats.memory_usage if stats else None,
+            uptime=_format_uptime(entry.started_at) if "uptime" in fields else None,
+        )
+        return detail if fields.all else fast_json(fields.project(detail), response)
+
     try:
-        c: Container = client.containers.get(container_id)
-    except Exception:
+        attrs = await engine.inspect_container(container_id)
+    except EngineError:
         raise HTTPException(status_code=404, detail="Container not found")
 
-    attrs = c.attrs or {}
     state = attrs.get("State", {}) or {}
-    status = state.get("Status") or c.status or "unknown"
+    status = state.get("Status") or "unknown"
 
     net = attrs.get("NetworkSettings", {}) or {}
     port_data = net.get("Ports") or {}
 
     image_name = ""
-    if c.image:
-        if c.image.tags:
-            image_name = c.image.tags[0]
-        else:
-            image_name = c.image.short_id
+    if "image" in fields:
+        image_name = await image_display_name(engine, attrs.get("Image") or "")
 
-    cpu_percent = None
-    mem_usage = None
-    uptime = _format_uptime(state.get("StartedAt"))
+    stats = sampler.latest(attrs["Id"]) if with_stats else None
+    cpu_percent = stats.cpu_percent if stats else None
+    mem_usage = stats.memory_usage if stats else None
+    uptime = _format_uptime(state.get("StartedAt")) if "uptime" in fields else None
 
-    return ContainerDetail(
-        id=c.id,
-        name=c.name,
+    detail = ContainerDetail(
+        id=attrs["Id"],
+        name=(attrs.get("Name") or "").lstrip("/"),
         image=image_name,
         status=status,
         state=status,
-        ports=_map_ports(port_data),
+        ports=_map_ports(port_data) if "ports" in fields else [],
         cpu_percent=cpu_percent,
         memory_usage=mem_usage,
         uptime=uptime,
     )
+    return detail if fields.all else fast_json(fields.project(detail), response)
+
+
+@router.get("/{container_id}/metrics", response_model=ContainerMetrics)
+async def get_container_metrics(
+    container_id: str,
+    range_: str = Query("15m", alias="range"),
+    step: str = Query("1s"),
+    engine: DockerEngine = Depends(get_docker_engine),
+    inventory: ContainerInventory | None = Depends(get_container_inventory),
+    store: MetricsStore = Depends(get_metrics_store),
+) -> ContainerMetrics:
+    """
+    История CPU/памяти контейнера: до 15 минут с шагом от 1 с,
+    до 24 часов с шагом от 1 минуты.
+    """
+    cid = await _resolve_container_id(container_id, engine, inventory)
+    if cid is None:
+        raise HTTPException(status_code=404, detail="Container not found")
+
+    use_fine, range_seconds, step_seconds, timestamps = _plan_metrics(range_, step)
+    data = store.query(cid, use_fine, step_seconds, timestamps) or {
+        "cpu_percent": [None] * len(timestamps),
+        "memory_usage": [None] * len(timestamps),
+    }
+
+    return ContainerMetrics(
+        id=cid,
+        range=range_seconds,
+        step=step_seconds,
+        timestamps=timestamps,
+        **data,
+    )
 
 
 # ===== ЛОГИ КОНТЕЙНЕРА =====
 
 class ContainerLogsResponse(BaseModel):
     content: str
+    next_cursor: str | None = None
+    # чтение у демона оборвалось: content — только то, что успели прочитать
+    error: str | None = None
+
+
+def _log_line_text(line: dict) -> str:
+    if "time" in line:
+        return f"{line['time']} {line['text']}\n"
+    return line["text"] + "\n"
 
 
 @router.get("/{container_id}/logs", response_model=ContainerLogsResponse)
-def get_container_logs(
+async def get_container_logs(
     container_id: str,
-    client: DockerClient = Depends(get_docker_client),
+    engine: DockerEngine = Depends(get_docker_engine),
     tail: int = Query(500, ge=1, le=5000),
-) -> ContainerLogsResponse:
+    since: str | None = Query(None, description="unix-время, ISO-дата или длительность назад (15m)"),
+    until: str | None = Query(None, description="unix-время, ISO-дата или длительность назад (15m)"),
+    cursor: str | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=100000),
+    contains: str | None = Query(None),
+    regex: str | None = Query(None),
+    ignore_case: bool = Query(False),
+    timestamps: bool = Query(False),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
     """
-    Возвращает последние `tail` строк логов контейнера.
+    Логи контейнера, отдаются потоком по мере чтения.
+
+    Без since/until/cursor — последние `tail` строк, как раньше. С ними —
+    все строки окна; tail не применяется. contains / regex фильтруют
+    строки на сервере. Если задан limit и подходящих строк больше,
+    в ответе будет next_cursor — его передают как cursor за следующей
+    страницей (since тогда не нужен).
+
+    format=json — {"content": "...", "next_cursor": ...};
+    format=ndjson — по объекту на строку ({"stream", "text"[, "time"]}),
+    последней строкой {"next_cursor": ...}.
+
+    Если чтение у демона оборвалось посреди ответа (статус уже отправлен),
+    вместо next_cursor приходит "error": {"content": "...", "next_cursor": null,
+    "error": "..."} или последней строкой NDJSON {"error": "..."}.
     """
     try:
-        c: Container = client.containers.get(container_id)
-    except Exception:
-        raise HTTPException(status_code=404, detail="Container not found")
-
+        after = decode_cursor(cursor) if cursor else None
+        since_ns = after[0] if after else (parse_time_param(since) if since else None)
+        until_ns = parse_time_param(until) if until else None
+        match = line_matcher(contains, regex, ignore_case)
+    except (ValueError, re.error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid logs query: {e}")
+
+    windowed = since_ns is not None or until_ns is not None
+    stream = LogStream(
+        engine,
+        container_id,
+        follow=False,
+        tail=None if windowed else tail,
+        since=api_timestamp(since_ns) if since_ns is not None else None,
+        until=api_timestamp(until_ns) if until_ns is not None else None,
+        timestamps=True,
+    )
     try:
-        raw = c.logs(tail=tail)
-        if isinstance(raw, bytes):
-            text = raw.decode("utf-8", errors="replace")
-        else:
-            text = str(raw)
+        await stream.open()
+    except EngineNotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read logs: {e}")
 
-    return ContainerLogsResponse(content=text)
+    page = LogPage(stream, after=after, match=match, limit=limit, keep_time=timestamps)
 
+    async def json_body():
+        try:
+            yield '{"content":"'
+            async for lines in page.lines():
+                text = "".join(_log_line_text(line) for line in lines)
+                yield json.dumps(text, ensure_ascii=False)[1:-1]
+        except EngineError as e:
+            yield '","next_cursor":null,"error":' + json.dumps(f"Failed to read logs: {e}") + "}"
+            return
+        finally:
+            stream.close()
+        yield '","next_cursor":' + json.dumps(page.next_cursor) + "}"
+
+    async def ndjson_body():
+        try:
+            async for lines in page.lines():
+                yield "".join(
+                    json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n"
+                    for line in lines
+                )
+        except EngineError as e:
+            yield json.dumps({"error": f"Failed to read logs: {e}"}) + "\n"
+            return
+        finally:
+            stream.close()
+        yield json.dumps({"next_cursor": page.next_cursor}) + "\n"
+
+    # тело может так и не начаться (клиент ушёл раньше) — тогда поток
+    # закроет фоновая задача ответа, иначе чтение висело бы на полной очереди
+    close = BackgroundTask(stream.close)
+    if format == "ndjson":
+        return StreamingResponse(ndjson_body(), media_type="application/x-ndjson", background=close)
+    return StreamingResponse(json_body(), media_type="application/json", background=close)
+
+
+async def _open_log_stream(
+    engine: DockerEngine,
+    container_id: str,
+    tail: int,
+    since: int | None,
+    timestamps: bool,
+) -> LogStream:
+    stream = LogStream(
+        engine,
+        container_id,
+        follow=True,
+        tail=tail,
+        since=since,
+        timestamps=timestamps,
+    )
+    await stream.open()
+    return stream
 
-@router.post("/{container_id}/start")
-def start_container(
+
+async def _close_on_disconnect(websocket: WebSocket, stream: LogStream) -> None:
+    try:
+        while True:
+            msg = await websocket.receive()
+            if msg.get("type") == "websocket.disconnect":
+                break
+    except Exception:
+        pass
+    stream.close()
+
+
+@router.websocket("/{container_id}/logs/ws")
+async def follow_container_logs_ws(
+    websocket: WebSocket,
     container_id: str,
-    client: DockerClient = Depends(get_docker_client),
+    tail: int = Query(100, ge=0, le=5000),
+    since: int | None = Query(None, ge=0),
+    timestamps: bool = Query(False),
+    window_ms: int = Query(100, ge=10, le=2000),
+    max_lines: int = Query(500, ge=1, le=5000),
+    engine: DockerEngine = Depends(get_docker_engine),
 ):
+    """
+    Живой хвост логов: сначала последние `tail` строк, дальше новые.
+
+    Кадр — {"type": "lines", "lines": [{"stream": "stdout"|"stderr", "text": "..."}]},
+    с timestamps=true у строки есть ещё "time". Строки копятся до window_ms
+    миллисекунд или max_lines штук. Когда контейнер останавливается,
+    приходит {"type": "end"} и сокет закрывается. Если чтение у демона
+    оборвалось — {"type": "error", "message": "..."} и закрытие с кодом 1011.
+    """
+    await websocket.accept()
+
     try:
-        c: Container = client.containers.get(container_id)
+        stream = await _open_log_stream(engine, container_id, tail, since, timestamps)
+    except EngineNotFound:
+        await websocket.close(code=1008, reason="Container not found")
+        return
     except Exception:
-        raise HTTPException(status_code=404, detail="Container not found")
+        await websocket.close(code=1011, reason="Failed to read logs")
+        return
 
+    watcher = asyncio.create_task(_close_on_disconnect(websocket, stream))
     try:
-        c.start()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to start: {e}")
-
-    return {"result": "ok"}
+        # send ждёт, пока клиент примет кадр, — это и держит обратное давление
+        try:
+            async for lines in stream.batches(max_lines, window_ms / 1000):
+                await websocket.send_text(
+                    json.dumps({"type": "lines", "lines": lines}, separators=(",", ":"))
+                )
+        except EngineError as e:
+            await websocket.send_json({"type": "error", "message": f"Failed to read logs: {e}"})
+            await websocket.close(code=1011, reason="Failed to read logs")
+            return
+        await websocket.send_json({"type": "end"})
+        await websocket.close()
+    except Exception:
+        pass
+    finally:
+        watcher.cancel()
+        stream.close()
 
 
-@router.post("/{container_id}/stop")
-def stop_container(
+@router.get("/{container_id}/logs/stream")
+async def follow_container_logs_sse(
     container_id: str,
-    client: DockerClient = Depends(get_docker_client),
+    tail: int = Query(100, ge=0, le=5000),
+    since: int | None = Query(None, ge=0),
+    timestamps: bool = Query(False),
+    window_ms: int = Query(100, ge=10, le=2000),
+    max_lines: int = Query(500, ge=1, le=5000),
+    engine: DockerEngine = Depends(get_docker_engine),
 ):
+    """
+    То же, что /logs/ws, но через Server-Sent Events: в data каждого
+    события — массив строк, в конце событие `end` (или `error`
+    с {"message": "..."}, если чтение у демона оборвалось).
+    """
     try:
-        c: Container = client.containers.get(container_id)
-    except Exception:
+        stream = await _open_log_stream(engine, container_id, tail, since, timestamps)
+    except EngineNotFound:
         raise HTTPException(status_code=404, detail="Container not found")
-
-    try:
-        c.stop()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to stop: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to read logs: {e}")
 
-    return {"result": "ok"}
+    async def events():
+        try:
+            async for lines in stream.batches(max_lines, window_ms / 1000):
+                yield f"data: {json.dumps(lines, separators=(',', ':'))}\n\n"
+        except EngineError as e:
+            error = json.dumps({"message": f"Failed to read logs: {e}"})
+            yield f"event: error\ndata: {error}\n\n"
+            return
+        finally:
+            stream.close()
+        yield "event: end\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(stream.close),
+    )
 
 
-@router.post("/{container_id}/restart")
-def restart_container(
-    container_id: str,
-    client: DockerClient = Depends(get_docker_client),
+@router.post("/actions")
+async def bulk_container_action(
+    payload: ContainerBulkActionRequest,
+    engine: DockerEngine = Depends(get_docker_engine),
 ):
+    """
+    Одно действие над многими контейнерами: параллельно, не больше
+    parallelism одновременно, у каждого свой timeout.
+
+    Ответ — NDJSON по мере завершения:
+      {"type": "result", "id", "action", "status", "error", "elapsed_ms"}
+      ...
+      {"type": "summary", "total", "ok", "failed"}
+    status: ok | not_found | timeout | error.
+    """
     try:
-        c: Container = client.containers.get(container_id)
-    except Exception:
-        raise HTTPException(status_code=404, detail="Container not found")
+        targets = await resolve_targets(engine, payload)
+    except EngineError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list containers: {e}")
+
+    async def results():
+        ok = 0
+        async for result in run_bulk_action(engine, payload, targets):
+            if result["status"] == "ok":
+                ok += 1
+            yield json.dumps({"type": "result", **result}) + "\n"
+        yield json.dumps(
+            {"type": "summary", "total": len(targets), "ok": ok, "failed": len(targets) - ok}
+        ) + "\n"
 
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+async def _container_action(action, container_id: str, verb: str) -> dict:
     try:
-        c.restart()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to restart: {e}")
+        await action(container_id)
+    except EngineNotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
+    except EngineError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to {verb}: {e}")
 
     return {"result": "ok"}
 
 
+@router.post("/{container_id}/start")
+async def start_container(
+    container_id: str,
+    engine: DockerEngine = Depends(get_docker_engine),
+):
+    return await _container_action(engine.start_container, container_id, "start")
+
+
+@router.post("/{container_id}/stop")
+async def stop_container(
+    container_id: str,
+    engine: DockerEngine = Depends(get_docker_engine),
+):
+    return await _container_action(engine.stop_container, container_id, "stop")
+
+
+@router.post("/{container_id}/restart")
+async def restart_container(
+    container_id: str,
+    engine: DockerEngine = Depends(get_docker_engine),
+):
+    return await _container_action(engine.restart_container, container_id, "restart")
+
+
 # ===== СОЗДАНИЕ НОВОГО КОНТЕЙНЕРА =====
 
 
 @router.post("", response_model=ContainerSummary, status_code=201)
-def create_container(
+async def create_container(
     payload: ContainerCreateRequest,
-    client: DockerClient = Depends(get_docker_client),
+    engine: DockerEngine = Depends(get_docker_engine),
+    pulls: PullManager = Depends(get_pull_manager),
 ) -> ContainerSummary:
-    ports_dict: dict[str, int | None] = {}
-    for p in payload.ports:
-        key = f"{p.container_port}/{p.protocol}"
-        ports_dict[key] = p.host_port if p.host_port is not None else None
-
-    volumes_dict: dict[str, dict] = {}
-    for v in payload.volumes:
-        volumes_dict[v.volume_name] = {
-            "bind": v.mountpoint,
-            "mode": "ro" if v.read_only else "rw",
-        }
-
-    restart_policy = {}
-    if payload.restart_policy and payload.restart_policy != "no":
-        restart_policy = {"Name": payload.restart_policy}
-
+    """
+    Создать и запустить контейнер в рамках запроса. Если образ ещё
+    не скачан, лучше POST /jobs — pull может идти дольше таймаута прокси.
+    """
     try:
-        c: Container = client.containers.run(
-            image=payload.image,
-            name=payload.name or None,
-            detach=True,
-            ports=ports_dict or None,
-            environment=payload.env or None,
-            volumes=volumes_dict or None,
-            restart_policy=restart_policy or None,
-        )
-    except Exception as e:
+        return await create_and_start(engine, pulls, payload)
+    except EngineError as e:
         raise HTTPException(status_code=500, detail=f"Failed to create container: {e}")
 
-    # берём свежие атрибуты после создания
-    c.reload()
-    attrs = c.attrs or {}
-    state = attrs.get("State", {}) or {}
-    status = state.get("Status") or c.status or "unknown"
-    net = attrs.get("NetworkSettings", {}) or {}
-    port_data = net.get("Ports") or {}
 
-    image_name = ""
-    if c.image:
-        if c.image.tags:
-            image_name = c.image.tags[0]
-        else:
-            image_name = c.image.short_id
+@router.post("/jobs", status_code=202)
+async def create_container_job(
+    payload: ContainerCreateRequest,
+    response: Response,
+    engine: DockerEngine = Depends(get_docker_engine),
+    pulls: PullManager = Depends(get_pull_manager),
+    jobs: JobRegistry = Depends(get_job_registry),
+):
+    """
+    Создание контейнера фоновым заданием: сразу 202 и id задания.
+    Статус — GET /api/v1/jobs/{id}, прогресс — WS /api/v1/jobs/{id}/ws.
+    """
 
-    return ContainerSummary(
-        id=c.id,
-        name=c.name,
-        image=image_name,
-        status=status,
-        state=status,
-        ports=_map_ports(port_data),
-    )
+    async def run(job: Job) -> dict:
+        summary = await create_and_start(engine, pulls, payload, on_event=job.publish)
+        return summary.model_dump()
+
+    job = jobs.start("container.create", run, params={"image": payload.image, "name": payload.name})
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return job.to_dict()
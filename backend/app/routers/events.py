@@ -1,103 +1,138 @@
 from __future__ import annotations
 
 import asyncio
-import threading
-from datetime import datetime, timezone
+import json
 
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
-from docker.client import DockerClient
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
 
-from app.deps import get_docker_client
+from app.services.events_hub import (
+    OVERFLOW_POLICIES,
+    EventFilter,
+    EventsHub,
+    Subscription,
+    SubscriptionClosed,
+    coalesce_events,
+    get_events_hub,
+)
 
 router = APIRouter()
 
 
+async def _watch_disconnect(websocket: WebSocket, sub: Subscription) -> None:
+    """
+    Клиент нам ничего не пишет, но читать нужно — иначе об отключении
+    узнаем только на следующем событии, а подписка всё это время висит.
+    """
+    try:
+        while True:
+            msg = await websocket.receive()
+            if msg.get("type") == "websocket.disconnect":
+                break
+    except Exception:
+        pass
+    sub.close()
+
+
 @router.websocket("/stream")
 async def docker_events_stream(
     websocket: WebSocket,
-    client: DockerClient = Depends(get_docker_client),
+    since: int | None = Query(None, ge=0),
+    queue_size: int | None = Query(None, ge=1, le=10000),
+    overflow: str | None = Query(None),
+    batch: bool = Query(False),
+    window_ms: int = Query(75, ge=10, le=1000),
+    max_batch: int = Query(200, ge=1, le=5000),
+    container: list[str] = Query([]),
+    image: list[str] = Query([]),
+    label: list[str] = Query([]),
+    event: list[str] = Query([]),
+    type_: list[str] = Query([], alias="type"),
+    hub: EventsHub = Depends(get_events_hub),
 ):
     """
-    Стрим событий Docker через docker.events.
+    Стрим событий Docker через общий хаб событий.
 
-    Маппинг:
+    Маппинг — см. map_container_event:
       create  -> type: "created"
       destroy -> type: "removed"
       start/restart/unpause -> type: "status_change", status: "running"
       stop/kill/die         -> type: "status_change", status: "exited"
       pause                  -> type: "status_change", status: "paused"
+
+    У каждого события есть seq. Переподключаясь с ?since=<seq>, клиент
+    получает только пропущенные события. Служебные кадры:
+      {"type": "hello", "seq": N}            — подключение без since, N — текущий курсор
+      {"type": "resync_required", "seq": N}  — пропущенное уже не догнать,
+                                               перечитайте списки и продолжайте с N
+
+    queue_size / overflow — размер очереди подписчика и что делать при
+    переполнении (drop_oldest | disconnect).
+
+    batch=true — события копятся window_ms миллисекунд (или до max_batch штук)
+    и уходят одним кадром-массивом; смены статуса одного контейнера внутри
+    окна схлопываются до последней. Служебные кадры остаются объектами.
+
+    Фильтры (параметры можно повторять): container (id или имя), image,
+    label (key или key=value), event (действие Docker: start, die, ...),
+    type (created | status_change | removed).
     """
     await websocket.accept()
-    loop = asyncio.get_running_loop()
-    queue: asyncio.Queue[dict] = asyncio.Queue()
 
-    def pump_events():
-        try:
-            for ev in client.events(decode=True):
-                # передаём события в асинхронный цикл
-                asyncio.run_coroutine_threadsafe(queue.put(ev), loop)
-        except Exception:
-            # при закрытии сокета/демона просто выходим
-            pass
+    if overflow is not None and overflow not in OVERFLOW_POLICIES:
+        await websocket.close(code=1008, reason="Unknown overflow policy")
+        return
+
+    try:
+        event_filter = EventFilter.from_query(container, image, label, event, type_)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
 
-    # отдельный поток, чтобы не блокировать обработчик
-    t = threading.Thread(target=pump_events, daemon=True)
-    t.start()
+    sub = hub.subscribe(
+        maxsize=queue_size,
+        overflow=overflow,
+        since=since,
+        event_filter=event_filter,
+    )
+    watcher = asyncio.create_task(_watch_disconnect(websocket, sub))
 
     try:
-        while True:
-            ev = await queue.get()
-
-            if ev.get("Type") != "container":
-                continue
-
-            raw_status = (ev.get("status") or "").lower()
-            cid = ev.get("id") or ""
-            actor = ev.get("Actor") or {}
-            attrs = actor.get("Attributes") or {}
-
-            name = attrs.get("name") or cid[:12]
-            image = attrs.get("image") or ""
-
-            mapped_type: str | None = None
-            out_status: str = raw_status
-
-            if raw_status == "create":
-                mapped_type = "created"
-                out_status = "created"
-            elif raw_status in ("destroy",):
-                mapped_type = "removed"
-                out_status = "removed"
-            elif raw_status in ("start", "restart", "unpause"):
-                mapped_type = "status_change"
-                out_status = "running"
-            elif raw_status in ("stop", "kill", "die"):
-                mapped_type = "status_change"
-                out_status = "exited"
-            elif raw_status in ("pause",):
-                mapped_type = "status_change"
-                out_status = "paused"
-            else:
-                # остальные события нам пока не нужны
-                continue
-
-            now_iso = datetime.now(timezone.utc).isoformat()
-
-            await websocket.send_json(
-                {
-                    "type": mapped_type,
-                    "id": cid,
-                    "name": name,
-                    "image": image,
-                    "status": out_status,
-                    "raw_status": raw_status,
-                    "time": now_iso,
-                }
-            )
+        if sub.resync_required:
+            await websocket.send_json({"type": "resync_required", "seq": sub.start_seq})
+        elif since is None:
+            await websocket.send_json({"type": "hello", "seq": sub.start_seq})
+
+        if batch:
+            window = window_ms / 1000
+            while True:
+                events = coalesce_events(await sub.get_batch(max_batch, window))
+                await websocket.send_text(json.dumps(events, separators=(",", ":")))
+        else:
+            while True:
+                ev = await sub.get()
+                await websocket.send_json(ev)
+    except SubscriptionClosed:
+        if sub.slow:
+            # 1013 — Try Again Later: клиент не успевал разбирать события
+            try:
+                await websocket.close(code=1013, reason="Slow consumer")
+            except Exception:
+                pass
     except WebSocketDisconnect:
-        return
+        pass
     except Exception:
         try:
             await websocket.close()
         except Exception:
             pass
+    finally:
+        watcher.cancel()
+        sub.close()
+
+
+@router.get("/stats")
+def events_stats(hub: EventsHub = Depends(get_events_hub)):
+    """
+    Состояние хаба событий: подписчики, глубина очередей, потерянные события.
+    """
+    return hub.stats()
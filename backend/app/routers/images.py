@@ -1,109 +1,213 @@
-from typing import List
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.deps import get_docker_engine
+from app.routers.conditional import conditional_list
+from app.routers.listing import field_selection, list_query, paged_response
+from app.schemas import ImagePullRequest
+from app.services.containers_listing import list_container_refs
+from app.services.docker_engine import DockerEngine, EngineError
+from app.services.image_prewarm import ImagePrewarmer, get_image_prewarmer
+from app.services.image_pull import PullManager, get_pull_manager
+from app.services.listing import FieldSelection, ListQuery
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from docker.client import DockerClient
-from docker.models.images import Image
-from docker.models.containers import Container as DockerContainer
+router = APIRouter()
 
-from app.deps import get_docker_client
 
-router = APIRouter()
+def _repo_tags(attrs: dict) -> list[str]:
+    # как Image.tags в docker-py
+    return [t for t in (attrs.get("RepoTags") or []) if t != "<none>:<none>"]
+
+
+def _created(value) -> str:
+    # /images/json отдаёт unix-время, inspect — ISO-строку; наружу — ISO, как было
+    if isinstance(value, (int, float)):
+        if not value:
+            return ""
+        return datetime.fromtimestamp(value, timezone.utc).isoformat().replace("+00:00", "Z")
+    return str(value or "")
+
+
+def _image_item(attrs: dict) -> dict:
+    return {
+        "id": attrs.get("Id") or "",
+        "repo_tags": _repo_tags(attrs),
+        "size_bytes": int(attrs.get("Size") or 0),
+        "created": _created(attrs.get("Created")),
+    }
 
 
-@router.get("")
-def list_images(client: DockerClient = Depends(get_docker_client)):
+_IMAGE_FIELDS = ("id", "repo_tags", "size_bytes", "created")
+_IMAGE_DETAIL_FIELDS = (*_IMAGE_FIELDS, "virtual_size_bytes", "labels", "containers")
+_IMAGE_SORTS = {
+    "created": lambda a: int(a.get("Created") or 0),
+    "size": lambda a: int(a.get("Size") or 0),
+    "tag": lambda a: next(iter(_repo_tags(a)), ""),
+    "id": lambda a: a.get("Id") or "",
+}
+
+
+@router.get("", dependencies=[Depends(conditional_list("images"))])
+async def list_images(
+    request: Request,
+    response: Response,
+    name: Optional[str] = Query(None, description="подстрока тега или id, без учёта регистра"),
+    label: List[str] = Query([], description="key или key=value; несколько — все сразу"),
+    dangling: Optional[bool] = Query(None, description="true — только образы без тегов"),
+    query: ListQuery = Depends(list_query(tuple(_IMAGE_SORTS), "-created")),
+    fields: FieldSelection = Depends(field_selection(_IMAGE_FIELDS)),
+    engine: DockerEngine = Depends(get_docker_engine),
+):
     """
     Возвращает список образов в простом JSON-формате,
     без использования pydantic-схем (чтобы исключить ошибки валидации).
+
+    label и dangling фильтрует демон, name — здесь (у демона только
+    reference-шаблоны). sort/limit/cursor, fields — см. app/routers/listing.py.
     """
+    filters: dict = {}
+    if label:
+        filters["label"] = label
+    if dangling is not None:
+        filters["dangling"] = [str(dangling).lower()]
     try:
-        images: List[Image] = client.images.list()
-    except Exception as e:
+        images = await engine.images(filters=filters or None)
+    except EngineError as e:
         raise HTTPException(status_code=500, detail=f"Failed to list images: {e}")
 
-    result = []
-    for img in images:
-        attrs = img.attrs or {}
-        size = int(attrs.get("Size") or 0)
-        created = str(attrs.get("Created") or "")
-        tags = img.tags or []
+    if name:
+        needle = name.casefold()
+        images = [
+            a
+            for a in images
+            if any(needle in ref.casefold() for ref in [a.get("Id") or "", *_repo_tags(a)])
+        ]
+    return paged_response(
+        images,
+        query,
+        _IMAGE_SORTS,
+        lambda a: a.get("Id") or "",
+        request,
+        response,
+        render=lambda a: fields.project(_image_item(a)),
+    )
+
+
+@router.post("/pull")
+async def pull_image(
+    payload: ImagePullRequest,
+    background: bool = Query(False),
+    pulls: PullManager = Depends(get_pull_manager),
+):
+    """
+    Скачать образ. Повторный запрос того же образа присоединяется
+    к уже идущему pull, а не начинает второй.
+
+    Ответ — NDJSON со сводным прогрессом по всем слоям:
+      {"type": "pull", "image", "status", "layers", "layers_done",
+       "current", "total", "percent", "error"}
+    status: queued | pulling | done | failed; последняя строка — done или failed.
+    Если клиент ушёл, pull продолжается.
 
-        result.append(
-            {
-                "id": img.id,
-                "repo_tags": tags,
-                "size_bytes": size,
-                "created": created,
-            }
-        )
+    background=true — сразу 202 с текущим состоянием, прогресс — GET /pulls.
+    """
+    pull = pulls.pull(payload.image)
+    if background:
+        return JSONResponse(pull.snapshot(), status_code=202)
+
+    async def progress():
+        # слушатель — только пока тело реально читается: listen() сразу отдаёт
+        # снимок, так что ничего не теряется, а неначатый ответ не оставит
+        # слушателя висеть на pull
+        queue: asyncio.Queue = asyncio.Queue()
+        pull.listen(queue.put_nowait)
+        try:
+            while True:
+                event = await queue.get()
+                yield json.dumps(event, separators=(",", ":")) + "\n"
+                if event["status"] in ("done", "failed"):
+                    return
+        finally:
+            pull.unlisten(queue.put_nowait)
 
-    return result
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
+@router.get("/pulls")
+async def list_pulls(pulls: PullManager = Depends(get_pull_manager)):
+    """
+    Идущие сейчас pull (из POST /pull, заданий и развёртывания шаблонов).
+    """
+    return [pull.snapshot() for pull in pulls.active()]
+
+
+@router.get("/prewarm")
+async def prewarm_status(prewarmer: ImagePrewarmer = Depends(get_image_prewarmer)):
+    """
+    Состояние прогрева образов шаблонов (MIRA_PREWARM).
+    """
+    return prewarmer.stats()
 
 
 @router.get("/{image_id}")
-def get_image(image_id: str, client: DockerClient = Depends(get_docker_client)):
+async def get_image(
+    image_id: str,
+    fields: FieldSelection = Depends(field_selection(_IMAGE_DETAIL_FIELDS)),
+    engine: DockerEngine = Depends(get_docker_engine),
+):
     """
     Детальная информация об образе + список контейнеров, использующих его.
-    Тоже без pydantic-схем.
+    Тоже без pydantic-схем. Без containers в fields контейнеры не ищутся.
     """
     try:
-        img: Image = client.images.get(image_id)
-    except Exception:
-        try:
-            img = client.images.get(image_id.strip())
-        except Exception:
-            raise HTTPException(status_code=404, detail="Image not found")
+        attrs = await engine.inspect_image(image_id.strip())
+    except EngineError:
+        raise HTTPException(status_code=404, detail="Image not found")
 
-    try:
-        containers: List[DockerContainer] = client.containers.list(
-            all=True, filters={"ancestor": img.id}
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list containers: {e}")
+    cont_list = None
+    if "containers" in fields:
+        try:
+            cont_list = await list_container_refs(
+                engine, all=True, filters={"ancestor": attrs["Id"]}
+            )
+        except EngineError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to list containers: {e}")
 
-    attrs = img.attrs or {}
     size = int(attrs.get("Size") or 0)
     vsize = attrs.get("VirtualSize")
-    created = str(attrs.get("Created") or "")
-    labels = attrs.get("Config", {}).get("Labels") or {}
-
-    cont_list = []
-    for c in containers:
-        cattrs = c.attrs or {}
-        c_state = (cattrs.get("State") or {}).get("Status") or c.status or "unknown"
-        c_status = cattrs.get("Status") or c.status or ""
-        cont_list.append(
-            {
-                "id": c.id,
-                "name": c.name,
-                "state": c_state,
-                "status": c_status,
-            }
-        )
-
-    return {
-        "id": img.id,
-        "repo_tags": img.tags or [],
-        "size_bytes": size,
-        "virtual_size_bytes": vsize,
-        "created": created,
-        "labels": labels,
-        "containers": cont_list,
-    }
+    created = _created(attrs.get("Created"))
+    labels = (attrs.get("Config") or {}).get("Labels") or {}
+
+    return fields.project(
+        {
+            "id": attrs["Id"],
+            "repo_tags": _repo_tags(attrs),
+            "size_bytes": size,
+            "virtual_size_bytes": vsize,
+            "created": created,
+            "labels": labels,
+            "containers": cont_list,
+        }
+    )
 
 
 @router.delete("/{image_id}")
-def delete_image(
+async def delete_image(
     image_id: str,
-    client: DockerClient = Depends(get_docker_client),
+    engine: DockerEngine = Depends(get_docker_engine),
     force: bool = Query(False),
 ):
     """
     Удаление образа. Если force=true — как `docker rmi -f`.
     """
     try:
-        client.images.remove(image=image_id, force=force)
-    except Exception as e:
+        await engine.remove_image(image_id, force=force)
+    except EngineError as e:
         raise HTTPException(status_code=500, detail=f"Failed to remove image: {e}")
 
     return {"result": "ok"}
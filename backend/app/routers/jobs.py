@@ -0,0 +1,95 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+
+from app.services.jobs import TERMINAL_STATUSES, JobRegistry, get_job_registry
+
+router = APIRouter()
+
+
+@router.get("")
+def list_jobs(jobs: JobRegistry = Depends(get_job_registry)):
+    return [job.to_dict() for job in jobs.list()]
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str, jobs: JobRegistry = Depends(get_job_registry)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.delete("/{job_id}")
+def cancel_job(job_id: str, jobs: JobRegistry = Depends(get_job_registry)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job already finished")
+    return {"result": "ok"}
+
+
+async def _watch_disconnect(websocket: WebSocket, queue: asyncio.Queue) -> None:
+    try:
+        while True:
+            msg = await websocket.receive()
+            if msg.get("type") == "websocket.disconnect":
+                break
+    except Exception:
+        pass
+    # будим цикл отправки, чтобы он завершился; клиента уже нет —
+    # если очередь полна, старое событие можно выбросить
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+
+@router.websocket("/{job_id}/ws")
+async def job_progress_ws(
+    websocket: WebSocket,
+    job_id: str,
+    jobs: JobRegistry = Depends(get_job_registry),
+):
+    """
+    Прогресс задания. Первый кадр — {"type": "snapshot", "job": {...}},
+    дальше события задания; после финального статуса сокет закрывается.
+    Если задание уже завершено, финальный статус идёт сразу за снимком.
+    """
+    await websocket.accept()
+
+    job = jobs.get(job_id)
+    if job is None:
+        await websocket.close(code=1008, reason="Job not found")
+        return
+
+    # подписка и проверка статуса без await между ними: финальное событие
+    # либо уже случилось, либо попадёт в очередь
+    queue = job.subscribe()
+    finished = job.finished
+    watcher = asyncio.create_task(_watch_disconnect(websocket, queue))
+    try:
+        await websocket.send_json({"type": "snapshot", "job": job.to_dict()})
+        if finished:
+            await websocket.send_json(job.status_event())
+        else:
+            # очередь дочитывается до финального статуса, даже если задание
+            # завершилось, пока отправлялся снимок
+            while True:
+                event = await queue.get()
+                if event is None:
+                    return
+                await websocket.send_json(event)
+                if event.get("type") == "status" and event.get("status") in TERMINAL_STATUSES:
+                    break
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+    finally:
+        watcher.cancel()
+        job.unsubscribe(queue)
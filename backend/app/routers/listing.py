@@ -0,0 +1,81 @@
+"""
+Общие параметры списков: sort / limit / cursor и fields (app/services/listing.py).
+
+Тело ответа — тот же массив, что и без параметров; постраничность —
+в заголовках:
+  X-Total-Count — сколько элементов прошло фильтры;
+  X-Next-Cursor и Link rel="next" — если есть следующая страница.
+"""
+
+from typing import Any, Callable, List, Optional
+
+from fastapi import HTTPException, Query, Request, Response
+
+from app.routers.responses import FastJSONResponse, fast_json
+from app.services.listing import (
+    MAX_LIMIT,
+    FieldSelection,
+    ListQuery,
+    ListQueryError,
+    paginate,
+    parse_fields,
+    parse_list_query,
+)
+
+
+def list_query(fields: tuple[str, ...], default: str):
+    async def dependency(
+        sort: Optional[str] = Query(
+            None, description=f"{', '.join(fields)}; '-' в начале — по убыванию"
+        ),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor прошлой страницы"),
+    ) -> ListQuery:
+        try:
+            return parse_list_query(sort, limit, cursor, fields, default)
+        except ListQueryError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return dependency
+
+
+def field_selection(fields: tuple[str, ...]):
+    async def dependency(
+        fields_: List[str] = Query(
+            [], alias="fields", description=f"через запятую из: {', '.join(fields)}"
+        ),
+    ) -> FieldSelection:
+        try:
+            return parse_fields(fields_, fields)
+        except ListQueryError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return dependency
+
+
+def paged_response(
+    items: list,
+    query: ListQuery,
+    keys: dict[str, Callable[[Any], Any]],
+    ident: Callable[[Any], str],
+    request: Request,
+    response: Response,
+    render: Callable[[Any], Any] | None = None,
+) -> FastJSONResponse:
+    """
+    Отсортировать, вырезать страницу и отдать её; render — элемент -> вид в ответе
+    (вызывается только для попавших на страницу).
+    """
+    try:
+        page = paginate(items, query, keys, ident)
+    except ListQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response.headers["X-Total-Count"] = str(page.total)
+    if page.next_cursor is not None:
+        url = request.url.include_query_params(cursor=page.next_cursor)
+        response.headers["X-Next-Cursor"] = page.next_cursor
+        response.headers["Link"] = f'<{url.path}?{url.query}>; rel="next"'
+
+    result = page.items if render is None else [render(item) for item in page.items]
+    return fast_json(result, response)
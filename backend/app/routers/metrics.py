@@ -0,0 +1,17 @@
+from fastapi import APIRouter, HTTPException, Response
+
+from app.services.telemetry import get_telemetry
+
+router = APIRouter()
+
+
+@router.get("", include_in_schema=False)
+def metrics():
+    """
+    Метрики в текстовом формате Prometheus (app/services/telemetry.py).
+    """
+    telemetry = get_telemetry()
+    if telemetry is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body, content_type = telemetry.render()
+    return Response(content=body, media_type=content_type)
@@ -1,14 +1,17 @@
 # app/routers/networks.py
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
-from docker.client import DockerClient
-from docker.models.networks import Network as DockerNetwork
 
-from app.deps import get_docker_client
+from app.deps import get_docker_engine
+from app.routers.conditional import conditional_list
+from app.routers.listing import field_selection, list_query, paged_response
+from app.routers.responses import fast_json
 from app.schemas import NetworkSummary, NetworkDetail, NetworkContainerRef
+from app.services.docker_engine import DockerEngine, EngineError
+from app.services.listing import FieldSelection, ListQuery, name_pattern
 
 router = APIRouter()
 
@@ -20,46 +23,86 @@ class NetworkCreatePayload(BaseModel):
     attachable: bool | None = None
 
 
-def _map_network_summary(n: DockerNetwork) -> NetworkSummary:
-    attrs = n.attrs or {}
+def _map_network_summary(attrs: dict) -> NetworkSummary:
     driver = attrs.get("Driver") or ""
     scope = attrs.get("Scope")
     return NetworkSummary(
-        id=n.id,
-        name=n.name,
+        id=attrs.get("Id") or "",
+        name=attrs.get("Name") or "",
         driver=driver,
         scope=scope,
     )
 
 
-@router.get("", response_model=List[NetworkSummary])
-def list_networks(
-    client: DockerClient = Depends(get_docker_client),
+_NETWORK_SORTS = {
+    "name": lambda n: n.get("Name") or "",
+    "driver": lambda n: n.get("Driver") or "",
+    "scope": lambda n: n.get("Scope") or "",
+}
+
+
+@router.get(
+    "",
+    response_model=List[NetworkSummary],
+    dependencies=[Depends(conditional_list("networks"))],
+)
+async def list_networks(
+    request: Request,
+    response: Response,
+    name: Optional[str] = Query(None, description="подстрока имени, без учёта регистра"),
+    label: List[str] = Query([], description="key или key=value; несколько — все сразу"),
+    dangling: Optional[bool] = Query(
+        None, description="true — сети без контейнеров (кроме bridge/host/none)"
+    ),
+    query: ListQuery = Depends(list_query(tuple(_NETWORK_SORTS), "name")),
+    fields: FieldSelection = Depends(field_selection(tuple(NetworkSummary.model_fields))),
+    engine: DockerEngine = Depends(get_docker_engine),
 ) -> List[NetworkSummary]:
+    """
+    Все фильтры вычисляет демон; sort/limit/cursor, fields — см. app/routers/listing.py.
+    """
+    filters: dict = {}
+    if name:
+        filters["name"] = [name_pattern(name)]
+    if label:
+        filters["label"] = label
+    if dangling is not None:
+        filters["dangling"] = [str(dangling).lower()]
     try:
-        nets: List[DockerNetwork] = client.networks.list()
-    except Exception as e:
+        nets = await engine.networks(filters=filters or None)
+    except EngineError as e:
         raise HTTPException(status_code=500, detail=f"Failed to list networks: {e}")
 
-    return [_map_network_summary(n) for n in nets]
+    return paged_response(
+        nets,
+        query,
+        _NETWORK_SORTS,
+        lambda n: n.get("Id") or "",
+        request,
+        response,
+        render=lambda n: fields.project(_map_network_summary(n)),
+    )
 
 
 @router.get("/{network_id}", response_model=NetworkDetail)
-def get_network(
+async def get_network(
     network_id: str,
-    client: DockerClient = Depends(get_docker_client),
+    fields: FieldSelection = Depends(field_selection(tuple(NetworkDetail.model_fields))),
+    engine: DockerEngine = Depends(get_docker_engine),
 ) -> NetworkDetail:
+    """
+    fields — только эти поля; без containers подключения не разбираются.
+    """
     try:
-        n: DockerNetwork = client.networks.get(network_id)
-    except Exception:
+        attrs = await engine.inspect_network(network_id)
+    except EngineError:
         raise HTTPException(status_code=404, detail="Network not found")
 
-    attrs = n.attrs or {}
     driver = attrs.get("Driver") or ""
     scope = attrs.get("Scope")
     labels = attrs.get("Labels") or {}
 
-    containers_data = attrs.get("Containers") or {}
+    containers_data = (attrs.get("Containers") or {}) if "containers" in fields else {}
     containers: list[NetworkContainerRef] = []
 
     for cid, info in containers_data.items():
@@ -75,56 +118,58 @@ def get_network(
             )
         )
 
-    return NetworkDetail(
-        id=n.id,
-        name=n.name,
+    detail = NetworkDetail(
+        id=attrs.get("Id") or "",
+        name=attrs.get("Name") or "",
         driver=driver,
         scope=scope,
         labels=labels,
         containers=containers,
     )
+    return detail if fields.all else fast_json(fields.project(detail))
 
 
 @router.post("", response_model=NetworkSummary, status_code=201)
-def create_network(
+async def create_network(
     payload: NetworkCreatePayload,
-    client: DockerClient = Depends(get_docker_client),
+    engine: DockerEngine = Depends(get_docker_engine),
 ) -> NetworkSummary:
-    kwargs: dict = {
-        "name": payload.name,
-        "driver": payload.driver or "bridge",
+    config: dict = {
+        "Name": payload.name,
+        "Driver": payload.driver or "bridge",
     }
 
     if payload.internal is not None:
-        kwargs["internal"] = payload.internal
+        config["Internal"] = payload.internal
     if payload.attachable is not None:
-        kwargs["attachable"] = payload.attachable
+        config["Attachable"] = payload.attachable
 
     try:
-        n: DockerNetwork = client.networks.create(**kwargs)
-    except Exception as e:
+        created = await engine.create_network(config)
+        attrs = await engine.inspect_network(created["Id"])
+    except EngineError as e:
         raise HTTPException(status_code=500, detail=f"Failed to create network: {e}")
 
-    return _map_network_summary(n)
+    return _map_network_summary(attrs)
 
 
 @router.delete("/{network_id}")
-def delete_network(
+async def delete_network(
     network_id: str,
-    client: DockerClient = Depends(get_docker_client),
+    engine: DockerEngine = Depends(get_docker_engine),
 ):
     try:
-        n: DockerNetwork = client.networks.get(network_id)
-    except Exception:
+        attrs = await engine.inspect_network(network_id)
+    except EngineError:
         raise HTTPException(status_code=404, detail="Network not found")
 
     # Защитимся от удаления системных сетей
-    if n.name in ("bridge", "host", "none"):
+    if attrs.get("Name") in ("bridge", "host", "none"):
         raise HTTPException(status_code=400, detail="Cannot delete system network")
 
     try:
-        n.remove()
-    except Exception as e:
+        await engine.remove_network(attrs["Id"])
+    except EngineError as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete network: {e}")
 
     return {"result": "ok"}
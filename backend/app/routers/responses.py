@@ -0,0 +1,169 @@
+"""
+Быстрый JSON и сжатие ответов.
+
+FastJSONResponse — класс ответа по умолчанию для всего приложения:
+  - orjson, если установлен (иначе stdlib json в том же компактном виде);
+  - список pydantic-моделей одного типа сериализуется pydantic-core
+    целиком, без повторной валидации: списки, которые сервер собрал сам,
+    роуты отдают через fast_json() (response_model остаётся для OpenAPI);
+  - тело от MIRA_COMPRESS_MIN_SIZE байт сжимается по Accept-Encoding:
+    zstd (если установлен zstandard) или gzip. MIRA_COMPRESS_MIN_SIZE=0 —
+    без сжатия.
+
+Стримы (NDJSON, логи, события) идут мимо: сжатие задержало бы строки.
+"""
+
+import gzip
+import json
+import os
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - без orjson работает stdlib json
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - без zstandard остаётся gzip
+    zstandard = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("MIRA_COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("MIRA_GZIP_LEVEL", "5"))
+ZSTD_LEVEL = int(os.getenv("MIRA_ZSTD_LEVEL", "3"))
+# тела крупнее сжимаем в пуле потоков, чтобы не держать event loop
+_THREAD_SIZE = 256 * 1024
+
+# в порядке предпочтения при равном q
+ENCODINGS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+_KNOWN_ENCODINGS = ("zstd", "gzip")
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+@lru_cache(maxsize=64)
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def dumps(content: Any) -> bytes:
+    if (
+        isinstance(content, list)
+        and content
+        and isinstance(content[0], BaseModel)
+        and all(type(item) is type(content[0]) for item in content)
+    ):
+        return _list_adapter(type(content[0])).dump_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """
+    Accept-Encoding -> "zstd" | "gzip" | None, с учётом q-значений и "*".
+    """
+    explicit: dict[str, float] = {}
+    star: float | None = None
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name == "*":
+            star = q
+        else:
+            explicit[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = explicit.get(encoding, star if star is not None else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def strip_encoding(etag: str) -> str:
+    """
+    ETag сжатого ответа ("x-gzip") -> ETag представления без сжатия ("x").
+    """
+    for encoding in _KNOWN_ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            COMPRESS_MIN_SIZE > 0
+            and len(self.body) >= COMPRESS_MIN_SIZE
+            and 200 <= self.status_code < 300
+            and "content-encoding" not in self.headers
+        ):
+            await self._encode(Headers(scope=scope).get("accept-encoding", ""))
+        await super().__call__(scope, receive, send)
+
+    async def _encode(self, accept_encoding: str) -> None:
+        vary = self.headers.get("vary")
+        self.headers["vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            return
+        if len(self.body) >= _THREAD_SIZE:
+            self.body = await run_in_threadpool(_compress, self.body, encoding)
+        else:
+            self.body = _compress(self.body, encoding)
+        self.headers["content-encoding"] = encoding
+        self.headers["content-length"] = str(len(self.body))
+
+        # сильный ETag различает представления: у сжатого свой
+        etag = self.headers.get("etag")
+        if etag and etag.startswith('"'):
+            self.headers["etag"] = f'{etag[:-1]}-{encoding}"'
+
+
+def fast_json(content: Any, response: Response | None = None) -> FastJSONResponse:
+    """
+    Ответ из данных, собранных сервером, — без повторной валидации
+    по response_model. Заголовки, выставленные зависимостями через
+    response (ETag и т. п.), переносятся.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, headers=headers)
@@ -0,0 +1,152 @@
+import json
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.deps import get_docker_engine
+from app.schemas import StackSummary, TemplateSummary
+from app.services.docker_engine import DockerEngine
+from app.services.image_pull import PullManager, get_pull_manager
+from app.services.jobs import TERMINAL_STATUSES, Job, JobRegistry, get_job_registry
+from app.services.stack_deploy import StackDeployError, deploy_stack, stack_levels
+from app.services.stacks_store import (
+    StackExists,
+    StackNotFound,
+    StacksStore,
+    get_stacks_store,
+)
+from app.services.templates_store import (
+    TemplateNotFound,
+    TemplatesStore,
+    get_templates_store,
+)
+
+router = APIRouter()
+
+
+def _check_stack(stack: StackSummary, templates: TemplatesStore) -> dict[str, TemplateSummary]:
+    """
+    Все шаблоны на месте и нет циклов -> шаблон для каждого сервиса.
+    """
+    try:
+        stack_levels(stack)
+    except StackDeployError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    resolved: dict[str, TemplateSummary] = {}
+    for service in stack.services:
+        try:
+            resolved[service.name] = templates.get(service.template_id)
+        except TemplateNotFound:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Service {service.name!r}: template {service.template_id!r} not found",
+            )
+    return resolved
+
+
+@router.get("", response_model=List[StackSummary])
+def list_stacks(stacks: StacksStore = Depends(get_stacks_store)):
+    return stacks.list()
+
+
+@router.get("/{stack_id}", response_model=StackSummary)
+def get_stack(stack_id: str, stacks: StacksStore = Depends(get_stacks_store)):
+    try:
+        return stacks.get(stack_id)
+    except StackNotFound:
+        raise HTTPException(status_code=404, detail="Stack not found")
+
+
+@router.post("", response_model=StackSummary, status_code=201)
+def create_stack(
+    payload: StackSummary,
+    stacks: StacksStore = Depends(get_stacks_store),
+    templates: TemplatesStore = Depends(get_templates_store),
+):
+    _check_stack(payload, templates)
+    try:
+        return stacks.create(payload)
+    except StackExists:
+        raise HTTPException(status_code=400, detail="Stack id already exists")
+
+
+@router.put("/{stack_id}", response_model=StackSummary)
+def update_stack(
+    stack_id: str,
+    payload: StackSummary,
+    stacks: StacksStore = Depends(get_stacks_store),
+    templates: TemplatesStore = Depends(get_templates_store),
+):
+    _check_stack(payload, templates)
+    try:
+        return stacks.update(stack_id, payload)
+    except StackNotFound:
+        raise HTTPException(status_code=404, detail="Stack not found")
+    except StackExists:
+        raise HTTPException(
+            status_code=400, detail="Another stack with the same id already exists"
+        )
+
+
+@router.delete("/{stack_id}", status_code=204)
+def delete_stack(stack_id: str, stacks: StacksStore = Depends(get_stacks_store)):
+    try:
+        stacks.delete(stack_id)
+    except StackNotFound:
+        raise HTTPException(status_code=404, detail="Stack not found")
+    return
+
+
+@router.post("/{stack_id}/deploy")
+async def deploy(
+    stack_id: str,
+    background: bool = Query(False),
+    engine: DockerEngine = Depends(get_docker_engine),
+    pulls: PullManager = Depends(get_pull_manager),
+    jobs: JobRegistry = Depends(get_job_registry),
+    stacks: StacksStore = Depends(get_stacks_store),
+    templates: TemplatesStore = Depends(get_templates_store),
+):
+    """
+    Развернуть стек: общая сеть, параллельный pull всех образов, затем
+    контейнеры по уровням depends_on (внутри уровня — параллельно).
+    При ошибке созданное удаляется.
+
+    Развёртывание идёт фоновым заданием и не прерывается, если клиент ушёл.
+    Ответ — NDJSON с событиями задания до финального
+    {"type": "status", "status": done|failed|cancelled, ...}.
+    background=true — сразу 202 и задание (прогресс — WS /api/v1/jobs/{id}/ws).
+    Отмена — DELETE /api/v1/jobs/{id}, тоже с откатом.
+    """
+    try:
+        stack = await run_in_threadpool(stacks.get, stack_id)
+    except StackNotFound:
+        raise HTTPException(status_code=404, detail="Stack not found")
+    resolved = await run_in_threadpool(_check_stack, stack, templates)
+    levels = stack_levels(stack)
+
+    async def run(job: Job) -> dict:
+        return await deploy_stack(engine, pulls, stack, resolved, levels, on_event=job.publish)
+
+    job = jobs.start("stack.deploy", run, params={"stack": stack.id})
+    headers = {"Location": f"/api/v1/jobs/{job.id}"}
+    if background:
+        return JSONResponse(job.to_dict(), status_code=202, headers=headers)
+
+    # подписка до первого await — задание ещё не успело ничего опубликовать
+    queue = job.subscribe()
+
+    async def progress():
+        try:
+            while True:
+                event = await queue.get()
+                yield json.dumps(event, separators=(",", ":")) + "\n"
+                if event.get("type") == "status" and event.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            job.unsubscribe(queue)
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson", headers=headers)
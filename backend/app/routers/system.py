@@ -1,6 +1,11 @@
 from fastapi import APIRouter
 from datetime import datetime
 
+from app.deps import get_docker_engine
+from app.services.containers_inventory import get_container_inventory
+from app.services.resource_versions import get_resource_versions
+from app.services.stats_sampler import get_stats_sampler
+
 router = APIRouter()
 
 
@@ -11,3 +16,58 @@ def health():
         "service": "mira-api",
         "time": datetime.utcnow().isoformat() + "Z",
     }
+
+
+@router.get("/inventory")
+def inventory_status():
+    """
+    Состояние инвентаря контейнеров: поколение и время последней сверки.
+    """
+    try:
+        inventory = get_container_inventory()
+    except Exception:
+        return {"enabled": True, "ready": False}
+    if inventory is None:
+        return {"enabled": False}
+    return inventory.status()
+
+
+@router.get("/stats-sampler")
+def stats_sampler_status():
+    """
+    Состояние фонового сборщика статистики: число потоковых подписок.
+    """
+    try:
+        sampler = get_stats_sampler()
+    except Exception:
+        return {"enabled": True, "streams": 0}
+    if sampler is None:
+        return {"enabled": False}
+    return sampler.status()
+
+
+@router.get("/etags")
+def resource_versions_status():
+    """
+    Поколения списков для ETag; ready=false — ETag сейчас не выдаются.
+    """
+    try:
+        versions = get_resource_versions()
+    except Exception:
+        return {"enabled": True, "ready": False}
+    if versions is None:
+        return {"enabled": False}
+    return versions.stats()
+
+
+@router.get("/docker")
+def docker_client_status():
+    """
+    Клиент Docker API: лимиты пула, активные/простаивающие соединения,
+    ожидание слота и задержки по эндпоинтам.
+    """
+    try:
+        engine = get_docker_engine()
+    except Exception:
+        return {"enabled": False}
+    return engine.stats()
@@ -1,123 +1,141 @@
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-
-from app.schemas import TemplateSummary
-from app.services.templates_store import load_templates, save_templates
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.schemas import TemplateListItem, TemplateSummary
+from app.services.image_prewarm import ImagePrewarmer, get_image_prewarmer
+from app.services.templates_bundle import (
+    JsonArraySplitter,
+    NdjsonSplitter,
+    export_bundle,
+    import_bundle,
+)
+from app.services.templates_store import (
+    TemplateExists,
+    TemplateNotFound,
+    TemplatesStore,
+    get_templates_store,
+)
 
 router = APIRouter()
 
 
-def _find_index(templates: List[TemplateSummary], template_id: str) -> int:
-    for i, t in enumerate(templates):
-        if t.id == template_id:
-            return i
-    return -1
-
-
 # ===== Базовый список =====
 
-@router.get("", response_model=List[TemplateSummary])
-def list_templates():
-    return load_templates()
+@router.get("", response_model=List[TemplateListItem])
+async def list_templates(
+    store: TemplatesStore = Depends(get_templates_store),
+    prewarmer: ImagePrewarmer = Depends(get_image_prewarmer),
+):
+    """
+    Шаблоны + image_status: скачан ли образ на этом хосте.
+    """
+    templates = await run_in_threadpool(store.list)
+    prewarmer.refresh_if_stale()
+    return [
+        {**t.model_dump(), "image_status": prewarmer.status(t.image)}
+        for t in templates
+    ]
 
 
 # ===== Сначала спец-роуты: export / import =====
 
-class TemplatesImportPayload(BaseModel):
-    templates: list[TemplateSummary]
-
-
 @router.get("/export")
-def export_templates():
+def export_templates(
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    store: TemplatesStore = Depends(get_templates_store),
+):
     """
-    Отдать все шаблоны одним JSON-файлом.
+    Все шаблоны одним файлом: JSON-массив (по умолчанию) или NDJSON.
+    Отдаётся кусками по мере сериализации.
     """
-    templates = load_templates()
-    return JSONResponse(
-        content=[t.model_dump(mode="json") for t in templates],
-        media_type="application/json",
-    )
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(export_bundle(store, format), media_type=media_type)
 
 
-@router.post("/import", response_model=list[TemplateSummary])
-def import_templates(
-    payload: TemplatesImportPayload,
+@router.post("/import")
+async def import_templates(
+    request: Request,
     mode: str = Query("merge", pattern="^(merge|replace)$"),
+    store: TemplatesStore = Depends(get_templates_store),
+    prewarmer: ImagePrewarmer = Depends(get_image_prewarmer),
 ):
     """
-    Импорт шаблонов.
+    Импорт шаблонов потоком. Тело — NDJSON (Content-Type: application/x-ndjson)
+    либо JSON-массив / {"templates": [...]}.
     mode=merge (по умолчанию) — обновить существующие по id и добавить новые.
-    mode=replace — полностью заменить текущий список.
+    mode=replace — то же, а в конце удалить шаблоны, которых нет в бандле;
+    пустой бандл ([] или пустой NDJSON) очищает каталог, а бандл, где
+    не прошёл ни один элемент, ничего не удаляет.
+
+    Битые элементы не прерывают импорт:
+      {"total", "created", "updated", "deleted", "failed",
+       "errors": [{"index", "id", "error"}], "errors_truncated", "aborted"}
+    Если сломана сама структура тела — 400 с тем же отчётом
+    (уже записанные пачки остаются, replace ничего не удаляет).
     """
-    existing = load_templates()
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        splitter = NdjsonSplitter()
+    else:
+        splitter = JsonArraySplitter()
 
-    if mode == "replace":
-        merged = payload.templates
-    else:  # merge
-        merged: list[TemplateSummary] = existing.copy()
-        for new_tpl in payload.templates:
-            for i, old in enumerate(merged):
-                if old.id == new_tpl.id:
-                    merged[i] = new_tpl
-                    break
-            else:
-                merged.append(new_tpl)
-
-    save_templates(merged)
-    return merged
+    report = await import_bundle(store, request.stream(), splitter, replace=mode == "replace")
+    if report["created"] or report["updated"]:
+        prewarmer.trigger()
+    return JSONResponse(report, status_code=400 if report["aborted"] else 200)
 
 
 # ===== Теперь роуты с параметром {template_id} =====
 
 @router.get("/{template_id}", response_model=TemplateSummary)
-def get_template(template_id: str):
-    templates = load_templates()
-    idx = _find_index(templates, template_id)
-    if idx < 0:
+def get_template(template_id: str, store: TemplatesStore = Depends(get_templates_store)):
+    try:
+        return store.get(template_id)
+    except TemplateNotFound:
         raise HTTPException(status_code=404, detail="Template not found")
-    return templates[idx]
 
 
 @router.post("", response_model=TemplateSummary, status_code=201)
-def create_template(payload: TemplateSummary):
-    templates = load_templates()
-
-    if any(t.id == payload.id for t in templates):
+def create_template(
+    payload: TemplateSummary,
+    store: TemplatesStore = Depends(get_templates_store),
+    prewarmer: ImagePrewarmer = Depends(get_image_prewarmer),
+):
+    try:
+        template = store.create(payload)
+    except TemplateExists:
         raise HTTPException(status_code=400, detail="Template id already exists")
-
-    templates.append(payload)
-    save_templates(templates)
-    return payload
+    prewarmer.trigger()
+    return template
 
 
 @router.put("/{template_id}", response_model=TemplateSummary)
-def update_template(template_id: str, payload: TemplateSummary):
-    templates = load_templates()
-    idx = _find_index(templates, template_id)
-    if idx < 0:
+def update_template(
+    template_id: str,
+    payload: TemplateSummary,
+    store: TemplatesStore = Depends(get_templates_store),
+    prewarmer: ImagePrewarmer = Depends(get_image_prewarmer),
+):
+    # id можно поменять, если новый не занят
+    try:
+        template = store.update(template_id, payload)
+    except TemplateNotFound:
         raise HTTPException(status_code=404, detail="Template not found")
-
-    # если id поменяли — проверим на уникальность
-    if payload.id != template_id and any(t.id == payload.id for t in templates):
+    except TemplateExists:
         raise HTTPException(
             status_code=400, detail="Another template with the same id already exists"
         )
-
-    templates[idx] = payload
-    save_templates(templates)
-    return payload
+    prewarmer.trigger()
+    return template
 
 
 @router.delete("/{template_id}", status_code=204)
-def delete_template(template_id: str):
-    templates = load_templates()
-    idx = _find_index(templates, template_id)
-    if idx < 0:
+def delete_template(template_id: str, store: TemplatesStore = Depends(get_templates_store)):
+    try:
+        store.delete(template_id)
+    except TemplateNotFound:
         raise HTTPException(status_code=404, detail="Template not found")
-
-    templates.pop(idx)
-    save_templates(templates)
     return
@@ -1,42 +1,81 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
-from docker.client import DockerClient
+from fastapi import APIRouter, Depends, Query, Request, Response
 
-from app.deps import get_docker_client
+from app.deps import get_docker_engine
+from app.routers.conditional import conditional_list
+from app.routers.listing import field_selection, list_query, paged_response
 from app.schemas import VolumeSummary
+from app.services.containers_inventory import parse_docker_time
+from app.services.docker_engine import DockerEngine
+from app.services.listing import FieldSelection, ListQuery, name_pattern
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[VolumeSummary])
-def list_volumes(
-    client: DockerClient = Depends(get_docker_client),
-) -> List[VolumeSummary]:
-    vols = client.volumes.list()
-    result: List[VolumeSummary] = []
-
-    for v in vols:
-        attrs = v.attrs or {}
-        created_at = None
-        try:
-            created_raw = attrs.get("CreatedAt")
-            if isinstance(created_raw, str):
-                created_at = datetime.fromisoformat(
-                    created_raw.replace("Z", "+00:00")
-                )
-        except Exception:
-            created_at = None
-
-        result.append(
-            VolumeSummary(
-                name=v.name,
-                driver=attrs.get("Driver", ""),
-                mountpoint=attrs.get("Mountpoint", ""),
-                labels=attrs.get("Labels") or {},
-                created_at=created_at,
+def _volume_summary(attrs: dict) -> VolumeSummary:
+    created_at = None
+    try:
+        created_raw = attrs.get("CreatedAt")
+        if isinstance(created_raw, str):
+            created_at = datetime.fromisoformat(
+                created_raw.replace("Z", "+00:00")
             )
-        )
+    except Exception:
+        created_at = None
+
+    return VolumeSummary(
+        name=attrs.get("Name") or "",
+        driver=attrs.get("Driver", ""),
+        mountpoint=attrs.get("Mountpoint", ""),
+        labels=attrs.get("Labels") or {},
+        created_at=created_at,
+    )
+
+
+_VOLUME_SORTS = {
+    "name": lambda a: a.get("Name") or "",
+    "created": lambda a: parse_docker_time(a.get("CreatedAt")),
+    "driver": lambda a: a.get("Driver") or "",
+}
+
+
+@router.get(
+    "",
+    response_model=List[VolumeSummary],
+    dependencies=[Depends(conditional_list("volumes"))],
+)
+async def list_volumes(
+    request: Request,
+    response: Response,
+    name: Optional[str] = Query(None, description="подстрока имени, без учёта регистра"),
+    label: List[str] = Query([], description="key или key=value; несколько — все сразу"),
+    dangling: Optional[bool] = Query(
+        None, description="true — тома, не подключённые ни к одному контейнеру"
+    ),
+    query: ListQuery = Depends(list_query(tuple(_VOLUME_SORTS), "name")),
+    fields: FieldSelection = Depends(field_selection(tuple(VolumeSummary.model_fields))),
+    engine: DockerEngine = Depends(get_docker_engine),
+) -> List[VolumeSummary]:
+    """
+    Все фильтры вычисляет демон; sort/limit/cursor, fields — см. app/routers/listing.py.
+    """
+    filters: dict = {}
+    if name:
+        filters["name"] = [name_pattern(name)]
+    if label:
+        filters["label"] = label
+    if dangling is not None:
+        filters["dangling"] = [str(dangling).lower()]
+    vols = await engine.volumes(filters=filters or None)
 
-    return result
+    return paged_response(
+        vols,
+        query,
+        _VOLUME_SORTS,
+        lambda a: a.get("Name") or "",
+        request,
+        response,
+        render=lambda a: fields.project(_volume_summary(a)),
+    )
@@ -3,21 +3,30 @@
 from .containers import (
     ContainerSummary,
     ContainerDetail,
+    ContainerStats,
+    ContainerMetrics,
+    ContainerMetricsBulk,
+    ContainerMetricsSeries,
     PortMapping,
     ContainerCreateRequest,
+    ContainerBulkActionRequest,
 )
 
 from .templates import (
     TemplateSummary,
+    TemplateListItem,
     TemplateDetail,
     TemplateCreateRequest,
     TemplateUpdateRequest,
     TemplateVolumeMount,
+    StackService,
+    StackSummary,
 )
 
 from .images_volumes import (
     ImageSummary,
     VolumeSummary,
+    ImagePullRequest,
 )
 
 from .networks import (
@@ -30,19 +39,28 @@ __all__ = [
     # containers
     "ContainerSummary",
     "ContainerDetail",
+    "ContainerStats",
+    "ContainerMetrics",
+    "ContainerMetricsBulk",
+    "ContainerMetricsSeries",
     "PortMapping",
     "ContainerCreateRequest",
+    "ContainerBulkActionRequest",
 
     # templates
     "TemplateSummary",
+    "TemplateListItem",
     "TemplateDetail",
     "TemplateCreateRequest",
     "TemplateUpdateRequest",
     "TemplateVolumeMount",
+    "StackService",
+    "StackSummary",
 
     # images & volumes
     "ImageSummary",
     "VolumeSummary",
+    "ImagePullRequest",
 
     # networks
     "NetworkSummary",
@@ -1,7 +1,7 @@
 # app/schemas/containers.py
 
-from typing import List, Dict, Optional
-from pydantic import BaseModel
+from typing import List, Dict, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
 
 
 class PortMapping(BaseModel):
@@ -25,6 +25,51 @@ class ContainerDetail(ContainerSummary):
     uptime: Optional[str] = None
 
 
+class ContainerStats(BaseModel):
+    """
+    Последний замер ресурсов контейнера от фонового сборщика.
+    timestamp — unix-время замера.
+    """
+
+    id: str
+    cpu_percent: Optional[float] = None
+    memory_usage: Optional[int] = None
+    memory_limit: Optional[int] = None
+    memory_percent: Optional[float] = None
+    timestamp: float
+
+
+class ContainerMetricsSeries(BaseModel):
+    """
+    Значения метрик на общей сетке timestamps; None — замера не было.
+    """
+
+    cpu_percent: List[Optional[float]] = []
+    memory_usage: List[Optional[int]] = []
+
+
+class ContainerMetrics(ContainerMetricsSeries):
+    """
+    История одного контейнера. range/step — в секундах.
+    """
+
+    id: str
+    range: int
+    step: int
+    timestamps: List[int] = []
+
+
+class ContainerMetricsBulk(BaseModel):
+    """
+    История нескольких контейнеров в столбцах: одна сетка timestamps на всех.
+    """
+
+    range: int
+    step: int
+    timestamps: List[int] = []
+    series: Dict[str, ContainerMetricsSeries] = {}
+
+
 class VolumeMount(BaseModel):
     """
     Описание одного тома при создании контейнера.
@@ -58,3 +103,31 @@ class ContainerCreateRequest(BaseModel):
 
     # политика рестарта: "no", "always", "unless-stopped", "on-failure"
     restart_policy: Optional[str] = None
+
+
+class ContainerBulkActionRequest(BaseModel):
+    """
+    Тело POST /api/v1/containers/actions.
+    Контейнеры задаются списком ids (id или имена) и/или селектором
+    labels ("key" или "key=value", условия через И).
+    """
+
+    action: Literal["start", "stop", "restart", "kill", "remove"]
+    ids: List[str] = []
+    labels: List[str] = []
+
+    # сколько контейнеров обрабатывать одновременно и сколько ждать каждый
+    parallelism: Optional[int] = Field(None, ge=1, le=64)
+    timeout: Optional[float] = Field(None, gt=0, le=600)
+
+    # параметры отдельных действий
+    stop_timeout: Optional[int] = Field(None, ge=0, le=600)
+    signal: Optional[str] = None
+    force: bool = False
+    remove_volumes: bool = False
+
+    @model_validator(mode="after")
+    def _check_targets(self):
+        if not self.ids and not self.labels:
+            raise ValueError("ids or labels must be set")
+        return self
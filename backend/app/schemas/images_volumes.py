@@ -1,8 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel
 from typing import List, Dict
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ImageSummary(BaseModel):
@@ -34,3 +33,7 @@ class ImageDetail(BaseModel):
     created: str
     labels: Dict[str, str]
     containers: List[ImageContainerRef] = []
+
+
+class ImagePullRequest(BaseModel):
+    image: str = Field(..., min_length=1)
@@ -1,7 +1,7 @@
 # app/schemas/templates.py
 
 from typing import List, Dict, Optional, Union
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 from .containers import PortMapping
 
@@ -48,6 +48,15 @@ class TemplateSummary(TemplateBase):
     id: Union[int, str]
 
 
+class TemplateListItem(TemplateSummary):
+    """
+    Элемент списка шаблонов: плюс состояние образа на этом хосте
+    (warm | cold | pulling | failed; None — ещё не сверяли).
+    """
+
+    image_status: Optional[str] = None
+
+
 class TemplateDetail(TemplateSummary):
     """
     Детальный вид шаблона.
@@ -73,3 +82,53 @@ class TemplateUpdateRequest(TemplateBase):
     """
 
     pass
+
+
+class StackService(BaseModel):
+    """
+    Один контейнер стека: шаблон + переопределения.
+    name — уникален в стеке; это и сетевой alias в общей сети,
+    и суффикс имени контейнера (<stack_id>-<name>).
+    """
+
+    name: str = Field(..., pattern=r"^[a-zA-Z0-9][a-zA-Z0-9_.-]*$")
+    template_id: Union[int, str]
+
+    # кого нужно запустить раньше (имена сервисов этого же стека)
+    depends_on: List[str] = []
+
+    # поверх ENV шаблона
+    env: Dict[str, str] = {}
+
+    # None — порты из шаблона, [] — без публикации портов
+    ports: Optional[List[PortMapping]] = None
+
+
+class StackBase(BaseModel):
+    """
+    Стек: несколько шаблонов, разворачиваемых вместе в общей сети.
+    """
+
+    name: str
+    description: Optional[str] = None
+    services: List[StackService] = Field(..., min_length=1)
+
+    # общая сеть; по умолчанию mira-<stack_id>
+    network: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _check_services(self):
+        names = [s.name for s in self.services]
+        if len(set(names)) != len(names):
+            raise ValueError("service names must be unique")
+        for service in self.services:
+            unknown = set(service.depends_on) - set(names)
+            if unknown:
+                raise ValueError(
+                    f"service {service.name!r} depends on unknown {sorted(unknown)}"
+                )
+        return self
+
+
+class StackSummary(StackBase):
+    id: str = Field(..., pattern=r"^[a-zA-Z0-9][a-zA-Z0-9_.-]*$")
@@ -0,0 +1,99 @@
+"""
+Массовые действия над контейнерами (start/stop/restart/kill/remove).
+
+Перезапуск стека из 30 контейнеров раньше был 30 последовательными
+запросами, каждый — до таймаута остановки. Здесь действия идут
+параллельно (не больше parallelism одновременно), у каждого свой
+таймаут, а результаты отдаются по мере завершения.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import AsyncIterator
+
+from app.schemas import ContainerBulkActionRequest
+from app.services.docker_engine import DockerEngine, EngineError, EngineNotFound
+
+BULK_PARALLELISM = int(os.getenv("MIRA_BULK_PARALLELISM", "8"))
+BULK_ITEM_TIMEOUT = float(os.getenv("MIRA_BULK_ITEM_TIMEOUT", "60"))
+
+
+async def resolve_targets(engine: DockerEngine, request: ContainerBulkActionRequest) -> list[str]:
+    """
+    ids как есть (демон сам поймёт имя или префикс) + контейнеры по селектору
+    labels одним вызовом /containers/json. Повторы убираются.
+    """
+    targets: list[str] = []
+    seen: set[str] = set()
+    for ref in request.ids:
+        if ref and ref not in seen:
+            seen.add(ref)
+            targets.append(ref)
+
+    if request.labels:
+        for summary in await engine.containers(all=True, filters={"label": request.labels}):
+            cid = summary.get("Id") or ""
+            if cid and cid not in seen:
+                seen.add(cid)
+                targets.append(cid)
+    return targets
+
+
+def _action_call(engine: DockerEngine, request: ContainerBulkActionRequest, ref: str):
+    action = request.action
+    if action == "start":
+        return engine.start_container(ref)
+    if action == "stop":
+        return engine.stop_container(ref, timeout=request.stop_timeout)
+    if action == "restart":
+        return engine.restart_container(ref, timeout=request.stop_timeout)
+    if action == "kill":
+        return engine.kill_container(ref, signal=request.signal)
+    return engine.remove_container(ref, force=request.force, volumes=request.remove_volumes)
+
+
+async def run_bulk_action(
+    engine: DockerEngine,
+    request: ContainerBulkActionRequest,
+    targets: list[str],
+) -> AsyncIterator[dict]:
+    """
+    Результаты в порядке завершения:
+      {"id", "action", "status": ok|not_found|timeout|error, "error", "elapsed_ms"}
+    Если потребитель ушёл, незавершённые действия отменяются.
+    """
+    parallelism = request.parallelism or BULK_PARALLELISM
+    item_timeout = request.timeout or BULK_ITEM_TIMEOUT
+    slots = asyncio.Semaphore(parallelism)
+
+    async def run_one(ref: str) -> dict:
+        async with slots:
+            started = time.perf_counter()
+            status, error = "ok", None
+            try:
+                await asyncio.wait_for(_action_call(engine, request, ref), item_timeout)
+            except asyncio.TimeoutError:
+                # демон действие не отменяет — мы лишь перестали ждать
+                status, error = "timeout", f"No result in {item_timeout:g}s"
+            except EngineNotFound:
+                status, error = "not_found", "Container not found"
+            except EngineError as e:
+                status, error = "error", e.message
+            return {
+                "id": ref,
+                "action": request.action,
+                "status": status,
+                "error": error,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+
+    tasks = [asyncio.create_task(run_one(ref)) for ref in targets]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,96 @@
+"""
+Создание и запуск контейнера по ContainerCreateRequest.
+
+Общее для синхронного POST /api/v1/containers и фоновых заданий
+(POST /api/v1/containers/jobs): образ скачивается через PullManager,
+так что параллельные создания из одного образа делят один pull.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+from app.schemas import ContainerCreateRequest, ContainerSummary
+from app.services.containers_listing import image_display_name, summary_from_inspect
+from app.services.docker_engine import DockerEngine
+from app.services.image_pull import PullManager
+
+EventCallback = Callable[[dict], None]
+
+
+def create_config(
+    payload: ContainerCreateRequest,
+    *,
+    labels: dict[str, str] | None = None,
+    network: str | None = None,
+    aliases: list[str] | None = None,
+) -> dict:
+    """
+    ContainerCreateRequest -> тело POST /containers/create
+    (то же, что собирает docker-py в containers.run).
+    network — сразу подключить к сети (вместо bridge) с aliases.
+    """
+    exposed: dict[str, dict] = {}
+    bindings: dict[str, list[dict]] = {}
+    for p in payload.ports:
+        key = f"{p.container_port}/{p.protocol}"
+        exposed[key] = {}
+        bindings.setdefault(key, []).append(
+            {"HostIp": "", "HostPort": str(p.host_port) if p.host_port is not None else ""}
+        )
+
+    host_config: dict = {}
+    if bindings:
+        host_config["PortBindings"] = bindings
+    if payload.volumes:
+        host_config["Binds"] = [
+            f"{v.volume_name}:{v.mountpoint}:{'ro' if v.read_only else 'rw'}"
+            for v in payload.volumes
+        ]
+    if payload.restart_policy and payload.restart_policy != "no":
+        host_config["RestartPolicy"] = {"Name": payload.restart_policy}
+
+    if network:
+        host_config["NetworkMode"] = network
+
+    config: dict = {"Image": payload.image, "HostConfig": host_config}
+    if network:
+        endpoint = {"Aliases": aliases} if aliases else {}
+        config["NetworkingConfig"] = {"EndpointsConfig": {network: endpoint}}
+    if labels:
+        config["Labels"] = labels
+    if exposed:
+        config["ExposedPorts"] = exposed
+    if payload.env:
+        config["Env"] = [f"{k}={v}" for k, v in payload.env.items()]
+    return config
+
+
+async def create_and_start(
+    engine: DockerEngine,
+    pulls: PullManager,
+    payload: ContainerCreateRequest,
+    on_event: EventCallback | None = None,
+) -> ContainerSummary:
+    """
+    pull (если образа нет) -> create -> start -> inspect.
+    on_event получает {"type": "status", "status": ...} на каждом шаге
+    и события прогресса pull. EngineError пробрасывается наружу.
+    """
+
+    def emit(event: dict) -> None:
+        if on_event is not None:
+            on_event(event)
+
+    emit({"type": "status", "status": "pulling"})
+    await pulls.ensure_image(payload.image, on_progress=on_event)
+
+    emit({"type": "status", "status": "creating"})
+    created = await engine.create_container(create_config(payload), name=payload.name or None)
+
+    emit({"type": "status", "status": "starting"})
+    await engine.start_container(created["Id"])
+
+    # берём свежие атрибуты после запуска
+    attrs = await engine.inspect_container(created["Id"])
+    return summary_from_inspect(attrs, await image_display_name(engine, attrs.get("Image") or ""))
@@ -0,0 +1,462 @@
+"""
+Инвентарь контейнеров в памяти процесса.
+
+Один раз засеивается при старте, дальше поддерживается в актуальном
+состоянии по событиям Docker из общего хаба событий. Периодическая сверка (reconcile)
+сравнивает инвентарь с /containers/json, чтобы пропущенное событие
+не оставило его устаревшим.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+from docker.client import DockerClient
+
+from app.deps import get_docker_client
+from app.schemas import ContainerSummary
+from app.services.containers_listing import (
+    build_container_summary,
+    image_names_index,
+    image_short_id,
+)
+from app.services.docker_engine import DockerEngine
+from app.services.events_hub import EventsHub, get_events_hub
+from app.services.resource_versions import ResourceVersions, get_resource_versions
+
+INVENTORY_ENABLED = os.getenv("MIRA_INVENTORY", "1").lower() not in ("0", "false", "no")
+RECONCILE_INTERVAL = float(os.getenv("MIRA_INVENTORY_RECONCILE_SECONDS", "60"))
+
+# события контейнера, после которых имеет смысл перечитать его состояние
+_REFRESH_ACTIONS = {
+    "create",
+    "start",
+    "restart",
+    "stop",
+    "kill",
+    "die",
+    "oom",
+    "pause",
+    "unpause",
+    "rename",
+    "update",
+}
+# после них у контейнера новый StartedAt, а в сводке его нет — сбрасываем,
+# get() дочитает inspect'ом (иначе после running -> running остался бы старый)
+_STARTED_ACTIONS = {"start", "restart", "unpause"}
+_IMAGE_ACTIONS = {"tag", "untag", "delete", "import", "load", "pull"}
+_RUNNING_STATES = {"running", "paused", "restarting"}
+
+
+def parse_docker_time(value) -> float:
+    """
+    Время из Docker (ISO-строка с наносекундами или unix-время) -> unix-время.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return 0.0
+
+    raw = str(value).replace("Z", "+00:00")
+    # python не понимает больше 6 знаков в дробной части секунд
+    if "." in raw:
+        head, _, tail = raw.partition(".")
+        digits = ""
+        rest = ""
+        for i, ch in enumerate(tail):
+            if not ch.isdigit():
+                rest = tail[i:]
+                break
+            digits += ch
+        raw = f"{head}.{digits[:6]}{rest}" if digits else f"{head}{rest}"
+
+    try:
+        return datetime.fromisoformat(raw).timestamp()
+    except ValueError:
+        return 0.0
+
+
+@dataclass
+class InventoryEntry:
+    summary: ContainerSummary
+    image_id: str
+    created: float
+    started_at: str | None = None
+    labels: dict | None = None
+
+
+def inventory_entry(
+    summary: dict,
+    image_names: dict[str, str] | None,
+    with_ports: bool = True,
+) -> InventoryEntry:
+    """
+    Запись из сводки /containers/json (без started_at — его даёт только inspect).
+    """
+    return InventoryEntry(
+        summary=build_container_summary(summary, image_names, with_ports),
+        image_id=summary.get("ImageID") or "",
+        created=parse_docker_time(summary.get("Created")),
+        labels=summary.get("Labels") or {},
+    )
+
+
+class ContainerInventory:
+    def __init__(
+        self,
+        client: DockerClient,
+        hub: EventsHub,
+        versions: ResourceVersions | None = None,
+    ):
+        self._client = client
+        self._hub = hub
+        # поколение списка для ETag двигаем, когда данные уже применены
+        self._versions = versions
+        self._lock = threading.Lock()
+        self._entries: dict[str, InventoryEntry] = {}
+        self._by_name: dict[str, str] = {}
+        self._image_names: dict[str, str] = {}
+
+        self._generation = 0
+        self._synced_at: float | None = None
+        self._last_event_at: float | None = None
+        self._ready = False
+
+        # события копятся здесь, а применяются в отдельном потоке пачками —
+        # поток хаба событий не ждёт обращений к демону
+        self._dirty: set[str] = set()
+        self._images_dirty = False
+        self._reconcile_requested = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ===== жизненный цикл =====
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        # сначала подписываемся на события, потом сеем —
+        # так ничего не потеряется между засевом и стримом
+        self._hub.add_listener(
+            self._on_event,
+            types=("container", "image"),
+            on_reconnect=self.request_reconcile,
+        )
+        self._thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self._thread.start()
+
+        try:
+            self.reconcile()
+        except Exception:
+            # демон недоступен — попробуем на следующей сверке
+            pass
+
+    def stop(self) -> None:
+        self._hub.remove_listener(self._on_event)
+        self._stop.set()
+        self._wake.set()
+        self._thread = None
+
+    def request_reconcile(self) -> None:
+        self._reconcile_requested = True
+        self._wake.set()
+
+    # ===== состояние =====
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def synced_at(self) -> float | None:
+        return self._synced_at
+
+    def status(self) -> dict:
+        return {
+            "enabled": True,
+            "ready": self._ready,
+            "generation": self._generation,
+            "synced_at": self._synced_at,
+            "last_event_at": self._last_event_at,
+            "containers": len(self._entries),
+        }
+
+    # ===== чтение =====
+
+    def entries(self, all: bool = True) -> list[InventoryEntry]:
+        """
+        Записи (с метками и временем создания), новые первыми — как /containers/json.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+
+        entries.sort(key=lambda e: e.created, reverse=True)
+        return [e for e in entries if all or e.summary.state in _RUNNING_STATES]
+
+    def get(self, ref: str) -> InventoryEntry | None:
+        """
+        Поиск как у `docker inspect`: полный id, имя или уникальный префикс id.
+        При промахе идём в демон — контейнер мог появиться раньше события.
+        """
+        with self._lock:
+            entry = self._lookup(ref)
+
+        if entry is None:
+            try:
+                attrs = self._client.api.inspect_container(ref)
+            except Exception:
+                return None
+            self._refresh_many([attrs.get("Id") or ref])
+            with self._lock:
+                entry = self._entries.get(attrs.get("Id") or "")
+            if entry is None:
+                return None
+
+        if entry.started_at is None:
+            # StartedAt нет в сводке /containers/json — дочитываем один раз
+            try:
+                attrs = self._client.api.inspect_container(entry.summary.id)
+                entry.started_at = (attrs.get("State") or {}).get("StartedAt") or ""
+            except Exception:
+                pass
+        return entry
+
+    def lookup(self, ref: str) -> InventoryEntry | None:
+        """
+        То же, что get, но только из памяти — без обращений к демону.
+        """
+        with self._lock:
+            return self._lookup(ref)
+
+    def _lookup(self, ref: str) -> InventoryEntry | None:
+        entry = self._entries.get(ref)
+        if entry is not None:
+            return entry
+
+        cid = self._by_name.get(ref.lstrip("/"))
+        if cid is not None:
+            return self._entries.get(cid)
+
+        matches = [cid for cid in self._entries if cid.startswith(ref)]
+        if len(matches) == 1:
+            return self._entries[matches[0]]
+        return None
+
+    # ===== обновление =====
+
+    def _resolve_image_name(self, image_id: str) -> None:
+        """
+        Образ, которого не было при последней сверке (например, только что скачан).
+        """
+        if not image_id or image_id in self._image_names:
+            return
+
+        try:
+            attrs = self._client.api.inspect_image(image_id)
+            tags = [t for t in (attrs.get("RepoTags") or []) if t != "<none>:<none>"]
+        except Exception:
+            tags = []
+        self._image_names[image_id] = tags[0] if tags else image_short_id(image_id)
+
+    def _apply_summary(self, summary: dict) -> bool:
+        """
+        Кладёт контейнер из сводки /containers/json. Вызывается под локом.
+        Возвращает True, если что-то поменялось.
+        """
+        entry = inventory_entry(summary, self._image_names)
+        old = self._entries.get(entry.summary.id)
+        if old is not None and old.summary == entry.summary:
+            return False
+
+        if old is not None and old.summary.state == entry.summary.state:
+            entry.started_at = old.started_at
+
+        self._put(entry)
+        return True
+
+    def _put(self, entry: InventoryEntry) -> None:
+        cid = entry.summary.id
+        old = self._entries.get(cid)
+        if old is not None and old.summary.name != entry.summary.name:
+            self._by_name.pop(old.summary.name, None)
+        self._entries[cid] = entry
+        self._by_name[entry.summary.name] = cid
+
+    def _remove(self, cid: str) -> bool:
+        old = self._entries.pop(cid, None)
+        if old is None:
+            return False
+        if self._by_name.get(old.summary.name) == cid:
+            del self._by_name[old.summary.name]
+        return True
+
+    def reconcile(self) -> None:
+        """
+        Сверка с демоном: /containers/json и /images/json — два вызова
+        на весь инвентарь, без inspect каждого контейнера.
+        """
+        summaries = self._client.api.containers(all=True)
+        image_names = image_names_index(self._client.api.images())
+
+        with self._lock:
+            self._image_names = image_names
+            changed = False
+            seen: set[str] = set()
+            for s in summaries:
+                seen.add(s.get("Id") or "")
+                changed |= self._apply_summary(s)
+
+            for cid in [cid for cid in self._entries if cid not in seen]:
+                changed |= self._remove(cid)
+            if changed:
+                self._changed()
+
+        self._synced_at = time.time()
+        self._ready = True
+
+    def _refresh_many(self, ids: list[str]) -> None:
+        """
+        Перечитать пачку контейнеров одним вызовом /containers/json?filters=id.
+        """
+        summaries = self._client.api.containers(all=True, filters={"id": ids})
+        found = {s.get("Id"): s for s in summaries}
+
+        for s in found.values():
+            self._resolve_image_name(s.get("ImageID") or "")
+
+        with self._lock:
+            changed = False
+            for cid in ids:
+                summary = found.get(cid)
+                if summary is None:
+                    changed |= self._remove(cid)
+                else:
+                    changed |= self._apply_summary(summary)
+            if changed:
+                self._changed()
+
+    def _changed(self) -> None:
+        # под self._lock
+        self._generation += 1
+        if self._versions is not None:
+            self._versions.bump("containers")
+
+    def _worker_loop(self) -> None:
+        next_reconcile = time.monotonic() + RECONCILE_INTERVAL
+        while not self._stop.is_set():
+            self._wake.wait(max(0.0, next_reconcile - time.monotonic()))
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+
+            with self._lock:
+                dirty = list(self._dirty)
+                self._dirty.clear()
+                images_dirty = self._images_dirty
+                self._images_dirty = False
+                reconcile = self._reconcile_requested
+                self._reconcile_requested = False
+
+            try:
+                if reconcile or time.monotonic() >= next_reconcile:
+                    next_reconcile = time.monotonic() + RECONCILE_INTERVAL
+                    self.reconcile()
+                    continue
+                if images_dirty:
+                    self._invalidate_image()
+                if dirty:
+                    self._refresh_many(dirty)
+            except Exception:
+                # не смогли применить события — догоним сверкой
+                self.request_reconcile()
+                self._stop.wait(1.0)
+
+    def _on_event(self, ev: dict) -> None:
+        """
+        Слушатель хаба событий: только помечаем, что перечитать.
+        """
+        self._last_event_at = time.time()
+        action = (ev.get("Action") or ev.get("status") or "").lower()
+        actor = ev.get("Actor") or {}
+        obj_id = actor.get("ID") or ev.get("id") or ""
+
+        if ev.get("Type") == "image":
+            if action in _IMAGE_ACTIONS:
+                self._images_dirty = True
+                self._wake.set()
+            return
+
+        if ev.get("Type") != "container" or not obj_id:
+            return
+
+        if action == "destroy":
+            with self._lock:
+                self._dirty.discard(obj_id)
+                if self._remove(obj_id):
+                    self._changed()
+        elif action in _REFRESH_ACTIONS:
+            with self._lock:
+                self._dirty.add(obj_id)
+                if action in _STARTED_ACTIONS:
+                    entry = self._entries.get(obj_id)
+                    if entry is not None:
+                        entry.started_at = None
+            self._wake.set()
+
+    def _invalidate_image(self) -> None:
+        """
+        У образа поменялись теги — пересчитываем имена образов у контейнеров
+        по свежему /images/json (один вызов).
+        """
+        image_names = image_names_index(self._client.api.images())
+
+        with self._lock:
+            self._image_names = image_names
+            changed = False
+            for e in self._entries.values():
+                name = image_names.get(e.image_id)
+                if name is not None and name != e.summary.image:
+                    e.summary = e.summary.model_copy(update={"image": name})
+                    changed = True
+            if changed:
+                self._changed()
+
+
+async def list_container_entries(
+    engine: DockerEngine,
+    all: bool = True,
+    filters: dict | None = None,
+    with_image: bool = True,
+    with_ports: bool = True,
+) -> list[InventoryEntry]:
+    """
+    Те же записи без инвентаря — прямо из демона: два обращения вместо 2N+1
+    (сводка контейнеров и /images/json для имён образов). with_image=False —
+    имена образов не нужны, /images/json не вызывается.
+    """
+    summaries = await engine.containers(all=all, filters=filters)
+    if not summaries:
+        return []
+
+    image_names = image_names_index(await engine.images()) if with_image else None
+    return [inventory_entry(s, image_names, with_ports) for s in summaries]
+
+
+@lru_cache
+def get_container_inventory() -> ContainerInventory | None:
+    """
+    Общий на процесс инвентарь. None, если он выключен через MIRA_INVENTORY=0.
+    """
+    if not INVENTORY_ENABLED:
+        return None
+    return ContainerInventory(get_docker_client(), get_events_hub(), get_resource_versions())
@@ -0,0 +1,177 @@
+"""
+Список контейнеров за один вызов /containers/json.
+
+docker-py в `containers.list()` делает inspect каждого контейнера, а `c.image`
+добавляет ещё inspect образа — 2N+1 обращений к демону. Здесь всё нужное
+берётся из краткой сводки, а теги образов — одним вызовом /images/json.
+"""
+
+from app.schemas import ContainerSummary, PortMapping
+from app.services.docker_engine import DockerEngine, EngineError
+
+
+def map_ports(port_data) -> list[PortMapping]:
+    """
+    NetworkSettings.Ports -> список PortMapping.
+    """
+    ports: list[PortMapping] = []
+    if not port_data:
+        return ports
+
+    for container_port, bindings in port_data.items():
+        try:
+            port_str, proto = container_port.split("/")
+            c_port = int(port_str)
+        except ValueError:
+            continue
+
+        if not bindings:
+            ports.append(
+                PortMapping(
+                    host_port=None,
+                    container_port=c_port,
+                    protocol=proto,
+                )
+            )
+        else:
+            for b in bindings:
+                host_port = int(b.get("HostPort", 0)) if b.get("HostPort") else None
+                ports.append(
+                    PortMapping(
+                        host_port=host_port,
+                        container_port=c_port,
+                        protocol=proto,
+                    )
+                )
+
+    return ports
+
+
+def summary_port_data(ports: list[dict] | None) -> dict:
+    """
+    Порты из сводки /containers/json (плоский список) приводим к виду
+    NetworkSettings.Ports, чтобы map_ports дал тот же результат, что и для inspect.
+    """
+    port_data: dict[str, list[dict] | None] = {}
+    for p in ports or []:
+        key = f"{p.get('PrivatePort')}/{p.get('Type') or 'tcp'}"
+        bindings = port_data.get(key)
+        if p.get("PublicPort"):
+            if bindings is None:
+                bindings = port_data[key] = []
+            bindings.append({"HostIp": p.get("IP") or "", "HostPort": str(p["PublicPort"])})
+        elif key not in port_data:
+            port_data[key] = None
+    return port_data
+
+
+def image_short_id(image_id: str) -> str:
+    """
+    То же, что Image.short_id в docker-py.
+    """
+    if image_id.startswith("sha256:"):
+        return image_id[:19]
+    return image_id[:12]
+
+
+def image_names_index(images: list[dict]) -> dict[str, str]:
+    """
+    id образа -> отображаемое имя (первый тег или короткий id),
+    по одному вызову /images/json на весь список.
+    """
+    names: dict[str, str] = {}
+    for img in images:
+        image_id = img.get("Id") or ""
+        tags = [t for t in (img.get("RepoTags") or []) if t != "<none>:<none>"]
+        names[image_id] = tags[0] if tags else image_short_id(image_id)
+    return names
+
+
+def container_name(summary: dict) -> str:
+    """
+    В Names попадают и алиасы legacy-линков ("/web/db") — берём собственное имя.
+    """
+    names = summary.get("Names") or []
+    for n in names:
+        if n.count("/") == 1:
+            return n.lstrip("/")
+    return names[0].lstrip("/") if names else ""
+
+
+def build_container_summary(
+    summary: dict,
+    image_names: dict[str, str] | None,
+    with_ports: bool = True,
+) -> ContainerSummary:
+    """
+    image_names=None / with_ports=False — поле не нужно в ответе (?fields=):
+    image остаётся пустым, ports — пустым списком.
+    """
+    status = summary.get("State") or "unknown"
+    image_id = summary.get("ImageID") or ""
+    image = ""
+    if image_names is not None:
+        image = image_names.get(image_id, image_short_id(image_id) if image_id else "")
+    return ContainerSummary(
+        id=summary.get("Id") or "",
+        name=container_name(summary),
+        image=image,
+        status=status,
+        state=status,
+        ports=map_ports(summary_port_data(summary.get("Ports"))) if with_ports else [],
+    )
+
+
+async def list_container_refs(
+    engine: DockerEngine,
+    all: bool = True,
+    filters: dict | None = None,
+) -> list[dict]:
+    """
+    Короткие ссылки на контейнеры (id, имя, состояние) — без тегов образов,
+    одним вызовом /containers/json.
+    """
+    result = []
+    for s in await engine.containers(all=all, filters=filters):
+        state = s.get("State") or "unknown"
+        result.append(
+            {
+                "id": s.get("Id") or "",
+                "name": container_name(s),
+                "state": state,
+                "status": state,
+            }
+        )
+    return result
+
+
+async def image_display_name(engine: DockerEngine, image_id: str) -> str:
+    """
+    Отображаемое имя одного образа (первый тег или короткий id) — для деталки,
+    где тянуть весь /images/json незачем.
+    """
+    if not image_id:
+        return ""
+    try:
+        attrs = await engine.inspect_image(image_id)
+    except EngineError:
+        return image_short_id(image_id)
+    tags = [t for t in (attrs.get("RepoTags") or []) if t != "<none>:<none>"]
+    return tags[0] if tags else image_short_id(image_id)
+
+
+def summary_from_inspect(attrs: dict, image_name: str) -> ContainerSummary:
+    """
+    ContainerSummary из полного inspect контейнера.
+    """
+    state = attrs.get("State", {}) or {}
+    status = state.get("Status") or "unknown"
+    net = attrs.get("NetworkSettings", {}) or {}
+    return ContainerSummary(
+        id=attrs["Id"],
+        name=(attrs.get("Name") or "").lstrip("/"),
+        image=image_name,
+        status=status,
+        state=status,
+        ports=map_ports(net.get("Ports") or {}),
+    )
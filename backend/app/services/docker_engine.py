@@ -0,0 +1,798 @@
+"""
+Асинхронный доступ к Docker Engine API для роутеров.
+
+Синхронные роутеры поверх docker-py занимали по потоку из пула Starlette
+(~40 штук) на каждый запрос: несколько `stop` по 10 секунд — и списки
+ждут в очереди за ними. Здесь Engine API вызывается напрямую через
+httpx с пулом соединений к unix-сокету, без потоков. Методы возвращают
+сырые словари API — те же, что отдаёт docker-py `client.api`.
+
+MIRA_DOCKER_CLIENT=sync включает прежний путь для сравнения: те же
+методы поверх сессии docker-py, каждый вызов — в пуле потоков.
+
+Пул и лимиты настраиваются через MIRA_DOCKER_* (см. константы ниже),
+счётчики — EngineMetrics, отдаются в GET /api/v1/system/docker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import socket
+import ssl
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import AsyncIterator, Callable
+from urllib.parse import quote
+
+import httpx
+from docker.client import DockerClient
+import anyio
+from starlette.concurrency import run_in_threadpool
+
+DOCKER_TIMEOUT = float(os.getenv("MIRA_DOCKER_TIMEOUT", "60"))
+DOCKER_CONNECT_TIMEOUT = float(os.getenv("MIRA_DOCKER_CONNECT_TIMEOUT", "5"))
+# сколько ждать свободного слота/соединения, прежде чем ответить 503
+DOCKER_POOL_TIMEOUT = float(os.getenv("MIRA_DOCKER_POOL_TIMEOUT", "10"))
+DOCKER_POOL_SIZE = int(os.getenv("MIRA_DOCKER_POOL_SIZE", "32"))
+DOCKER_KEEPALIVE = int(os.getenv("MIRA_DOCKER_KEEPALIVE", str(DOCKER_POOL_SIZE)))
+DOCKER_KEEPALIVE_EXPIRY = float(os.getenv("MIRA_DOCKER_KEEPALIVE_EXPIRY", "30"))
+# одновременных обычных вызовов; стримы (логи, события, pull) не считаются
+DOCKER_CONCURRENCY = int(os.getenv("MIRA_DOCKER_CONCURRENCY", str(DOCKER_POOL_SIZE)))
+DOCKER_API_VERSION = os.getenv("MIRA_DOCKER_API_VERSION", "")
+
+LATENCY_SAMPLES = 256
+# границы гистограммы задержек вызовов (секунды) — для /metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_DEFAULT_SOCKET = "/var/run/docker.sock"
+
+
+class EngineError(Exception):
+    """
+    Ответ демона с кодом >= 400. message — текст из тела ответа.
+    """
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class EngineNotFound(EngineError):
+    pass
+
+
+def _error(status_code: int, body: bytes) -> EngineError:
+    try:
+        message = json.loads(body).get("message") or ""
+    except Exception:
+        message = body.decode("utf-8", errors="replace").strip()
+    cls = EngineNotFound if status_code == 404 else EngineError
+    return cls(status_code, message or f"Docker API error {status_code}")
+
+
+def _encode_filters(filters: dict) -> str:
+    """
+    {"status": "running", "label": ["a", "b=c"]} -> JSON вида map[string][]string.
+    """
+    out: dict[str, list[str]] = {}
+    for key, value in filters.items():
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        if not isinstance(value, (list, tuple, set)):
+            value = [value]
+        out[key] = [str(v) for v in value]
+    return json.dumps(out)
+
+
+def _encode_params(params: dict | None) -> dict:
+    """
+    Параметры запроса в формате Engine API: bool -> 1/0, фильтры -> JSON.
+    """
+    out: dict = {}
+    for key, value in (params or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "1" if value else "0"
+        elif isinstance(value, dict):
+            value = _encode_filters(value)
+        out[key] = value
+    return out
+
+
+def _q(value: str) -> str:
+    return quote(value, safe="/:")
+
+
+_RESOURCE_RE = re.compile(r"^/(containers|networks|volumes|exec)/(?!json$|create$|prune$)[^/]+")
+_IMAGE_RE = re.compile(
+    r"^/images/(?!json$|create$|load$|search$|prune$|get$)(.+?)(/json|/history|/push|/tag|/get)?$"
+)
+
+
+def endpoint_label(method: str, path: str) -> str:
+    """
+    "GET /containers/3f2a.../json" -> "GET /containers/{id}/json":
+    id и имена образов в метки не попадают, число меток ограничено.
+    """
+    path = _RESOURCE_RE.sub(r"/\1/{id}", path)
+    path = _IMAGE_RE.sub(r"/images/{name}\2", path)
+    return f"{method} {path}"
+
+
+class _EndpointStats:
+    __slots__ = ("count", "errors", "total", "max", "recent", "buckets", "statuses")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        # последние замеры — для перцентилей
+        self.recent: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        # замеры по корзинам LATENCY_BUCKETS, последняя — больше всех границ
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        # HTTP-статус ответа демона ("error" — ответа не было) -> число вызовов
+        self.statuses: dict[str, int] = {}
+
+    def snapshot(self) -> dict:
+        recent = sorted(self.recent)
+
+        def pct(q: float) -> float | None:
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(q * len(recent)))] * 1000, 2)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else None,
+            "max_ms": round(self.max * 1000, 2),
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+        }
+
+
+class EngineMetrics:
+    """
+    Счётчики клиента. Меняются только из event loop — без блокировок.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.waiting = 0
+        self.streams = 0
+        self.acquired = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_timeouts = 0
+        self._endpoints: dict[str, _EndpointStats] = {}
+
+    def record_wait(self, seconds: float) -> None:
+        self.acquired += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+    def record_call(self, endpoint: str, seconds: float, status: int | None) -> None:
+        """
+        status — HTTP-статус ответа демона, None — ответа не было
+        (таймаут слота, ошибка транспорта). Ошибка — None и 5xx.
+        """
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = _EndpointStats()
+        stats.count += 1
+        stats.total += seconds
+        if seconds > stats.max:
+            stats.max = seconds
+        stats.recent.append(seconds)
+        stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        label = "error" if status is None else str(status)
+        stats.statuses[label] = stats.statuses.get(label, 0) + 1
+        if status is None or status >= 500:
+            stats.errors += 1
+
+    def endpoints(self) -> dict[str, _EndpointStats]:
+        return self._endpoints
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "streams": self.streams,
+            "wait": {
+                "acquired": self.acquired,
+                "avg_ms": round(self.wait_total / self.acquired * 1000, 3) if self.acquired else None,
+                "max_ms": round(self.wait_max * 1000, 3),
+                "timeouts": self.wait_timeouts,
+            },
+            "endpoints": {
+                name: stats.snapshot() for name, stats in sorted(self._endpoints.items())
+            },
+        }
+
+
+class DockerEngine:
+    """
+    Эндпоинты Engine API. Транспорт — _request / _stream в наследниках;
+    лимит одновременных вызовов и замеры — здесь, общие для обоих.
+    """
+
+    mode = ""
+
+    def __init__(
+        self,
+        concurrency: int = DOCKER_CONCURRENCY,
+        pool_timeout: float = DOCKER_POOL_TIMEOUT,
+    ):
+        self._concurrency = concurrency
+        self._pool_timeout = pool_timeout
+        self._slots = asyncio.Semaphore(concurrency)
+        self.metrics = EngineMetrics()
+        self._change_listeners: list[Callable[[str, str], None]] = []
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: dict,
+        body: dict | None,
+        timeout: float,
+    ) -> tuple[int, bytes]:
+        raise NotImplementedError
+
+    def _stream(
+        self,
+        method: str,
+        path: str,
+        params: dict,
+        body: dict | None,
+    ) -> AsyncIterator[bytes]:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+    def pool_status(self) -> dict:
+        return {}
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "concurrency": self._concurrency,
+            "pool_timeout": self._pool_timeout,
+            "pool": self.pool_status(),
+            **self.metrics.snapshot(),
+        }
+
+    def add_change_listener(self, callback: Callable[[str, str], None]) -> None:
+        """
+        callback(method, path) после каждого успешного изменяющего вызова
+        (_call не с GET) — например, чтобы сбросить кэши списков.
+        """
+        self._change_listeners.append(callback)
+
+    def remove_change_listener(self, callback: Callable[[str, str], None]) -> None:
+        self._change_listeners = [c for c in self._change_listeners if c != callback]
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: dict,
+        body: dict | None,
+        timeout: float,
+    ) -> tuple[int, bytes]:
+        """
+        _request под лимитом одновременных вызовов, с замером ожидания
+        слота и времени вызова. Ошибки транспорта -> EngineError(503).
+        """
+        metrics = self.metrics
+        endpoint = endpoint_label(method, path)
+
+        started = time.perf_counter()
+        metrics.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._pool_timeout)
+        except asyncio.TimeoutError:
+            metrics.wait_timeouts += 1
+            metrics.record_call(endpoint, time.perf_counter() - started, None)
+            raise EngineError(503, "Docker API concurrency limit reached") from None
+        finally:
+            metrics.waiting -= 1
+
+        acquired = time.perf_counter()
+        metrics.record_wait(acquired - started)
+        metrics.in_flight += 1
+        status = None
+        try:
+            status, data = await self._request(method, path, params, body, timeout)
+            return status, data
+        except EngineError:
+            raise
+        except Exception as e:
+            raise EngineError(503, f"Docker API unavailable: {e}")
+        finally:
+            metrics.in_flight -= 1
+            self._slots.release()
+            metrics.record_call(endpoint, time.perf_counter() - acquired, status)
+
+    async def _open_stream(
+        self,
+        method: str,
+        path: str,
+        params: dict,
+        body: dict | None,
+    ) -> AsyncIterator[bytes]:
+        """
+        _stream со счётчиком открытых стримов. Под лимит не попадает:
+        follow-логи и события живут долго и заняли бы все слоты.
+        """
+        metrics = self.metrics
+        endpoint = endpoint_label(method, path)
+        started = time.perf_counter()
+        metrics.streams += 1
+        status = 200
+        try:
+            async for chunk in self._stream(method, path, params, body):
+                yield chunk
+        except EngineError as e:
+            status = e.status_code
+            raise
+        except Exception as e:
+            status = None
+            raise EngineError(503, f"Docker API unavailable: {e}")
+        finally:
+            metrics.streams -= 1
+            metrics.record_call(endpoint, time.perf_counter() - started, status)
+
+    async def _call(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict | None = None,
+        body: dict | None = None,
+        timeout: float | None = None,
+    ):
+        status, data = await self._send(
+            method,
+            path,
+            _encode_params(params),
+            body,
+            timeout or DOCKER_TIMEOUT,
+        )
+        if status >= 400:
+            raise _error(status, data)
+        if method != "GET":
+            for callback in self._change_listeners:
+                callback(method, path)
+        if not data:
+            return None
+        return json.loads(data)
+
+    async def _json_stream(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict | None = None,
+        body: dict | None = None,
+    ) -> AsyncIterator[dict]:
+        buf = b""
+        async for chunk in self._open_stream(method, path, _encode_params(params), body):
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+        if buf.strip():
+            yield json.loads(buf)
+
+    # ===== система =====
+
+    async def version(self) -> dict:
+        return await self._call("GET", "/version")
+
+    # ===== контейнеры =====
+
+    async def containers(self, all: bool = False, filters: dict | None = None) -> list[dict]:
+        return await self._call(
+            "GET", "/containers/json", params={"all": all, "filters": filters}
+        ) or []
+
+    async def inspect_container(self, container_id: str) -> dict:
+        return await self._call("GET", f"/containers/{_q(container_id)}/json")
+
+    async def create_container(self, config: dict, name: str | None = None) -> dict:
+        return await self._call(
+            "POST", "/containers/create", params={"name": name}, body=config
+        )
+
+    async def start_container(self, container_id: str) -> None:
+        await self._call("POST", f"/containers/{_q(container_id)}/start")
+
+    async def stop_container(self, container_id: str, timeout: int | None = None) -> None:
+        # демон ждёт t секунд до SIGKILL — HTTP-таймаут должен быть больше
+        await self._call(
+            "POST",
+            f"/containers/{_q(container_id)}/stop",
+            params={"t": timeout},
+            timeout=(timeout if timeout is not None else 10) + DOCKER_TIMEOUT,
+        )
+
+    async def restart_container(self, container_id: str, timeout: int | None = None) -> None:
+        await self._call(
+            "POST",
+            f"/containers/{_q(container_id)}/restart",
+            params={"t": timeout},
+            timeout=(timeout if timeout is not None else 10) + DOCKER_TIMEOUT,
+        )
+
+    async def kill_container(self, container_id: str, signal: str | None = None) -> None:
+        await self._call(
+            "POST", f"/containers/{_q(container_id)}/kill", params={"signal": signal}
+        )
+
+    async def remove_container(
+        self,
+        container_id: str,
+        force: bool = False,
+        volumes: bool = False,
+    ) -> None:
+        await self._call(
+            "DELETE",
+            f"/containers/{_q(container_id)}",
+            params={"force": force, "v": volumes},
+        )
+
+    async def container_logs(
+        self,
+        container_id: str,
+        *,
+        tail: int | str = "all",
+        since: str | None = None,
+        until: str | None = None,
+        timestamps: bool = False,
+    ) -> bytes:
+        """
+        Логи без follow одним куском — сырое тело ответа
+        (мультиплексированный поток, разбирается LogDemuxer).
+        """
+        status, data = await self._send(
+            "GET",
+            f"/containers/{_q(container_id)}/logs",
+            _encode_params(
+                {
+                    "stdout": True,
+                    "stderr": True,
+                    "tail": tail,
+                    "since": since,
+                    "until": until,
+                    "timestamps": timestamps,
+                }
+            ),
+            None,
+            DOCKER_TIMEOUT,
+        )
+        if status >= 400:
+            raise _error(status, data)
+        return data
+
+    def container_logs_stream(
+        self,
+        container_id: str,
+        *,
+        follow: bool = True,
+        tail: int | str = "all",
+        since: int | str | None = None,
+        until: int | str | None = None,
+        timestamps: bool = False,
+    ) -> AsyncIterator[bytes]:
+        """
+        Тело /logs кусками по мере поступления (разбор — LogDemuxer).
+        """
+        return self._open_stream(
+            "GET",
+            f"/containers/{_q(container_id)}/logs",
+            _encode_params(
+                {
+                    "stdout": True,
+                    "stderr": True,
+                    "follow": follow,
+                    "tail": tail,
+                    "since": since,
+                    "until": until,
+                    "timestamps": timestamps,
+                }
+            ),
+            None,
+        )
+
+    async def container_stats(self, container_id: str) -> dict:
+        """
+        Один замер /stats (stream=false — демон ждёт второй замер, ~1–2 с).
+        """
+        return await self._call(
+            "GET", f"/containers/{_q(container_id)}/stats", params={"stream": False}
+        )
+
+    # ===== образы =====
+
+    async def images(self, all: bool = False, filters: dict | None = None) -> list[dict]:
+        return await self._call(
+            "GET", "/images/json", params={"all": all, "filters": filters}
+        ) or []
+
+    async def inspect_image(self, image: str) -> dict:
+        return await self._call("GET", f"/images/{_q(image)}/json")
+
+    async def remove_image(self, image: str, force: bool = False) -> list[dict]:
+        return await self._call(
+            "DELETE", f"/images/{_q(image)}", params={"force": force}
+        ) or []
+
+    def pull_image(self, image: str, tag: str | None = None) -> AsyncIterator[dict]:
+        """
+        Поток прогресса /images/create. Ошибка скачивания приходит
+        в потоке как {"error": "..."}.
+        """
+        return self._json_stream(
+            "POST", "/images/create", params={"fromImage": image, "tag": tag}
+        )
+
+    # ===== сети =====
+
+    async def networks(self, filters: dict | None = None) -> list[dict]:
+        return await self._call("GET", "/networks", params={"filters": filters}) or []
+
+    async def inspect_network(self, network_id: str) -> dict:
+        return await self._call("GET", f"/networks/{_q(network_id)}")
+
+    async def create_network(self, config: dict) -> dict:
+        return await self._call("POST", "/networks/create", body=config)
+
+    async def remove_network(self, network_id: str) -> None:
+        await self._call("DELETE", f"/networks/{_q(network_id)}")
+
+    async def connect_network(
+        self,
+        network_id: str,
+        container_id: str,
+        aliases: list[str] | None = None,
+    ) -> None:
+        body: dict = {"Container": container_id}
+        if aliases:
+            body["EndpointConfig"] = {"Aliases": aliases}
+        await self._call("POST", f"/networks/{_q(network_id)}/connect", body=body)
+
+    # ===== тома =====
+
+    async def volumes(self, filters: dict | None = None) -> list[dict]:
+        data = await self._call("GET", "/volumes", params={"filters": filters}) or {}
+        return data.get("Volumes") or []
+
+    # ===== события =====
+
+    def events(
+        self,
+        filters: dict | None = None,
+        since: int | str | None = None,
+    ) -> AsyncIterator[dict]:
+        return self._json_stream(
+            "GET", "/events", params={"filters": filters, "since": since}
+        )
+
+
+def _parse_docker_host(value: str) -> tuple[str, str | None, ssl.SSLContext | bool]:
+    """
+    DOCKER_HOST -> (base_url, путь к unix-сокету, verify) для httpx.
+    """
+    value = value or f"unix://{_DEFAULT_SOCKET}"
+    if value.startswith("unix://"):
+        return "http://docker", value[len("unix://"):] or _DEFAULT_SOCKET, True
+
+    if value.startswith("tcp://"):
+        address = value[len("tcp://"):]
+        if os.getenv("DOCKER_TLS_VERIFY"):
+            cert_path = os.getenv("DOCKER_CERT_PATH") or os.path.expanduser("~/.docker")
+            ctx = ssl.create_default_context(cafile=os.path.join(cert_path, "ca.pem"))
+            ctx.load_cert_chain(
+                os.path.join(cert_path, "cert.pem"),
+                os.path.join(cert_path, "key.pem"),
+            )
+            return f"https://{address}", None, ctx
+        return f"http://{address}", None, True
+
+    raise ValueError(f"Unsupported DOCKER_HOST: {value}")
+
+
+class AsyncDockerEngine(DockerEngine):
+    """
+    Engine API через httpx.AsyncClient: соединения к сокету переиспользуются,
+    ожидание ответа не держит потоков.
+    """
+
+    mode = "async"
+
+    def __init__(
+        self,
+        docker_host: str | None = None,
+        *,
+        pool_size: int = DOCKER_POOL_SIZE,
+        keepalive: int = DOCKER_KEEPALIVE,
+        keepalive_expiry: float = DOCKER_KEEPALIVE_EXPIRY,
+        concurrency: int = DOCKER_CONCURRENCY,
+        pool_timeout: float = DOCKER_POOL_TIMEOUT,
+    ):
+        super().__init__(concurrency=concurrency, pool_timeout=pool_timeout)
+        base_url, uds, verify = _parse_docker_host(
+            docker_host if docker_host is not None else os.getenv("DOCKER_HOST", "")
+        )
+        self._limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=min(keepalive, pool_size),
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._transport = httpx.AsyncHTTPTransport(
+            uds=uds,
+            verify=verify,
+            limits=self._limits,
+        )
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            transport=self._transport,
+            timeout=httpx.Timeout(
+                DOCKER_TIMEOUT,
+                connect=DOCKER_CONNECT_TIMEOUT,
+                pool=pool_timeout,
+            ),
+        )
+        self._prefix: str | None = None
+        self._prefix_lock = asyncio.Lock()
+
+    async def _api_prefix(self) -> str:
+        """
+        Версия API: из MIRA_DOCKER_API_VERSION или та, что сообщит демон.
+        """
+        if self._prefix is None:
+            async with self._prefix_lock:
+                if self._prefix is None:
+                    version = DOCKER_API_VERSION
+                    if not version:
+                        resp = await self._client.get("/version")
+                        version = resp.json().get("ApiVersion") or ""
+                    self._prefix = f"/v{version}" if version else ""
+        return self._prefix
+
+    async def _request(self, method, path, params, body, timeout):
+        prefix = await self._api_prefix()
+        resp = await self._client.request(
+            method,
+            prefix + path,
+            params=params,
+            json=body,
+            timeout=httpx.Timeout(
+                timeout,
+                connect=DOCKER_CONNECT_TIMEOUT,
+                pool=self._pool_timeout,
+            ),
+        )
+        return resp.status_code, resp.content
+
+    async def _stream(self, method, path, params, body):
+        prefix = await self._api_prefix()
+        # стримы (события, pull) могут молчать сколько угодно
+        timeout = httpx.Timeout(
+            DOCKER_TIMEOUT,
+            connect=DOCKER_CONNECT_TIMEOUT,
+            read=None,
+            pool=self._pool_timeout,
+        )
+        async with self._client.stream(
+            method,
+            prefix + path,
+            params=params,
+            json=body,
+            timeout=timeout,
+        ) as resp:
+            if resp.status_code >= 400:
+                raise _error(resp.status_code, await resp.aread())
+            async for chunk in resp.aiter_raw():
+                yield chunk
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def pool_status(self) -> dict:
+        status = {
+            "max_connections": self._limits.max_connections,
+            "max_keepalive": self._limits.max_keepalive_connections,
+            "keepalive_expiry": self._limits.keepalive_expiry,
+        }
+        try:
+            # у httpx нет публичного API для состояния пула — смотрим в httpcore
+            connections = self._transport._pool.connections
+        except AttributeError:
+            return status
+        active = idle = 0
+        for conn in connections:
+            if conn.is_closed():
+                continue
+            if conn.is_idle():
+                idle += 1
+            else:
+                active += 1
+        status.update(active=active, idle=idle)
+        return status
+
+
+class ThreadedDockerEngine(DockerEngine):
+    """
+    Прежний путь: запросы через сессию docker-py, каждый — в пуле потоков.
+    """
+
+    mode = "sync"
+
+    def __init__(
+        self,
+        client: DockerClient,
+        *,
+        concurrency: int = DOCKER_CONCURRENCY,
+        pool_timeout: float = DOCKER_POOL_TIMEOUT,
+    ):
+        super().__init__(concurrency=concurrency, pool_timeout=pool_timeout)
+        self._api = client.api
+
+    def _url(self, path: str) -> str:
+        return f"{self._api.base_url}/v{self._api.api_version}{path}"
+
+    async def _request(self, method, path, params, body, timeout):
+        def call() -> tuple[int, bytes]:
+            resp = self._api.request(
+                method,
+                self._url(path),
+                params=params,
+                json=body,
+                timeout=timeout,
+            )
+            return resp.status_code, resp.content
+
+        return await run_in_threadpool(call)
+
+    async def _stream(self, method, path, params, body):
+        resp = await run_in_threadpool(
+            lambda: self._api.request(
+                method,
+                self._url(path),
+                params=params,
+                json=body,
+                stream=True,
+                timeout=None,
+            )
+        )
+        try:
+            if resp.status_code >= 400:
+                raise _error(resp.status_code, await run_in_threadpool(lambda: resp.content))
+            chunks = resp.iter_content(chunk_size=None)
+            while True:
+                # follow-стрим может молчать долго: при отмене не ждём поток
+                chunk = await anyio.to_thread.run_sync(
+                    next, chunks, None, abandon_on_cancel=True
+                )
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            try:
+                # shutdown будит поток, висящий в recv
+                self._api._get_raw_response_socket(resp).shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+            resp.close()
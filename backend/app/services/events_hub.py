@@ -0,0 +1,808 @@
+"""
+Общий на процесс хаб событий Docker.
+
+Один стрим client.events() и один поток на процесс вместо стрима и потока
+на каждый WebSocket. События раздаются подписчикам через ограниченные
+очереди; upstream-подписка закрывается, когда уходит последний подписчик.
+
+Каждое событие получает монотонный номер (seq) и попадает в кольцевой
+буфер — переподключившийся клиент догоняет пропущенное по ?since=<seq>.
+
+Фильтры подписчиков: то, что демон умеет сам, уходит в client.events(filters=...)
+(если это сужение подходит всем подписчикам сразу), остальное проверяется
+в хабе через индекс — подписчик, которому событие заведомо не подходит,
+ничего не стоит.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable
+
+from docker.client import DockerClient
+
+from app.deps import get_docker_client
+
+EVENTS_QUEUE_SIZE = int(os.getenv("MIRA_EVENTS_QUEUE_SIZE", "256"))
+# drop_oldest — выкидывать самые старые события, disconnect — отключать медленного клиента
+EVENTS_OVERFLOW = os.getenv("MIRA_EVENTS_OVERFLOW", "drop_oldest")
+
+EVENTS_REPLAY_SIZE = int(os.getenv("MIRA_EVENTS_REPLAY_SIZE", "1000"))
+
+OVERFLOW_POLICIES = ("drop_oldest", "disconnect")
+
+
+# тип события для фронта -> действия Docker, которые в него маппятся
+MAPPED_TYPE_ACTIONS = {
+    "created": ("create",),
+    "removed": ("destroy",),
+    "status_change": ("start", "restart", "unpause", "stop", "kill", "die", "pause"),
+}
+
+
+def map_container_event(ev: dict) -> dict | None:
+    """
+    Событие Docker -> событие для фронта.
+
+    Маппинг:
+      create  -> type: "created"
+      destroy -> type: "removed"
+      start/restart/unpause -> type: "status_change", status: "running"
+      stop/kill/die         -> type: "status_change", status: "exited"
+      pause                  -> type: "status_change", status: "paused"
+    """
+    if ev.get("Type") != "container":
+        return None
+
+    raw_status = (ev.get("status") or ev.get("Action") or "").lower()
+    actor = ev.get("Actor") or {}
+    cid = ev.get("id") or actor.get("ID") or ""
+    attrs = actor.get("Attributes") or {}
+
+    name = attrs.get("name") or cid[:12]
+    image = attrs.get("image") or ""
+
+    if raw_status == "create":
+        mapped_type = "created"
+        out_status = "created"
+    elif raw_status in ("destroy",):
+        mapped_type = "removed"
+        out_status = "removed"
+    elif raw_status in ("start", "restart", "unpause"):
+        mapped_type = "status_change"
+        out_status = "running"
+    elif raw_status in ("stop", "kill", "die"):
+        mapped_type = "status_change"
+        out_status = "exited"
+    elif raw_status in ("pause",):
+        mapped_type = "status_change"
+        out_status = "paused"
+    else:
+        # остальные события нам пока не нужны
+        return None
+
+    return {
+        "type": mapped_type,
+        "id": cid,
+        "name": name,
+        "image": image,
+        "status": out_status,
+        "raw_status": raw_status,
+        "time": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def coalesce_events(events: list[dict]) -> list[dict]:
+    """
+    Схлопывает подряд идущие смены статуса одного контейнера в пачке:
+    от каждой серии status_change остаётся последнее состояние.
+    created/removed не трогаем — они разделяют серии.
+    """
+    result: list[dict | None] = []
+    # id контейнера -> индекс его последнего status_change в result
+    last_status: dict[str, int] = {}
+
+    for ev in events:
+        cid = ev.get("id") or ""
+        if ev.get("type") == "status_change":
+            idx = last_status.get(cid)
+            if idx is not None:
+                result[idx] = None
+            last_status[cid] = len(result)
+        else:
+            last_status.pop(cid, None)
+        result.append(ev)
+
+    return [ev for ev in result if ev is not None]
+
+
+class EventFilter:
+    """
+    Фильтр подписчика. Внутри одного ключа — ИЛИ, между ключами — И;
+    метки (label) как у Docker — должны совпасть все.
+
+      containers — полный id, короткий (12 символов) id или имя
+      images     — образ, как он указан у контейнера (Actor.Attributes.image)
+      labels     — "key" или "key=value"
+      actions    — действия Docker (start, die, ...)
+    """
+
+    def __init__(
+        self,
+        containers: list[str] | None = None,
+        images: list[str] | None = None,
+        labels: list[str] | None = None,
+        actions: list[str] | None = None,
+    ):
+        self.containers = frozenset(c.lstrip("/") for c in containers or [])
+        self.images = frozenset(images or [])
+        self.labels = frozenset(labels or [])
+        self.actions = frozenset(a.lower() for a in actions or [])
+
+    @classmethod
+    def from_query(
+        cls,
+        container: list[str] | None = None,
+        image: list[str] | None = None,
+        label: list[str] | None = None,
+        event: list[str] | None = None,
+        type: list[str] | None = None,
+    ) -> "EventFilter":
+        """
+        type — типы событий фронта (created/status_change/removed),
+        переводятся в действия Docker. Неизвестный тип — ValueError.
+        """
+        actions = {a.lower() for a in event or []}
+        if type:
+            allowed: set[str] = set()
+            for t in type:
+                if t not in MAPPED_TYPE_ACTIONS:
+                    raise ValueError(f"Unknown event type: {t}")
+                allowed.update(MAPPED_TYPE_ACTIONS[t])
+            # заданы оба — нужны действия, подходящие под оба условия
+            actions = actions & allowed if actions else allowed
+            if not actions:
+                raise ValueError("event and type filters do not intersect")
+        return cls(container, image, label, sorted(actions))
+
+    @property
+    def empty(self) -> bool:
+        return not (self.containers or self.images or self.labels or self.actions)
+
+    def matches(self, ev: dict) -> bool:
+        actor = ev.get("Actor") or {}
+        attrs = actor.get("Attributes") or {}
+
+        if self.actions:
+            action = (ev.get("Action") or ev.get("status") or "").lower()
+            if action not in self.actions:
+                return False
+
+        if self.containers:
+            cid = actor.get("ID") or ev.get("id") or ""
+            if not (
+                cid in self.containers
+                or cid[:12] in self.containers
+                or attrs.get("name") in self.containers
+            ):
+                return False
+
+        if self.images and attrs.get("image") not in self.images:
+            return False
+
+        for label in self.labels:
+            key, sep, value = label.partition("=")
+            if key not in attrs or (sep and attrs[key] != value):
+                return False
+
+        return True
+
+    def index_keys(self) -> tuple[str, frozenset[str]] | None:
+        """
+        По какому измерению класть подписчика в индекс — самое узкое.
+        None — фильтра нет, подписчик получает всё.
+        """
+        if self.containers:
+            return "container", self.containers
+        if self.images:
+            return "image", self.images
+        if self.labels:
+            return "label", self.labels
+        if self.actions:
+            return "action", self.actions
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "container": sorted(self.containers),
+            "image": sorted(self.images),
+            "label": sorted(self.labels),
+            "event": sorted(self.actions),
+        }
+
+
+def _event_index_keys(ev: dict) -> dict[str, list[str]]:
+    """
+    Ключи события для поиска по индексу подписчиков.
+    """
+    actor = ev.get("Actor") or {}
+    attrs = actor.get("Attributes") or {}
+    cid = actor.get("ID") or ev.get("id") or ""
+
+    containers = [cid, cid[:12]]
+    if attrs.get("name"):
+        containers.append(attrs["name"])
+
+    labels: list[str] = []
+    for k, v in attrs.items():
+        labels.append(k)
+        labels.append(f"{k}={v}")
+
+    return {
+        "container": containers,
+        "image": [attrs["image"]] if attrs.get("image") else [],
+        "label": labels,
+        "action": [(ev.get("Action") or ev.get("status") or "").lower()],
+    }
+
+
+class SubscriptionClosed(Exception):
+    """
+    Подписка закрыта: клиент ушёл или был отключён как медленный.
+    """
+
+
+class Subscription:
+    """
+    Подписчик хаба. Очередь живёт в event loop подписчика,
+    хаб кладёт в неё события через call_soon_threadsafe.
+    """
+
+    def __init__(
+        self,
+        hub: "EventsHub",
+        loop: asyncio.AbstractEventLoop,
+        maxsize: int,
+        overflow: str,
+        event_filter: EventFilter,
+    ):
+        self.id = id(self)
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.filter = event_filter
+        self.dropped = 0
+        self.delivered = 0
+        self.slow = False
+
+        self._hub = hub
+        self._loop = loop
+        self._queue: deque[dict] = deque()
+        # события из буфера повтора — отдаются первыми и не вытесняются живыми
+        self._backlog: deque[dict] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+        # True — курсор клиента уже вытеснен из буфера, нужен полный ресинк
+        self.resync_required = False
+        # seq на момент подписки — с него клиент продолжает отсчёт
+        self.start_seq = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue) + len(self._backlog)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _push(self, item: dict) -> None:
+        # вызывается только в loop подписчика
+        if self._closed:
+            return
+
+        if len(self._queue) >= self.maxsize:
+            if self.overflow == "disconnect":
+                self.slow = True
+                self.dropped += 1
+                self._close()
+                return
+            self._queue.popleft()
+            self.dropped += 1
+
+        self._queue.append(item)
+        self._ready.set()
+
+    def _take(self) -> dict:
+        self.delivered += 1
+        if self._backlog:
+            return self._backlog.popleft()
+        return self._queue.popleft()
+
+    async def get(self) -> dict:
+        while not self._backlog and not self._queue:
+            if self._closed:
+                raise SubscriptionClosed()
+            self._ready.clear()
+            await self._ready.wait()
+
+        if self.slow:
+            raise SubscriptionClosed()
+        return self._take()
+
+    async def get_batch(self, max_items: int, window: float) -> list[dict]:
+        """
+        Пачка событий: ждём первое, затем добираем в течение window секунд
+        или пока не наберётся max_items.
+        """
+        batch = [await self.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + window
+
+        while len(batch) < max_items:
+            while len(batch) < max_items and (self._backlog or self._queue):
+                batch.append(self._take())
+            if len(batch) >= max_items or self._closed:
+                break
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                break
+
+        if self.slow:
+            raise SubscriptionClosed()
+        return batch
+
+    def _close(self) -> None:
+        self._closed = True
+        if self.slow:
+            self._queue.clear()
+        self._ready.set()
+
+    def close(self) -> None:
+        """
+        Закрыть подписку и отписаться от хаба. Безопасно вызывать повторно.
+        """
+        if not self._closed:
+            self._close()
+        self._hub.unsubscribe(self)
+
+    def stats(self) -> dict:
+        return {
+            "id": self.id,
+            "queue_depth": self.depth,
+            "max_queue": self.maxsize,
+            "overflow": self.overflow,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "slow_disconnected": self.slow,
+            "filter": self.filter.to_dict(),
+        }
+
+
+class _Listener:
+    def __init__(self, callback: Callable[[dict], None], types: tuple[str, ...], on_reconnect: Callable[[], None] | None):
+        self.callback = callback
+        self.types = types
+        self.on_reconnect = on_reconnect
+
+
+class _Upstream:
+    """
+    Одна upstream-подписка на client.events(): поток + стрим.
+    """
+
+    def __init__(self, filters: dict, last_nano: int = 0):
+        self.filters = filters
+        # timeNano последнего опубликованного события — для since при переподключении
+        self.last_nano = last_nano
+        self.stop = threading.Event()
+        self.stream = None
+        self.connected = False
+        self.thread: threading.Thread | None = None
+
+    def close(self) -> None:
+        self.stop.set()
+        stream = self.stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+
+class EventsHub:
+    def __init__(self, client: DockerClient):
+        self._client = client
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+        # индекс подписчиков: измерение -> ключ -> подписчики; без фильтра — _wildcard
+        self._index: dict[str, dict[str, set[Subscription]]] = {
+            "container": {},
+            "image": {},
+            "label": {},
+            "action": {},
+        }
+        self._wildcard: set[Subscription] = set()
+        self._listeners: list[_Listener] = []
+        self._upstream: _Upstream | None = None
+
+        # seq стартует от текущего времени в мс: курсор от прошлого процесса
+        # гарантированно окажется до начала буфера и клиент получит resync
+        self._seq = int(time.time() * 1000)
+        # события с seq <= _gap_seq могли быть потеряны (upstream был выключен)
+        self._gap_seq = self._seq - 1
+        # (событие для фронта, сырое событие) — сырое нужно для фильтров при повторе
+        self._replay: deque[tuple[dict, dict]] = deque(maxlen=max(0, EVENTS_REPLAY_SIZE))
+
+        self.events_total = 0
+        self.dropped_closed = 0
+        self.upstream_starts = 0
+
+    # ===== подписчики (WebSocket) =====
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def subscribe(
+        self,
+        maxsize: int | None = None,
+        overflow: str | None = None,
+        since: int | None = None,
+        event_filter: EventFilter | None = None,
+    ) -> Subscription:
+        """
+        Вызывать из корутины — подписка привязывается к текущему event loop.
+
+        since — последний seq, который видел клиент. События после него
+        кладутся в подписку из буфера повтора; если часть уже вытеснена
+        или потеряна, у подписки выставляется resync_required.
+        """
+        overflow = overflow or EVENTS_OVERFLOW
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+
+        sub = Subscription(
+            self,
+            asyncio.get_running_loop(),
+            max(1, maxsize or EVENTS_QUEUE_SIZE),
+            overflow,
+            event_filter or EventFilter(),
+        )
+        with self._lock:
+            # снимок буфера и добавление подписчика под одним локом:
+            # ни одно событие не придёт дважды и не потеряется между ними
+            sub.start_seq = self._seq
+            if since is not None:
+                self._fill_backlog(sub, since)
+            self._subscribers.add(sub)
+            self._index_add(sub)
+            self._sync_upstream()
+        return sub
+
+    def _fill_backlog(self, sub: Subscription, since: int) -> None:
+        if since >= self._seq:
+            if since > self._seq:
+                # курсор из будущего — от другого процесса
+                sub.resync_required = True
+            return
+
+        oldest = self._replay[0][0]["seq"] if self._replay else self._seq + 1
+        if since <= self._gap_seq or since + 1 < oldest:
+            sub.resync_required = True
+            return
+
+        sub._backlog.extend(
+            mapped
+            for mapped, raw in self._replay
+            if mapped["seq"] > since and sub.filter.matches(raw)
+        )
+
+    def _index_add(self, sub: Subscription) -> None:
+        keys = sub.filter.index_keys()
+        if keys is None:
+            self._wildcard.add(sub)
+            return
+        dim, values = keys
+        for v in values:
+            self._index[dim].setdefault(v, set()).add(sub)
+
+    def _index_remove(self, sub: Subscription) -> None:
+        keys = sub.filter.index_keys()
+        if keys is None:
+            self._wildcard.discard(sub)
+            return
+        dim, values = keys
+        bucket = self._index[dim]
+        for v in values:
+            subs = bucket.get(v)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del bucket[v]
+
+    def _candidates(self, ev: dict) -> set[Subscription]:
+        """
+        Подписчики, которым событие может подойти. Вызывается под self._lock.
+        """
+        result = set(self._wildcard)
+        for dim, keys in _event_index_keys(ev).items():
+            bucket = self._index[dim]
+            if not bucket:
+                continue
+            for k in keys:
+                subs = bucket.get(k)
+                if subs:
+                    result |= subs
+        return result
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub not in self._subscribers:
+                return
+            self._subscribers.discard(sub)
+            self._index_remove(sub)
+            self.dropped_closed += sub.dropped
+            self._sync_upstream()
+
+    # ===== слушатели (внутренние сервисы) =====
+
+    def add_listener(
+        self,
+        callback: Callable[[dict], None],
+        types: tuple[str, ...] = ("container",),
+        on_reconnect: Callable[[], None] | None = None,
+    ) -> None:
+        """
+        Синхронный слушатель сырых событий Docker. Вызывается в потоке хаба,
+        поэтому должен быть быстрым (положить в свою очередь и выйти).
+        on_reconnect вызывается после переподключения к демону —
+        события за это время могли потеряться.
+        """
+        with self._lock:
+            self._listeners.append(_Listener(callback, types, on_reconnect))
+            self._sync_upstream()
+
+    def remove_listener(self, callback: Callable[[dict], None]) -> None:
+        with self._lock:
+            self._listeners = [l for l in self._listeners if l.callback != callback]
+            self._sync_upstream()
+
+    # ===== upstream =====
+
+    def _wanted_filters(self) -> dict | None:
+        """
+        Какие события нужны хабу сейчас. None — никому ничего не нужно.
+        """
+        if not self._subscribers and not self._listeners:
+            return None
+
+        types: set[str] = set()
+        if self._subscribers:
+            types.add("container")
+        for l in self._listeners:
+            types.update(l.types)
+        filters: dict = {"type": sorted(types)}
+
+        # сужать upstream можно, только если сужение подходит всем сразу:
+        # слушатели хотят всё, поэтому при них отдаём демону только type
+        if self._listeners or not self._subscribers:
+            return filters
+
+        subs = [s.filter for s in self._subscribers]
+        for key, attr in (("container", "containers"), ("image", "images"), ("event", "actions")):
+            if all(getattr(f, attr) for f in subs):
+                filters[key] = sorted(set().union(*(getattr(f, attr) for f in subs)))
+
+        # метки демон объединяет через И — объединить наборы разных подписчиков нельзя
+        label_sets = {f.labels for f in subs}
+        if len(label_sets) == 1:
+            labels = next(iter(label_sets))
+            if labels:
+                filters["label"] = sorted(labels)
+
+        return filters
+
+    def _sync_upstream(self) -> None:
+        """
+        Поднять, перезапустить или погасить upstream под текущих подписчиков.
+        Вызывается под self._lock.
+        """
+        wanted = self._wanted_filters()
+        current = self._upstream
+
+        if current is not None and current.filters == wanted:
+            return
+
+        if current is not None:
+            current.close()
+            self._upstream = None
+
+        if wanted is None:
+            # пока upstream выключен, события теряются: всё, что клиенты
+            # видели до этого момента, из буфера уже не догнать
+            self._mark_gap()
+            return
+
+        if current is not None and _narrower(wanted, current.filters):
+            # дальше в буфер попадёт только часть событий: клиент без этого
+            # фильтра, вернувшийся с ?since, недосчитался бы остальных
+            self._mark_gap()
+
+        # при смене фильтров новый стрим досасывает события с места старого
+        up = _Upstream(wanted, last_nano=current.last_nano if current else 0)
+        up.thread = threading.Thread(target=self._pump, args=(up,), daemon=True)
+        self._upstream = up
+        self.upstream_starts += 1
+        up.thread.start()
+
+    def _mark_gap(self) -> None:
+        self._gap_seq = self._seq
+        self._seq += 1
+
+    def _pump(self, up: _Upstream) -> None:
+        backoff = 1.0
+        first = True
+        while not up.stop.is_set():
+            try:
+                # после обрыва досасываем пропущенное у демона по since
+                since = None
+                last_nano = up.last_nano
+                if last_nano:
+                    since = f"{last_nano // 1_000_000_000}.{last_nano % 1_000_000_000:09d}"
+                up.stream = self._client.events(decode=True, filters=up.filters, since=since)
+                if up.stop.is_set():
+                    up.stream.close()
+                    return
+
+                up.connected = True
+                if not first:
+                    self._notify_reconnect()
+                first = False
+                backoff = 1.0
+
+                for ev in up.stream:
+                    if up.stop.is_set():
+                        return
+                    nano = int(ev.get("timeNano") or 0)
+                    if nano and nano <= up.last_nano:
+                        # уже видели до переподключения
+                        continue
+                    up.last_nano = max(up.last_nano, nano)
+                    self._publish(ev)
+            except Exception:
+                pass
+            finally:
+                up.connected = False
+                up.stream = None
+
+            if up.stop.wait(backoff):
+                return
+            backoff = min(backoff * 2, 30.0)
+
+    def _notify_reconnect(self) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for l in listeners:
+            if l.on_reconnect is not None:
+                try:
+                    l.on_reconnect()
+                except Exception:
+                    pass
+
+    def _publish(self, ev: dict) -> None:
+        self.events_total += 1
+
+        with self._lock:
+            listeners = list(self._listeners)
+
+        ev_type = ev.get("Type")
+        for l in listeners:
+            if ev_type in l.types:
+                try:
+                    l.callback(ev)
+                except Exception:
+                    pass
+
+        mapped = map_container_event(ev)
+        if mapped is None:
+            return
+
+        # номер и буфер — даже без подписчиков, чтобы было что повторить
+        with self._lock:
+            self._seq += 1
+            mapped["seq"] = self._seq
+            self._replay.append((mapped, ev))
+            if not self._subscribers:
+                return
+            candidates = self._candidates(ev)
+
+        subscribers = [s for s in candidates if s.filter.matches(ev)]
+        if not subscribers:
+            return
+
+        # один call_soon_threadsafe на event loop, а не на каждого подписчика
+        by_loop: dict[asyncio.AbstractEventLoop, list[Subscription]] = {}
+        for sub in subscribers:
+            by_loop.setdefault(sub._loop, []).append(sub)
+
+        for loop, subs in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_fan_out, subs, mapped)
+            except RuntimeError:
+                # loop уже закрыт
+                pass
+
+    @property
+    def connected(self) -> bool:
+        """
+        Upstream сейчас читает события демона.
+        """
+        up = self._upstream
+        return bool(up and up.connected)
+
+    # ===== метрики =====
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = [s.stats() for s in self._subscribers]
+            up = self._upstream
+            listeners = len(self._listeners)
+
+        return {
+            "seq": self._seq,
+            "replay_size": len(self._replay),
+            "replay_oldest_seq": self._replay[0][0]["seq"] if self._replay else None,
+            "upstream_active": up is not None,
+            "upstream_connected": bool(up and up.connected),
+            "upstream_filters": up.filters if up else None,
+            "upstream_starts": self.upstream_starts,
+            "events_total": self.events_total,
+            "listeners": listeners,
+            "subscribers": len(subscribers),
+            "queue_depth_total": sum(s["queue_depth"] for s in subscribers),
+            "dropped_total": self.dropped_closed + sum(s["dropped"] for s in subscribers),
+            "subscribers_detail": subscribers,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            up = self._upstream
+            self._upstream = None
+        if up is not None:
+            up.close()
+
+
+def _narrower(new: dict, old: dict) -> bool:
+    """
+    Пропускают ли фильтры демона new хоть одно событие меньше, чем old.
+    Значения ключа объединяются через ИЛИ, разные ключи и метки — через И.
+    """
+    for key, values in new.items():
+        if key not in old:
+            return True
+        if key == "label":
+            if not set(values) <= set(old[key]):
+                return True
+        elif not set(old[key]) <= set(values):
+            return True
+    return False
+
+
+def _fan_out(subs: list[Subscription], item: dict) -> None:
+    for sub in subs:
+        sub._push(item)
+
+
+@lru_cache
+def get_events_hub() -> EventsHub:
+    return EventsHub(get_docker_client())
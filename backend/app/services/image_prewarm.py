@@ -0,0 +1,188 @@
+"""
+Прогрев образов шаблонов.
+
+Первый деплой из шаблона на свежем хосте ждёт pull прямо в запросе.
+Здесь фоновая задача обходит хранилище шаблонов, сверяет их образы
+с локальными (один вызов /images/json) и, если MIRA_PREWARM включён,
+докачивает недостающие через общий PullManager:
+  - не больше MIRA_PREWARM_CONCURRENCY одновременно;
+  - с низким приоритетом: пока идут pull из запросов пользователей,
+    новый прогрев не начинается;
+  - обход повторяется при создании/изменении/импорте шаблонов
+    и раз в MIRA_PREWARM_INTERVAL секунд.
+
+Статус образа (warm | cold | pulling | failed) виден в списке шаблонов
+и без MIRA_PREWARM — тогда прогрева нет, только сверка.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from functools import lru_cache
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.deps import get_docker_engine
+from app.services.docker_engine import DockerEngine, EngineError
+from app.services.image_pull import PullManager, get_pull_manager, normalize_reference
+from app.services.templates_store import TemplatesStore, get_templates_store
+
+PREWARM_ENABLED = os.getenv("MIRA_PREWARM", "0").lower() not in ("0", "false", "no")
+PREWARM_CONCURRENCY = int(os.getenv("MIRA_PREWARM_CONCURRENCY", "1"))
+PREWARM_INTERVAL = float(os.getenv("MIRA_PREWARM_INTERVAL", "300"))
+# пауза после изменения шаблонов: импорт пачками не должен дёргать обход на каждую
+PREWARM_DEBOUNCE = float(os.getenv("MIRA_PREWARM_DEBOUNCE", "2"))
+# список шаблонов старше этого — повод сверить образы заново (в фоне)
+PREWARM_STALE_SECONDS = float(os.getenv("MIRA_PREWARM_STALE_SECONDS", "15"))
+_FOREGROUND_POLL = 1.0
+
+
+class ImagePrewarmer:
+    def __init__(
+        self,
+        engine: DockerEngine,
+        pulls: PullManager,
+        templates: TemplatesStore,
+        enabled: bool = PREWARM_ENABLED,
+        concurrency: int = PREWARM_CONCURRENCY,
+    ):
+        self._engine = engine
+        self._pulls = pulls
+        self._templates = templates
+        self.enabled = enabled
+        self._slots = asyncio.Semaphore(concurrency)
+
+        self._local: set[str] = set()
+        self._failed: dict[str, str] = {}
+        self._warming: set[str] = set()
+        self._scanned_at = 0.0
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._warm_tasks: set[asyncio.Task] = set()
+
+    # ===== жизненный цикл =====
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._warm_tasks:
+            task.cancel()
+
+    def trigger(self) -> None:
+        """
+        Запросить обход. Можно звать из любого потока (sync-роуты шаблонов).
+        """
+        if self._loop is None or self._wake is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            # loop уже закрыт — приложение останавливается
+            pass
+
+    # ===== статус =====
+
+    def status(self, image: str) -> str | None:
+        """
+        warm | cold | pulling | failed; None — сверки ещё не было.
+        """
+        if not self._scanned_at:
+            return None
+        ref = normalize_reference(image)
+        if ref in self._local:
+            return "warm"
+        if ref in self._warming or any(p.reference == ref for p in self._pulls.active()):
+            return "pulling"
+        if ref in self._failed:
+            return "failed"
+        return "cold"
+
+    def refresh_if_stale(self) -> None:
+        if time.time() - self._scanned_at > PREWARM_STALE_SECONDS:
+            self.trigger()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "scanned_at": self._scanned_at or None,
+            "local_images": len(self._local),
+            "warming": sorted(self._warming),
+            "failed": dict(self._failed),
+        }
+
+    # ===== обход =====
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._scan()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # демон недоступен — попробуем на следующем круге
+                pass
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), PREWARM_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.sleep(PREWARM_DEBOUNCE)
+            self._wake.clear()
+
+    async def _refresh_local(self) -> None:
+        local: set[str] = set()
+        for attrs in await self._engine.images():
+            for ref in attrs.get("RepoTags") or []:
+                if ref != "<none>:<none>":
+                    local.add(normalize_reference(ref))
+            for ref in attrs.get("RepoDigests") or []:
+                local.add(ref)
+        self._local = local
+        self._scanned_at = time.time()
+
+    async def _scan(self) -> None:
+        await self._refresh_local()
+        templates = await run_in_threadpool(self._templates.list)
+        wanted = {normalize_reference(t.image) for t in templates if t.image}
+        # шаблон удалили или образ появился — старая ошибка не нужна
+        self._failed = {ref: e for ref, e in self._failed.items() if ref in wanted - self._local}
+
+        if not self.enabled:
+            return
+        # неудачные тоже: ошибка могла быть временной
+        for ref in sorted(wanted - self._local - self._warming):
+            self._warming.add(ref)
+            task = asyncio.create_task(self._warm(ref))
+            self._warm_tasks.add(task)
+            task.add_done_callback(self._warm_tasks.discard)
+
+    async def _warm(self, ref: str) -> None:
+        try:
+            async with self._slots:
+                # низкий приоритет: ждём, пока pull из запросов закончатся
+                while any(p.reference not in self._warming for p in self._pulls.active()):
+                    await asyncio.sleep(_FOREGROUND_POLL)
+                await self._pulls.pull(ref).wait()
+            self._local.add(ref)
+            self._failed.pop(ref, None)
+        except EngineError as e:
+            self._failed[ref] = e.message
+        finally:
+            self._warming.discard(ref)
+
+
+@lru_cache
+def get_image_prewarmer() -> ImagePrewarmer:
+    return ImagePrewarmer(get_docker_engine(), get_pull_manager(), get_templates_store())
@@ -0,0 +1,236 @@
+"""
+Менеджер скачивания образов.
+
+  - один pull на ссылку: повторные запросы (POST /images/pull, задания
+    создания контейнеров, развёртывание шаблонов) присоединяются к идущему;
+  - разные образы качаются параллельно, но не больше MIRA_PULL_PARALLELISM;
+  - построчный прогресс демона по слоям сворачивается в компактные события
+    (число слоёв, готовые слои, байты) не чаще MIRA_PULL_PROGRESS_INTERVAL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from functools import lru_cache
+from typing import Callable
+
+from app.deps import get_docker_engine
+from app.services.docker_engine import DockerEngine, EngineError, EngineNotFound
+
+PULL_PARALLELISM = int(os.getenv("MIRA_PULL_PARALLELISM", "3"))
+PULL_PROGRESS_INTERVAL = float(os.getenv("MIRA_PULL_PROGRESS_INTERVAL", "0.25"))
+
+ProgressCallback = Callable[[dict], None]
+
+_LAYER_DONE = {"Pull complete", "Already exists"}
+# после этих статусов слой скачан целиком, даже если progressDetail пуст
+_LAYER_DOWNLOADED = {"Verifying Checksum", "Download complete", "Extracting", "Pull complete"}
+
+
+def split_reference(image: str) -> tuple[str, str | None]:
+    """
+    "nginx" -> ("nginx", "latest"), "host:5000/app:1.2" -> ("host:5000/app", "1.2"),
+    "app@sha256:..." -> ("app@sha256:...", None).
+    """
+    if "@" in image:
+        return image, None
+    name, sep, tag = image.rpartition(":")
+    if sep and "/" not in tag:
+        return name, tag
+    return image, "latest"
+
+
+def normalize_reference(image: str) -> str:
+    repo, tag = split_reference(image.strip())
+    return f"{repo}:{tag}" if tag else repo
+
+
+class _Layer:
+    __slots__ = ("status", "current", "total", "done")
+
+    def __init__(self):
+        self.status = ""
+        self.current = 0
+        self.total = 0
+        self.done = False
+
+
+class Pull:
+    """
+    Один pull. status: queued -> pulling -> done | failed.
+    Подписчики получают снимок сразу при подписке и дальше по мере изменений.
+    """
+
+    def __init__(self, reference: str):
+        self.reference = reference
+        self.status = "queued"
+        self.error: str | None = None
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.task: asyncio.Task | None = None
+        self._layers: dict[str, _Layer] = {}
+        self._listeners: list[ProgressCallback] = []
+        self._last_emit = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def snapshot(self) -> dict:
+        layers = self._layers.values()
+        current = sum(layer.current for layer in layers)
+        total = sum(layer.total for layer in layers)
+        return {
+            "type": "pull",
+            "image": self.reference,
+            "status": self.status,
+            "layers": len(self._layers),
+            "layers_done": sum(1 for layer in layers if layer.done),
+            "current": current,
+            "total": total,
+            "percent": round(current / total * 100, 1) if total else None,
+            "error": self.error,
+        }
+
+    # ===== подписчики =====
+
+    def listen(self, callback: ProgressCallback) -> None:
+        self._listeners.append(callback)
+        try:
+            callback(self.snapshot())
+        except Exception:
+            pass
+
+    def unlisten(self, callback: ProgressCallback) -> None:
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _emit(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_emit < PULL_PROGRESS_INTERVAL:
+            return
+        self._last_emit = now
+        event = self.snapshot()
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception:
+                pass
+
+    # ===== прогресс демона =====
+
+    def _set_status(self, status: str, error: str | None = None) -> None:
+        self.status = status
+        self.error = error
+        if self.finished:
+            self.finished_at = time.time()
+        self._emit(force=True)
+
+    def _apply(self, line: dict) -> None:
+        layer_id = line.get("id")
+        status = line.get("status") or ""
+        # строки без id — общие ("Pulling from ...", "Digest: ...")
+        if not layer_id or status.startswith("Pulling from"):
+            return
+
+        layer = self._layers.get(layer_id)
+        is_new = layer is None
+        if is_new:
+            layer = self._layers[layer_id] = _Layer()
+        layer.status = status
+
+        detail = line.get("progressDetail") or {}
+        if status == "Downloading" and detail.get("total"):
+            layer.current = detail.get("current") or 0
+            layer.total = detail["total"]
+        elif status in _LAYER_DOWNLOADED and layer.total:
+            layer.current = layer.total
+
+        completed = status in _LAYER_DONE and not layer.done
+        if completed:
+            layer.done = True
+        self._emit(force=is_new or completed)
+
+    async def wait(self) -> None:
+        # shield: отмена одного ожидающего не должна обрывать общий pull
+        await asyncio.shield(self.task)
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+class PullManager:
+    def __init__(self, engine: DockerEngine, parallelism: int = PULL_PARALLELISM):
+        self._engine = engine
+        self._slots = asyncio.Semaphore(parallelism)
+        self._pulls: dict[str, Pull] = {}
+
+    def active(self) -> list[Pull]:
+        return list(self._pulls.values())
+
+    def pull(self, image: str) -> Pull:
+        """
+        Запустить pull или присоединиться к уже идущему по той же ссылке.
+        """
+        reference = normalize_reference(image)
+        current = self._pulls.get(reference)
+        if current is not None:
+            return current
+
+        pull = Pull(reference)
+        pull.task = asyncio.create_task(self._run(pull))
+        # фоновый pull (POST /images/pull?background=true) может никто не ждать
+        pull.task.add_done_callback(_retrieve_exception)
+        self._pulls[reference] = pull
+        return pull
+
+    async def _run(self, pull: Pull) -> None:
+        repo, tag = split_reference(pull.reference)
+        try:
+            async with self._slots:
+                pull._set_status("pulling")
+                async for line in self._engine.pull_image(repo, tag=tag):
+                    if line.get("error"):
+                        raise EngineError(500, line["error"])
+                    pull._apply(line)
+        except EngineError as e:
+            pull._set_status("failed", e.message)
+            raise
+        except asyncio.CancelledError:
+            pull._set_status("failed", "Cancelled")
+            raise
+        else:
+            pull._set_status("done")
+        finally:
+            self._pulls.pop(pull.reference, None)
+
+    async def ensure_image(self, image: str, on_progress: ProgressCallback | None = None) -> bool:
+        """
+        Скачать образ, если его нет локально. True — если pull понадобился.
+        """
+        try:
+            await self._engine.inspect_image(image)
+            return False
+        except EngineNotFound:
+            pass
+
+        pull = self.pull(image)
+        if on_progress is not None:
+            pull.listen(on_progress)
+        try:
+            await pull.wait()
+        finally:
+            if on_progress is not None:
+                pull.unlisten(on_progress)
+        return True
+
+
+@lru_cache
+def get_pull_manager() -> PullManager:
+    return PullManager(get_docker_engine())
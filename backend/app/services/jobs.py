@@ -0,0 +1,166 @@
+"""
+Реестр фоновых заданий.
+
+Долгие операции (создание контейнера с pull образа) не держат HTTP-запрос:
+клиент сразу получает 202 и id задания, статус смотрит через
+GET /api/v1/jobs/{id}, а прогресс получает через WS /api/v1/jobs/{id}/ws.
+Всё живёт в памяти процесса и меняется только из event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+from functools import lru_cache
+from typing import Awaitable, Callable
+
+from app.services.docker_engine import EngineError
+
+JOBS_KEEP = int(os.getenv("MIRA_JOBS_KEEP", "200"))
+JOBS_TTL_SECONDS = float(os.getenv("MIRA_JOBS_TTL_SECONDS", "3600"))
+JOB_QUEUE_SIZE = int(os.getenv("MIRA_JOB_QUEUE_SIZE", "1000"))
+
+TERMINAL_STATUSES = {"done", "failed", "cancelled"}
+
+
+class Job:
+    def __init__(self, kind: str, params: dict | None = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = "pending"
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.progress: dict | None = None
+        self.result: dict | None = None
+        self.error: str | None = None
+        self.task: asyncio.Task | None = None
+        self._subscribers: set[asyncio.Queue] = set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def publish(self, event: dict) -> None:
+        """
+        Событие задания: {"type": "status", "status": ...} меняет статус,
+        остальное (прогресс pull) запоминается как последний прогресс.
+        """
+        if event.get("type") == "status":
+            self.status = event["status"]
+        else:
+            self.progress = event
+        self.updated_at = time.time()
+
+        event = {"job_id": self.id, **event}
+        for queue in self._subscribers:
+            if queue.full():
+                # прогресс терять не страшно, а финальный статус дойдёт
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def status_event(self) -> dict:
+        """
+        Текущий статус в виде события, как его публикует _run.
+        """
+        event = {"job_id": self.id, "type": "status", "status": self.status}
+        if self.status == "done":
+            event["result"] = self.result
+        elif self.error is not None:
+            event["error"] = self.error
+        return event
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+JobFunc = Callable[[Job], Awaitable[dict | None]]
+
+
+class JobRegistry:
+    def __init__(self):
+        self._jobs: dict[str, Job] = {}
+
+    def start(self, kind: str, func: JobFunc, params: dict | None = None) -> Job:
+        self._prune()
+        job = Job(kind, params)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, func))
+        return job
+
+    async def _run(self, job: Job, func: JobFunc) -> None:
+        job.publish({"type": "status", "status": "running"})
+        try:
+            job.result = await func(job)
+        except asyncio.CancelledError:
+            job.error = "Cancelled"
+            job.publish({"type": "status", "status": "cancelled", "error": job.error})
+            raise
+        except EngineError as e:
+            job.error = e.message
+            job.publish({"type": "status", "status": "failed", "error": job.error})
+        except Exception as e:
+            job.error = str(e)
+            job.publish({"type": "status", "status": "failed", "error": job.error})
+        else:
+            job.publish({"type": "status", "status": "done", "result": job.result})
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished or job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+    def _prune(self) -> None:
+        """
+        Завершённые задания живут JOBS_TTL_SECONDS и не больше JOBS_KEEP штук.
+        """
+        now = time.time()
+        finished = sorted(
+            (j for j in self._jobs.values() if j.finished),
+            key=lambda j: j.updated_at,
+        )
+        excess = len(finished) - JOBS_KEEP
+        for i, job in enumerate(finished):
+            if i < excess or now - job.updated_at > JOBS_TTL_SECONDS:
+                del self._jobs[job.id]
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def shutdown(self) -> None:
+        for job in self._jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+
+
+@lru_cache
+def get_job_registry() -> JobRegistry:
+    return JobRegistry()
@@ -0,0 +1,209 @@
+"""
+Сортировка и постраничная выдача списков ресурсов.
+
+Курсор — не смещение, а ключ сортировки и id последнего отданного элемента
+("keyset"): следующая страница начинается строго после него. Поэтому
+появление и исчезновение контейнеров между запросами не сдвигает страницы —
+ничего не повторяется и не пропускается (кроме самих удалённых).
+
+Без sort/limit/cursor список отдаётся целиком в прежнем порядке.
+FieldSelection (?fields=) — то же для полей: лишние не считаются.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, TypeVar
+
+from pydantic import BaseModel
+
+MAX_LIMIT = int(os.getenv("MIRA_LIST_MAX_LIMIT", "1000"))
+
+T = TypeVar("T")
+
+# спецсимволы регулярок RE2 (демон сравнивает name как регулярное выражение)
+_RE2_SPECIAL = set("\\.+*?()|[]{}^$")
+
+
+class ListQueryError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ListQuery:
+    # None — порядок источника, без постраничности
+    sort: str | None = None
+    descending: bool = False
+    limit: int | None = None
+    after: tuple | None = None
+
+    @property
+    def sort_spec(self) -> str:
+        return f"-{self.sort}" if self.descending else f"{self.sort}"
+
+
+@dataclass
+class Page:
+    items: list
+    total: int
+    next_cursor: str | None = None
+
+
+def parse_list_query(
+    sort: str | None,
+    limit: int | None,
+    cursor: str | None,
+    fields: Iterable[str],
+    default: str,
+) -> ListQuery:
+    """
+    sort — поле из fields, "-поле" — по убыванию. Если задан только limit
+    или cursor, сортировка — default: без неё курсор не имеет смысла.
+    """
+    if sort is None and limit is None and cursor is None:
+        return ListQuery()
+
+    spec = sort or default
+    name = spec.removeprefix("-")
+    if name not in fields:
+        raise ListQueryError(f"Unknown sort field {name!r}, expected one of {sorted(fields)}")
+
+    after = None
+    if cursor:
+        after = decode_cursor(cursor, spec)
+    return ListQuery(sort=name, descending=spec.startswith("-"), limit=limit, after=after)
+
+
+def encode_cursor(spec: str, value: Any, item_id: str) -> str:
+    raw = json.dumps([spec, value, item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, spec: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_spec, value, item_id = json.loads(raw)
+    except Exception:
+        raise ListQueryError("Invalid cursor") from None
+    if not isinstance(item_id, str) or not isinstance(value, (str, int, float)):
+        raise ListQueryError("Invalid cursor")
+    if cursor_spec != spec:
+        raise ListQueryError("Cursor was issued for another sort order")
+    return value, item_id
+
+
+def paginate(
+    items: list[T],
+    query: ListQuery,
+    keys: dict[str, Callable[[T], Any]],
+    ident: Callable[[T], str],
+) -> Page:
+    """
+    keys — поле сортировки -> ключ элемента (str или число, без None),
+    ident — уникальный id: второй ключ, чтобы порядок был полным.
+    """
+    if query.sort is None:
+        return Page(items=items, total=len(items))
+
+    key = keys[query.sort]
+    rows = sorted(
+        ((key(item), ident(item), item) for item in items),
+        key=lambda row: (row[0], row[1]),
+        reverse=query.descending,
+    )
+    total = len(rows)
+
+    if query.after is not None:
+        after = query.after
+        try:
+            if query.descending:
+                rows = [row for row in rows if (row[0], row[1]) < after]
+            else:
+                rows = [row for row in rows if (row[0], row[1]) > after]
+        except TypeError:
+            # ключ курсора другого типа, чем у поля
+            raise ListQueryError("Invalid cursor") from None
+
+    next_cursor = None
+    if query.limit is not None and len(rows) > query.limit:
+        rows = rows[: query.limit]
+        value, item_id, _ = rows[-1]
+        next_cursor = encode_cursor(query.sort_spec, value, item_id)
+
+    return Page(items=[row[2] for row in rows], total=total, next_cursor=next_cursor)
+
+
+def split_values(values: Iterable[str] | str | None) -> list[str]:
+    """
+    ?status=running,paused и ?status=running&status=paused — одно и то же.
+    """
+    if values is None:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    return [v.strip() for value in values for v in value.split(",") if v.strip()]
+
+
+def label_matcher(labels: list[str]) -> Callable[[dict | None], bool] | None:
+    """
+    Фильтр по меткам как у демона: "key" — метка есть, "key=value" — равна;
+    несколько меток — все сразу.
+    """
+    if not labels:
+        return None
+    wanted = [label.partition("=") for label in labels]
+
+    def match(actual: dict | None) -> bool:
+        actual = actual or {}
+        for key, eq, value in wanted:
+            if key not in actual or (eq and actual[key] != value):
+                return False
+        return True
+
+    return match
+
+
+def name_pattern(substring: str) -> str:
+    """
+    Подстрока без учёта регистра -> регулярка для фильтра name демона.
+    """
+    escaped = "".join(f"\\{ch}" if ch in _RE2_SPECIAL else ch for ch in substring)
+    return f"(?i){escaped}"
+
+
+class FieldSelection:
+    """
+    ?fields=id,name,status — какие поля нужны в ответе. Роут смотрит
+    на неё до обращений к демону: ненужные поля не считаются вовсе.
+    """
+
+    def __init__(self, fields: frozenset[str] | None = None):
+        # None — все поля, как без параметра
+        self.fields = fields
+
+    @property
+    def all(self) -> bool:
+        return self.fields is None
+
+    def __contains__(self, name: str) -> bool:
+        return self.fields is None or name in self.fields
+
+    def project(self, item: Any) -> Any:
+        if self.fields is None:
+            return item
+        if isinstance(item, BaseModel):
+            return item.model_dump(mode="json", include=set(self.fields))
+        return {k: v for k, v in item.items() if k in self.fields}
+
+
+def parse_fields(values: Iterable[str] | str | None, allowed: Iterable[str]) -> FieldSelection:
+    names = split_values(values)
+    if not names:
+        return FieldSelection()
+    unknown = set(names) - set(allowed)
+    if unknown:
+        raise ListQueryError(f"Unknown fields {sorted(unknown)}, expected some of {list(allowed)}")
+    return FieldSelection(frozenset(names))
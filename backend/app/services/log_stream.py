@@ -0,0 +1,437 @@
+"""
+Потоковое чтение логов контейнера: follow для WebSocket и SSE,
+окна по времени с курсором и фильтром для GET /logs.
+
+`c.logs(tail=N)` собирает весь хвост в одну строку, и UI приходится
+перезапрашивать его целиком. Здесь /containers/{id}/logs читается
+по мере поступления (фоновая задача поверх DockerEngine):
+  - мультиплексированный поток разбирается по 8-байтовым заголовкам
+    (stdout/stderr), у TTY-контейнеров поток один и без заголовков;
+  - байты декодируются инкрементально, разбиваются на строки;
+  - готовые строки уходят в ограниченную asyncio-очередь. Если клиент
+    не успевает, чтение ждёт места в очереди и перестаёт забирать данные
+    из сокета — дальше тормозит уже сам демон, а не память процесса.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import codecs
+import os
+import re
+import struct
+import time
+from datetime import datetime
+from typing import Callable
+
+from app.services.docker_engine import DockerEngine
+from app.services.metrics_store import parse_duration
+
+LOGS_QUEUE_CHUNKS = int(os.getenv("MIRA_LOGS_QUEUE_CHUNKS", "64"))
+LOGS_MAX_LINE = int(os.getenv("MIRA_LOGS_MAX_LINE", "16384"))
+
+STREAM_NAMES = {0: "stdin", 1: "stdout", 2: "stderr"}
+
+_HEADER = struct.Struct(">BxxxL")
+
+
+class _LineSplitter:
+    """
+    Байты одного потока -> готовые строки. Незавершённая строка ждёт
+    следующего куска, но не дольше LOGS_MAX_LINE символов.
+    """
+
+    __slots__ = ("_decoder", "_pending")
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+
+    def feed(self, data: bytes) -> list[str]:
+        text = self._pending + self._decoder.decode(data)
+        lines = text.split("\n")
+        pending = lines.pop()
+        while len(pending) > LOGS_MAX_LINE:
+            lines.append(pending[:LOGS_MAX_LINE])
+            pending = pending[LOGS_MAX_LINE:]
+        self._pending = pending
+        return [line.rstrip("\r") for line in lines]
+
+    def flush(self) -> list[str]:
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        return [text.rstrip("\r")] if text else []
+
+
+class LogDemuxer:
+    """
+    Разбор тела ответа /logs на строки (stream, text).
+    """
+
+    def __init__(self, tty: bool):
+        self._tty = tty
+        self._buf = bytearray()
+        self._splitters: dict[str, _LineSplitter] = {}
+
+    def _splitter(self, stream: str) -> _LineSplitter:
+        splitter = self._splitters.get(stream)
+        if splitter is None:
+            splitter = self._splitters[stream] = _LineSplitter()
+        return splitter
+
+    def feed(self, data: bytes) -> list[tuple[str, str]]:
+        if self._tty:
+            return [("stdout", line) for line in self._splitter("stdout").feed(data)]
+
+        self._buf += data
+        out: list[tuple[str, str]] = []
+        pos = 0
+        while len(self._buf) - pos >= _HEADER.size:
+            stream_type, size = _HEADER.unpack_from(self._buf, pos)
+            end = pos + _HEADER.size + size
+            if len(self._buf) < end:
+                break
+            stream = STREAM_NAMES.get(stream_type, "stdout")
+            payload = bytes(self._buf[pos + _HEADER.size:end])
+            out.extend((stream, line) for line in self._splitter(stream).feed(payload))
+            pos = end
+        del self._buf[:pos]
+        return out
+
+    def flush(self) -> list[tuple[str, str]]:
+        out: list[tuple[str, str]] = []
+        for stream, splitter in self._splitters.items():
+            out.extend((stream, line) for line in splitter.flush())
+        return out
+
+
+class LogStreamMetrics:
+    """
+    Счётчики всех LogStream процесса (для /metrics). Меняются только
+    из event loop — без блокировок.
+    """
+
+    def __init__(self):
+        self.streams = 0
+        self.bytes_total = 0
+        self.lines_total = 0
+
+
+# общие на процесс
+stream_metrics = LogStreamMetrics()
+
+
+def _line_dict(stream: str, text: str, timestamps: bool) -> dict:
+    if timestamps:
+        # демон ставит RFC3339Nano и пробел в начало строки
+        ts, _, text = text.partition(" ")
+        return {"stream": stream, "time": ts, "text": text}
+    return {"stream": stream, "text": text}
+
+
+class LogStream:
+    """
+    Один поток логов контейнера. Порядок работы:
+        stream = LogStream(engine, cid, ...)
+        await stream.open()
+        async for lines in stream.batches(...): ...
+        stream.close()
+
+    Если чтение у демона оборвалось с ошибкой, batches() отдаёт уже
+    прочитанные строки и поднимает её (EngineError) — иначе обрезанный
+    лог выглядел бы полным.
+    """
+
+    def __init__(
+        self,
+        engine: DockerEngine,
+        container_id: str,
+        *,
+        follow: bool = True,
+        tail: int | None = None,
+        since: int | str | None = None,
+        until: int | str | None = None,
+        timestamps: bool = False,
+        queue_chunks: int = LOGS_QUEUE_CHUNKS,
+    ):
+        self._engine = engine
+        self._container_id = container_id
+        self._follow = follow
+        self._tail = tail
+        self._since = since
+        self._until = until
+        self._timestamps = timestamps
+        self._queue_chunks = queue_chunks
+
+        self._queue: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._closed = False
+        # ошибка чтения у демона — поднимается из batches()
+        self.error: Exception | None = None
+
+    # ===== жизненный цикл =====
+
+    async def open(self) -> None:
+        """
+        inspect + запуск чтения /logs. EngineNotFound пробрасывается наружу.
+        """
+        info = await self._engine.inspect_container(self._container_id)
+        tty = bool((info.get("Config") or {}).get("Tty"))
+
+        chunks = self._engine.container_logs_stream(
+            info["Id"],
+            follow=self._follow,
+            tail="all" if self._tail is None else self._tail,
+            since=self._since,
+            until=self._until,
+            timestamps=self._timestamps,
+        )
+
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self._queue_chunks)
+        self._task = asyncio.create_task(self._read_loop(chunks, LogDemuxer(tty)))
+
+    def close(self) -> None:
+        """
+        Остановить чтение; повторный вызов безопасен.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        # отмена закрывает ответ демона вместе с соединением
+        if self._task is not None:
+            self._task.cancel()
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    # ===== чтение сокета =====
+
+    async def _read_loop(self, chunks, demuxer: LogDemuxer) -> None:
+        ts = self._timestamps
+        metrics = stream_metrics
+        metrics.streams += 1
+        try:
+            async for chunk in chunks:
+                metrics.bytes_total += len(chunk)
+                lines = demuxer.feed(chunk)
+                if lines:
+                    metrics.lines_total += len(lines)
+                    # очередь полна — ждём и не читаем сокет дальше
+                    await self._queue.put([_line_dict(s, t, ts) for s, t in lines])
+            lines = demuxer.flush()
+            if lines:
+                metrics.lines_total += len(lines)
+                await self._queue.put([_line_dict(s, t, ts) for s, t in lines])
+        except Exception as e:
+            self.error = e
+        finally:
+            metrics.streams -= 1
+        if not self._closed:
+            await self._queue.put(None)
+
+    # ===== чтение =====
+
+    async def batches(self, max_lines: int, window: float):
+        """
+        Строки пачками: первая строка ждётся сколько угодно, дальше пачка
+        добирается не дольше window секунд или до max_lines строк.
+        """
+        queue = self._queue
+        while not self._closed:
+            item = await queue.get()
+            if item is None or self._closed:
+                self._raise_error()
+                return
+            lines = item
+
+            deadline = self._loop.time() + window
+            while len(lines) < max_lines:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    yield lines
+                    self._raise_error()
+                    return
+                lines.extend(item)
+
+            yield lines
+
+    def _raise_error(self) -> None:
+        if self.error is not None and not self._closed:
+            raise self.error
+
+
+# ===== окна по времени и курсоры =====
+
+_NS = 1_000_000_000
+_seconds_cache: dict[str, int] = {}
+
+
+def parse_log_time(value: str) -> int:
+    """
+    RFC3339Nano из префикса строки лога -> наносекунды unix-времени.
+    Go обрезает хвостовые нули дробной части, поэтому строки сравнивать нельзя.
+    """
+    head, dot, frac = value.rstrip("Z").partition(".")
+    seconds = _seconds_cache.get(head)
+    if seconds is None:
+        if "+" in frac or "-" in frac:
+            # смещение вместо Z — демон пишет в UTC, но на всякий случай
+            return parse_time_param(value)
+        seconds = int(datetime.fromisoformat(head + "+00:00").timestamp())
+        if len(_seconds_cache) > 4096:
+            _seconds_cache.clear()
+        _seconds_cache[head] = seconds
+    nanos = int(frac[:9].ljust(9, "0")) if dot and frac else 0
+    return seconds * _NS + nanos
+
+
+def parse_time_param(value: str, now: float | None = None) -> int:
+    """
+    since/until из запроса -> наносекунды. Понимает unix-время ("1700000000.5"),
+    ISO-дату ("2024-05-01T14:02:00Z") и длительность назад от now ("15m").
+    """
+    value = value.strip()
+    try:
+        return int(round(float(value) * _NS))
+    except ValueError:
+        pass
+    try:
+        seconds = parse_duration(value)
+    except ValueError:
+        pass
+    else:
+        now = time.time() if now is None else now
+        return int(round((now - seconds) * _NS))
+
+    head, dot, frac = value.replace("Z", "+00:00").partition(".")
+    digits = ""
+    if dot:
+        digits = frac[: len(frac) - len(frac.lstrip("0123456789"))]
+        head += frac[len(digits):]
+    dt = datetime.fromisoformat(head)
+    if dt.tzinfo is None:
+        raise ValueError("timezone is required")
+    return int(dt.timestamp()) * _NS + int(digits[:9].ljust(9, "0") or 0)
+
+
+def api_timestamp(ns: int) -> str:
+    """
+    Наносекунды -> формат since/until Docker API: "секунды.наносекунды".
+    """
+    return f"{ns // _NS}.{ns % _NS:09d}"
+
+
+def encode_cursor(ns: int, skip: int) -> str:
+    return base64.urlsafe_b64encode(f"{ns}:{skip}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    """
+    Курсор — время последней отданной строки и сколько строк с этим же
+    временем уже отдано (у соседних строк время часто совпадает).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ns, _, skip = raw.partition(":")
+        return int(ns), int(skip)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def line_matcher(
+    contains: str | None,
+    regex: str | None,
+    ignore_case: bool = False,
+) -> Callable[[str], bool] | None:
+    """
+    Фильтр строк: подстрока и/или регулярное выражение. re.error пробрасывается.
+    """
+    checks: list[Callable[[str], bool]] = []
+    if contains:
+        if ignore_case:
+            needle = contains.lower()
+            checks.append(lambda text: needle in text.lower())
+        else:
+            checks.append(lambda text: contains in text)
+    if regex:
+        search = re.compile(regex, re.IGNORECASE if ignore_case else 0).search
+        checks.append(lambda text: search(text) is not None)
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda text: all(check(text) for check in checks)
+
+
+class LogPage:
+    """
+    Страница логов поверх LogStream (follow=False, timestamps=True).
+    lines() отдаёт пачки подходящих строк; после исчерпания next_cursor —
+    курсор следующей страницы или None, если логи кончились раньше limit.
+    """
+
+    def __init__(
+        self,
+        stream: LogStream,
+        *,
+        after: tuple[int, int] | None = None,
+        match: Callable[[str], bool] | None = None,
+        limit: int | None = None,
+        keep_time: bool = False,
+    ):
+        self._stream = stream
+        self._after = after
+        self._match = match
+        self._limit = limit
+        self._keep_time = keep_time
+        self.next_cursor: str | None = None
+
+    async def lines(self, max_lines: int = 500, window: float = 0.05):
+        after_ns, after_skip = self._after or (-1, 0)
+        match = self._match
+        limit = self._limit
+        keep_time = self._keep_time
+
+        last_ns = None
+        same = 0
+        emitted = 0
+        async for batch in self._stream.batches(max_lines, window):
+            out: list[dict] = []
+            for line in batch:
+                try:
+                    ns = parse_log_time(line["time"])
+                except (KeyError, ValueError):
+                    continue
+                if ns == last_ns:
+                    same += 1
+                else:
+                    last_ns, same = ns, 1
+
+                if ns < after_ns or (ns == after_ns and same <= after_skip):
+                    continue
+                if match is not None and not match(line["text"]):
+                    continue
+
+                if not keep_time:
+                    del line["time"]
+                out.append(line)
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    self.next_cursor = encode_cursor(ns, same)
+                    yield out
+                    return
+            if out:
+                yield out
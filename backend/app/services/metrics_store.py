@@ -0,0 +1,222 @@
+"""
+История метрик контейнеров для спарклайнов.
+
+На контейнер — два кольца фиксированного размера на массивах array:
+  fine   — 1 с, последние 15 минут
+  coarse — 1 мин, последние 24 часа (средние по fine)
+Память на контейнер постоянна (~28 КБ) и не зависит от времени работы.
+"""
+
+import math
+import os
+import threading
+import time
+from array import array
+from functools import lru_cache
+
+FINE_STEP = 1
+FINE_SLOTS = int(os.getenv("MIRA_METRICS_FINE_SLOTS", "900"))
+COARSE_STEP = 60
+COARSE_SLOTS = int(os.getenv("MIRA_METRICS_COARSE_SLOTS", "1440"))
+
+_NAN = float("nan")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: str) -> int:
+    """
+    "30s" / "15m" / "24h" / "1d" или просто секунды -> секунды.
+    """
+    value = value.strip().lower()
+    if not value:
+        raise ValueError("empty duration")
+    if value[-1] in _UNITS:
+        seconds = int(value[:-1]) * _UNITS[value[-1]]
+    else:
+        seconds = int(value)
+    if seconds <= 0:
+        raise ValueError("duration must be positive")
+    return seconds
+
+
+class _Ring:
+    """
+    Кольцо: слот = (t // step) % size. В buckets хранится номер интервала
+    (t // step), по нему видно, свежий слот или оставшийся с прошлого круга.
+    """
+
+    __slots__ = ("step", "size", "buckets", "cpu", "mem")
+
+    def __init__(self, step: int, size: int):
+        self.step = step
+        self.size = size
+        self.buckets = array("I", bytes(4 * size))
+        self.cpu = array("f", [_NAN]) * size
+        self.mem = array("f", [_NAN]) * size
+
+    def put(self, bucket: int, cpu: float, mem: float) -> None:
+        i = bucket % self.size
+        self.buckets[i] = bucket
+        self.cpu[i] = cpu
+        self.mem[i] = mem
+
+    def get(self, bucket: int) -> tuple[float, float] | None:
+        i = bucket % self.size
+        if self.buckets[i] != bucket:
+            return None
+        return self.cpu[i], self.mem[i]
+
+
+class _Series:
+    __slots__ = ("fine", "coarse", "acc_bucket", "acc_cpu", "acc_cpu_n", "acc_mem", "acc_mem_n")
+
+    def __init__(self):
+        self.fine = _Ring(FINE_STEP, FINE_SLOTS)
+        self.coarse = _Ring(COARSE_STEP, COARSE_SLOTS)
+        # накопитель текущей минуты для coarse
+        self.acc_bucket = 0
+        self.acc_cpu = 0.0
+        self.acc_cpu_n = 0
+        self.acc_mem = 0.0
+        self.acc_mem_n = 0
+
+    def _flush(self) -> None:
+        if not self.acc_bucket:
+            return
+        self.coarse.put(self.acc_bucket, *self._acc_avg())
+
+    def _acc_avg(self) -> tuple[float, float]:
+        cpu = self.acc_cpu / self.acc_cpu_n if self.acc_cpu_n else _NAN
+        mem = self.acc_mem / self.acc_mem_n if self.acc_mem_n else _NAN
+        return cpu, mem
+
+    def add(self, ts: float, cpu: float, mem: float) -> None:
+        self.fine.put(int(ts) // FINE_STEP, cpu, mem)
+
+        # даунсэмплинг: минута закончилась — её среднее уходит в coarse
+        bucket = int(ts) // COARSE_STEP
+        if bucket != self.acc_bucket:
+            self._flush()
+            self.acc_bucket = bucket
+            self.acc_cpu = self.acc_mem = 0.0
+            self.acc_cpu_n = self.acc_mem_n = 0
+
+        if not math.isnan(cpu):
+            self.acc_cpu += cpu
+            self.acc_cpu_n += 1
+        if not math.isnan(mem):
+            self.acc_mem += mem
+            self.acc_mem_n += 1
+
+    def get_coarse(self, bucket: int) -> tuple[float, float] | None:
+        # незакрытая минута ещё в накопителе
+        if bucket == self.acc_bucket:
+            return self._acc_avg()
+        return self.coarse.get(bucket)
+
+
+def _none_if_nan(values: list[float], as_int: bool = False) -> list:
+    out: list = []
+    for v in values:
+        if math.isnan(v):
+            out.append(None)
+        elif as_int:
+            out.append(int(v))
+        else:
+            out.append(round(v, 2))
+    return out
+
+
+class MetricsStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: dict[str, _Series] = {}
+
+    def add(self, container_id: str, ts: float, cpu_percent: float | None, memory_usage: int | None) -> None:
+        cpu = _NAN if cpu_percent is None else float(cpu_percent)
+        mem = _NAN if memory_usage is None else float(memory_usage)
+        with self._lock:
+            series = self._series.get(container_id)
+            if series is None:
+                series = self._series[container_id] = _Series()
+            series.add(ts, cpu, mem)
+
+    def remove(self, container_id: str) -> None:
+        with self._lock:
+            self._series.pop(container_id, None)
+
+    def has(self, container_id: str) -> bool:
+        return container_id in self._series
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    @staticmethod
+    def plan(
+        range_seconds: int,
+        step_seconds: int,
+        now: float | None = None,
+    ) -> tuple[bool, int, list[int]]:
+        """
+        Выбор кольца, итоговый шаг и сетка временных меток (начала интервалов).
+        fine — если диапазон в него помещается и шаг мельче минуты.
+        """
+        range_seconds = min(range_seconds, COARSE_SLOTS * COARSE_STEP)
+        use_fine = range_seconds <= FINE_SLOTS * FINE_STEP and step_seconds < COARSE_STEP
+        res = FINE_STEP if use_fine else COARSE_STEP
+        step = max(step_seconds, res)
+        step -= step % res
+
+        now = time.time() if now is None else now
+        end = int(now) // step * step
+        count = max(1, range_seconds // step)
+        return use_fine, step, [end - step * (count - 1 - i) for i in range(count)]
+
+    def query(
+        self,
+        container_id: str,
+        use_fine: bool,
+        step: int,
+        timestamps: list[int],
+    ) -> dict | None:
+        """
+        Столбцы cpu_percent / memory_usage на сетке timestamps
+        (среднее по слотам кольца внутри каждого шага).
+        """
+        with self._lock:
+            series = self._series.get(container_id)
+            if series is None:
+                return None
+
+            res = FINE_STEP if use_fine else COARSE_STEP
+            per_step = max(1, step // res)
+
+            cpu_out: list[float] = []
+            mem_out: list[float] = []
+            for t in timestamps:
+                first = t // res
+                cpu_sum = mem_sum = 0.0
+                cpu_n = mem_n = 0
+                for bucket in range(first, first + per_step):
+                    slot = series.fine.get(bucket) if use_fine else series.get_coarse(bucket)
+                    if slot is None:
+                        continue
+                    cpu, mem = slot
+                    if not math.isnan(cpu):
+                        cpu_sum += cpu
+                        cpu_n += 1
+                    if not math.isnan(mem):
+                        mem_sum += mem
+                        mem_n += 1
+                cpu_out.append(cpu_sum / cpu_n if cpu_n else _NAN)
+                mem_out.append(mem_sum / mem_n if mem_n else _NAN)
+
+        return {
+            "cpu_percent": _none_if_nan(cpu_out),
+            "memory_usage": _none_if_nan(mem_out, as_int=True),
+        }
+
+
+@lru_cache
+def get_metrics_store() -> MetricsStore:
+    return MetricsStore()
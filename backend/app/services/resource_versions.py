@@ -0,0 +1,190 @@
+"""
+Поколения списков ресурсов для условных GET.
+
+Фронтенд опрашивает списки контейнеров, образов, томов и сетей по таймеру,
+а они почти всегда не меняются. Здесь у каждого ресурса счётчик-поколение,
+его двигают:
+  - события Docker из общего хаба (volume mount/unmount, exec_* и прочие
+    действия, не видные в списках, пропускаются);
+  - успешные изменяющие вызовы через DockerEngine — ответ на собственный
+    POST не должен ждать события;
+  - инвентарь контейнеров, когда он применил изменения (список контейнеров
+    отдаётся из него, а он отстаёт от события на перечитывание).
+
+ETag списка = поколение, поэтому If-None-Match сверяется до обращений
+к демону и сериализации. Пока хаб не подключён к демону, изменения
+не видны — тогда ETag не выдаётся (ready == False).
+
+MIRA_ETAGS=0 выключает всё это: списки отдаются как раньше.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from functools import lru_cache
+
+from app.deps import get_docker_engine
+from app.services.docker_engine import DockerEngine
+from app.services.events_hub import EventsHub, get_events_hub
+
+ETAGS_ENABLED = os.getenv("MIRA_ETAGS", "1").lower() not in ("0", "false", "no")
+# верхняя граница ?wait_for_change, секунды
+LONG_POLL_MAX = float(os.getenv("MIRA_LONG_POLL_MAX", "60"))
+
+RESOURCES = ("containers", "images", "volumes", "networks")
+_EVENT_TYPES = {
+    "container": "containers",
+    "image": "images",
+    "volume": "volumes",
+    "network": "networks",
+}
+# действия, после которых списки выглядят так же
+_QUIET_ACTIONS = {
+    "attach",
+    "detach",
+    "resize",
+    "top",
+    "export",
+    "copy",
+    "archive-path",
+    "extract-to-dir",
+    "exec_create",
+    "exec_start",
+    "exec_die",
+    "exec_detach",
+    "mount",
+    "unmount",
+    "push",
+    "save",
+}
+
+
+class ResourceVersions:
+    def __init__(self, hub: EventsHub, engine: DockerEngine):
+        self._hub = hub
+        self._engine = engine
+        self._lock = threading.Lock()
+        # токен процесса: после рестарта поколения начинаются заново,
+        # и старые ETag клиентов не должны совпасть с новыми
+        self._epoch = os.urandom(4).hex()
+        self._generations = dict.fromkeys(RESOURCES, 0)
+        self._started = False
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._changed: dict[str, asyncio.Event] = {}
+
+    # ===== жизненный цикл =====
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._hub.add_listener(
+            self._on_event,
+            types=tuple(_EVENT_TYPES),
+            on_reconnect=self.bump_all,
+        )
+        self._engine.add_change_listener(self._on_engine_change)
+        self._started = True
+
+    def stop(self) -> None:
+        self._hub.remove_listener(self._on_event)
+        self._engine.remove_change_listener(self._on_engine_change)
+        self._started = False
+
+    # ===== состояние =====
+
+    @property
+    def ready(self) -> bool:
+        """
+        Поколениям можно верить: слушаем хаб, и он подключён к демону.
+        """
+        return self._started and self._hub.connected
+
+    def generation(self, resource: str) -> int:
+        return self._generations[resource]
+
+    def etag(self, resource: str, generation: int | None = None) -> str:
+        if generation is None:
+            generation = self._generations[resource]
+        return f'"{resource}-{self._epoch}-{generation}"'
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "generations": dict(self._generations),
+        }
+
+    # ===== изменения =====
+
+    def bump(self, resource: str) -> None:
+        """
+        Ресурс поменялся. Можно звать из любого потока.
+        """
+        with self._lock:
+            self._generations[resource] += 1
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake, resource)
+        except RuntimeError:
+            # loop уже закрыт — приложение останавливается
+            pass
+
+    def bump_all(self) -> None:
+        # после переподключения к демону события могли потеряться
+        for resource in RESOURCES:
+            self.bump(resource)
+
+    def _wake(self, resource: str) -> None:
+        event = self._changed.pop(resource, None)
+        if event is not None:
+            event.set()
+
+    def _on_event(self, ev: dict) -> None:
+        resource = _EVENT_TYPES.get(ev.get("Type") or "")
+        action = (ev.get("Action") or ev.get("status") or "").lower()
+        # "exec_start: sh -c ...", "health_status: healthy"
+        action = action.split(":", 1)[0]
+        if resource is not None and action not in _QUIET_ACTIONS:
+            self.bump(resource)
+
+    def _on_engine_change(self, method: str, path: str) -> None:
+        resource = path.split("/", 2)[1]
+        if resource in self._generations:
+            self.bump(resource)
+
+    # ===== long-poll =====
+
+    async def wait_for_change(self, resource: str, generation: int, timeout: float) -> bool:
+        """
+        Ждать, пока поколение ресурса уйдёт от generation, не дольше timeout.
+        True — поменялось.
+        """
+        self._loop = asyncio.get_running_loop()
+        timeout = min(timeout, LONG_POLL_MAX)
+        deadline = self._loop.time() + timeout
+        while self._generations[resource] == generation:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                return False
+            event = self._changed.get(resource)
+            if event is None:
+                event = self._changed[resource] = asyncio.Event()
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+@lru_cache
+def get_resource_versions() -> ResourceVersions | None:
+    """
+    Общие на процесс поколения. None, если ETag выключены через MIRA_ETAGS=0.
+    """
+    if not ETAGS_ENABLED:
+        return None
+    return ResourceVersions(get_events_hub(), get_docker_engine())
@@ -0,0 +1,240 @@
+"""
+Развёртывание стека шаблонов.
+
+  1. общая сеть стека (создаётся, если её нет);
+  2. все образы качаются параллельно через PullManager;
+  3. контейнеры создаются и запускаются по уровням топологической
+     сортировки depends_on: внутри уровня — все сразу, следующий уровень
+     ждёт, пока предыдущий запустится (запуск, а не healthcheck);
+  4. при любой ошибке или отмене созданное откатывается: контейнеры
+     удаляются, сеть — если её создали мы.
+
+Прогресс — события в on_event (поверх задания из реестра jobs):
+  {"type": "plan", "network", "levels": [[service, ...], ...]}
+  {"type": "pull", ...}                     — сводный прогресс pull
+  {"type": "level", "level", "services"}
+  {"type": "service", "service", "status": creating|starting|running|failed,
+   "container_id", "error"}
+  {"type": "rollback", "status": started|done, "removed", "errors"}
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+from app.schemas import (
+    ContainerCreateRequest,
+    ContainerSummary,
+    StackService,
+    StackSummary,
+    TemplateSummary,
+)
+from app.schemas.containers import VolumeMount
+from app.services.container_create import create_config
+from app.services.containers_listing import summary_from_inspect
+from app.services.docker_engine import DockerEngine, EngineError, EngineNotFound
+from app.services.image_pull import PullManager
+
+STACK_LABEL = "mira.stack"
+SERVICE_LABEL = "mira.stack.service"
+
+EventCallback = Callable[[dict], None]
+
+
+class StackDeployError(Exception):
+    pass
+
+
+def stack_levels(stack: StackSummary) -> list[list[StackService]]:
+    """
+    Уровни по depends_on (алгоритм Кана): в уровне k — сервисы, чьи
+    зависимости все в уровнях < k. Цикл -> StackDeployError.
+    """
+    pending = {s.name: set(s.depends_on) for s in stack.services}
+    by_name = {s.name: s for s in stack.services}
+    levels: list[list[StackService]] = []
+    while pending:
+        ready = [name for name, deps in pending.items() if not deps]
+        if not ready:
+            raise StackDeployError(f"Dependency cycle between services: {sorted(pending)}")
+        levels.append([by_name[name] for name in ready])
+        for name in ready:
+            del pending[name]
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return levels
+
+
+def stack_network(stack: StackSummary) -> str:
+    return stack.network or f"mira-{stack.id}"
+
+
+def service_request(
+    stack: StackSummary,
+    service: StackService,
+    template: TemplateSummary,
+) -> ContainerCreateRequest:
+    """
+    Шаблон + переопределения сервиса -> запрос на создание контейнера.
+    """
+    return ContainerCreateRequest(
+        name=f"{stack.id}-{service.name}",
+        image=template.image,
+        ports=template.ports if service.ports is None else service.ports,
+        env={**template.env, **service.env},
+        volumes=[VolumeMount(**v.model_dump()) for v in template.volumes],
+        restart_policy=template.restart_policy,
+    )
+
+
+class _Deployment:
+    def __init__(
+        self,
+        engine: DockerEngine,
+        pulls: PullManager,
+        stack: StackSummary,
+        templates: dict[str, TemplateSummary],
+        on_event: EventCallback | None,
+    ):
+        self._engine = engine
+        self._pulls = pulls
+        self._stack = stack
+        self._network = stack_network(stack)
+        self._requests = {
+            s.name: service_request(stack, s, templates[s.name]) for s in stack.services
+        }
+        self._on_event = on_event
+        self._network_created = False
+        self._created: list[str] = []
+
+    def _emit(self, event: dict) -> None:
+        if self._on_event is not None:
+            self._on_event(event)
+
+    async def run(self, levels: list[list[StackService]]) -> dict:
+        self._emit({
+            "type": "plan",
+            "network": self._network,
+            "levels": [[s.name for s in level] for level in levels],
+        })
+        try:
+            await self._ensure_network()
+            await self._pull_images()
+
+            containers: list[ContainerSummary] = []
+            for i, level in enumerate(levels):
+                self._emit({"type": "level", "level": i, "services": [s.name for s in level]})
+                results = await asyncio.gather(
+                    *(self._deploy_service(s) for s in level), return_exceptions=True
+                )
+                for service, result in zip(level, results):
+                    if isinstance(result, BaseException):
+                        message = result.message if isinstance(result, EngineError) else str(result)
+                        raise StackDeployError(f"Service {service.name!r} failed: {message}")
+                    containers.append(result)
+        except BaseException:
+            # повторная отмена не должна оборвать сам откат
+            await asyncio.shield(self._rollback())
+            raise
+
+        return {
+            "stack": self._stack.id,
+            "network": self._network,
+            "containers": [c.model_dump() for c in containers],
+        }
+
+    async def _ensure_network(self) -> None:
+        try:
+            await self._engine.inspect_network(self._network)
+            return
+        except EngineNotFound:
+            pass
+        await self._engine.create_network({
+            "Name": self._network,
+            "Driver": "bridge",
+            "CheckDuplicate": True,
+            "Labels": {STACK_LABEL: self._stack.id},
+        })
+        self._network_created = True
+
+    async def _pull_images(self) -> None:
+        async def pull(image: str) -> None:
+            try:
+                await self._pulls.ensure_image(image, on_progress=self._emit)
+            except EngineError as e:
+                raise StackDeployError(f"Failed to pull {image}: {e.message}") from None
+
+        images = {req.image for req in self._requests.values()}
+        await asyncio.gather(*(pull(image) for image in sorted(images)))
+
+    async def _deploy_service(self, service: StackService) -> ContainerSummary:
+        request = self._requests[service.name]
+
+        def status(value: str, **extra) -> None:
+            self._emit({"type": "service", "service": service.name, "status": value, **extra})
+
+        try:
+            status("creating")
+            config = create_config(
+                request,
+                labels={STACK_LABEL: self._stack.id, SERVICE_LABEL: service.name},
+                network=self._network,
+                aliases=[service.name],
+            )
+            created = await self._engine.create_container(config, name=request.name)
+            container_id = created["Id"]
+            self._created.append(container_id)
+
+            status("starting", container_id=container_id)
+            await self._engine.start_container(container_id)
+            attrs = await self._engine.inspect_container(container_id)
+        except EngineError as e:
+            status("failed", error=e.message)
+            raise
+
+        status("running", container_id=container_id)
+        return summary_from_inspect(attrs, request.image)
+
+    async def _rollback(self) -> None:
+        if not self._created and not self._network_created:
+            return
+        self._emit({"type": "rollback", "status": "started"})
+
+        results = await asyncio.gather(
+            *(self._engine.remove_container(cid, force=True) for cid in reversed(self._created)),
+            return_exceptions=True,
+        )
+        # уже удалённый кем-то контейнер — не ошибка отката
+        failed = [
+            r for r in results if isinstance(r, Exception) and not isinstance(r, EngineNotFound)
+        ]
+        errors = [r.message if isinstance(r, EngineError) else str(r) for r in failed]
+        if self._network_created:
+            try:
+                await self._engine.remove_network(self._network)
+            except EngineError as e:
+                errors.append(e.message)
+
+        self._emit({
+            "type": "rollback",
+            "status": "done",
+            "removed": len(self._created) - len(failed),
+            "errors": errors,
+        })
+
+
+async def deploy_stack(
+    engine: DockerEngine,
+    pulls: PullManager,
+    stack: StackSummary,
+    templates: dict[str, TemplateSummary],
+    levels: list[list[StackService]],
+    on_event: EventCallback | None = None,
+) -> dict:
+    """
+    templates — шаблон для каждого сервиса (по имени сервиса),
+    levels — из stack_levels. StackDeployError / EngineError пробрасываются
+    после отката. -> {"stack", "network", "containers": [...]}
+    """
+    return await _Deployment(engine, pulls, stack, templates, on_event).run(levels)
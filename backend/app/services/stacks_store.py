@@ -0,0 +1,123 @@
+"""
+Хранилище стеков шаблонов.
+
+Стеков десятки, а не тысячи, поэтому без кэша в памяти: строка на стек
+в той же SQLite-базе, что и шаблоны (MIRA_TEMPLATES_DB, режим WAL),
+независимо от MIRA_TEMPLATES_BACKEND.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+from app.schemas import StackSummary
+from app.services.templates_store import TEMPLATES_DB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stacks (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class StackNotFound(KeyError):
+    pass
+
+
+class StackExists(ValueError):
+    pass
+
+
+def _row(stack: StackSummary) -> tuple:
+    data = json.dumps(stack.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":"))
+    return stack.id, stack.name, data, time.time()
+
+
+class StacksStore:
+    def __init__(self, path: Path = TEMPLATES_DB):
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def list(self) -> List[StackSummary]:
+        with self._lock:
+            rows = self._connect().execute("SELECT data FROM stacks ORDER BY rowid").fetchall()
+        return [StackSummary.model_validate_json(data) for (data,) in rows]
+
+    def get(self, stack_id: str) -> StackSummary:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT data FROM stacks WHERE id = ?", (stack_id,)
+            ).fetchone()
+        if row is None:
+            raise StackNotFound(stack_id)
+        return StackSummary.model_validate_json(row[0])
+
+    def create(self, stack: StackSummary) -> StackSummary:
+        with self._writing() as conn:
+            try:
+                conn.execute("INSERT INTO stacks VALUES (?, ?, ?, ?)", _row(stack))
+            except sqlite3.IntegrityError:
+                raise StackExists(stack.id) from None
+        return stack
+
+    def update(self, stack_id: str, stack: StackSummary) -> StackSummary:
+        with self._writing() as conn:
+            try:
+                cur = conn.execute(
+                    "UPDATE stacks SET id = ?, name = ?, data = ?, updated_at = ? WHERE id = ?",
+                    (*_row(stack), stack_id),
+                )
+            except sqlite3.IntegrityError:
+                raise StackExists(stack.id) from None
+            if cur.rowcount == 0:
+                raise StackNotFound(stack_id)
+        return stack
+
+    def delete(self, stack_id: str) -> None:
+        with self._writing() as conn:
+            if conn.execute("DELETE FROM stacks WHERE id = ?", (stack_id,)).rowcount == 0:
+                raise StackNotFound(stack_id)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _writing(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+
+@lru_cache
+def get_stacks_store() -> StacksStore:
+    return StacksStore()
@@ -0,0 +1,238 @@
+"""
+Фоновый сборщик статистики контейнеров.
+
+`container.stats(stream=False)` занимает 1–2 секунды: демон ждёт два замера.
+Здесь на каждый запущенный контейнер держится одна потоковая подписка
+на /containers/{id}/stats, последний замер лежит в памяти — деталка
+контейнера и GET /api/v1/containers/stats отвечают сразу.
+Подписки заводятся и гасятся по событиям start/die из хаба событий.
+Каждый замер также пишется в историю (metrics_store).
+"""
+
+import os
+import threading
+import time
+from functools import lru_cache
+
+import docker
+from docker.client import DockerClient
+
+from app.deps import get_docker_client
+from app.schemas import ContainerStats
+from app.services.events_hub import EventsHub, get_events_hub
+from app.services.metrics_store import MetricsStore, get_metrics_store
+
+STATS_ENABLED = os.getenv("MIRA_STATS", "1").lower() not in ("0", "false", "no")
+STATS_MAX_STREAMS = int(os.getenv("MIRA_STATS_MAX_STREAMS", "500"))
+STATS_RESYNC_SECONDS = float(os.getenv("MIRA_STATS_RESYNC_SECONDS", "60"))
+
+_START_ACTIONS = {"start", "restart", "unpause"}
+_STOP_ACTIONS = {"die", "destroy"}
+
+
+def compute_stats(container_id: str, raw: dict) -> ContainerStats:
+    """
+    Один замер /stats -> ContainerStats. CPU % считается так же,
+    как в `docker stats`: по дельтам cpu_stats/precpu_stats.
+    """
+    cpu = raw.get("cpu_stats") or {}
+    precpu = raw.get("precpu_stats") or {}
+
+    cpu_percent = None
+    cpu_delta = (cpu.get("cpu_usage") or {}).get("total_usage", 0) - (
+        precpu.get("cpu_usage") or {}
+    ).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    # у первого замера precpu пустой — процент посчитать не из чего
+    if precpu.get("system_cpu_usage") and system_delta > 0 and cpu_delta >= 0:
+        online = cpu.get("online_cpus") or len(
+            (cpu.get("cpu_usage") or {}).get("percpu_usage") or []
+        ) or 1
+        cpu_percent = round(cpu_delta / system_delta * online * 100.0, 2)
+
+    mem = raw.get("memory_stats") or {}
+    memory_usage = mem.get("usage")
+    memory_limit = mem.get("limit")
+    if memory_usage is not None:
+        # как docker CLI: без page cache (cgroup v1 — total_inactive_file, v2 — inactive_file)
+        mstats = mem.get("stats") or {}
+        cache = mstats.get("total_inactive_file", mstats.get("inactive_file", 0))
+        if cache < memory_usage:
+            memory_usage -= cache
+
+    memory_percent = None
+    if memory_usage is not None and memory_limit:
+        memory_percent = round(memory_usage / memory_limit * 100.0, 2)
+
+    return ContainerStats(
+        id=container_id,
+        cpu_percent=cpu_percent,
+        memory_usage=memory_usage,
+        memory_limit=memory_limit,
+        memory_percent=memory_percent,
+        timestamp=time.time(),
+    )
+
+
+class _StatsStream:
+    def __init__(self, container_id: str):
+        self.container_id = container_id
+        self.stop = threading.Event()
+        self.thread: threading.Thread | None = None
+
+
+class ContainerStatsSampler:
+    def __init__(self, client: DockerClient, hub: EventsHub, store: MetricsStore):
+        # отдельный клиент со своим пулом: потоковые подписки держат
+        # соединения и не должны отнимать их у обычных запросов
+        self._client = docker.from_env(
+            version=client.api.api_version,
+            max_pool_size=STATS_MAX_STREAMS,
+        )
+        self._hub = hub
+        self._store = store
+        self._lock = threading.Lock()
+        self._streams: dict[str, _StatsStream] = {}
+        self._latest: dict[str, ContainerStats] = {}
+
+        self._stop = threading.Event()
+        self._resync_now = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ===== жизненный цикл =====
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._hub.add_listener(
+            self._on_event,
+            types=("container",),
+            on_reconnect=self._resync_now.set,
+        )
+        self._thread = threading.Thread(target=self._resync_loop, daemon=True)
+        self._thread.start()
+        self._resync_now.set()
+
+    def stop(self) -> None:
+        self._hub.remove_listener(self._on_event)
+        self._stop.set()
+        self._resync_now.set()
+        self._thread = None
+
+        with self._lock:
+            streams = list(self._streams.values())
+            self._streams.clear()
+            self._latest.clear()
+        for st in streams:
+            st.stop.set()
+
+    # ===== чтение =====
+
+    def latest(self, container_id: str) -> ContainerStats | None:
+        return self._latest.get(container_id)
+
+    def all(self) -> list[ContainerStats]:
+        with self._lock:
+            return list(self._latest.values())
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": True,
+                "streams": len(self._streams),
+                "max_streams": STATS_MAX_STREAMS,
+                "samples": len(self._latest),
+            }
+
+    # ===== подписки =====
+
+    def _ensure_stream(self, container_id: str) -> None:
+        with self._lock:
+            if container_id in self._streams or self._stop.is_set():
+                return
+            if len(self._streams) >= STATS_MAX_STREAMS:
+                return
+
+            st = _StatsStream(container_id)
+            st.thread = threading.Thread(target=self._run_stream, args=(st,), daemon=True)
+            self._streams[container_id] = st
+        st.thread.start()
+
+    def _drop_stream(self, container_id: str) -> None:
+        with self._lock:
+            st = self._streams.pop(container_id, None)
+            self._latest.pop(container_id, None)
+        if st is not None:
+            # поток выйдет на следующем замере (раз в секунду)
+            st.stop.set()
+
+    def _run_stream(self, st: _StatsStream) -> None:
+        cid = st.container_id
+        try:
+            for raw in self._client.api.stats(cid, decode=True, stream=True):
+                if st.stop.is_set():
+                    break
+                sample = compute_stats(cid, raw)
+                with self._lock:
+                    if self._streams.get(cid) is not st:
+                        break
+                    self._latest[cid] = sample
+                self._store.add(cid, sample.timestamp, sample.cpu_percent, sample.memory_usage)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                if self._streams.get(cid) is st:
+                    del self._streams[cid]
+                    self._latest.pop(cid, None)
+
+    def _on_event(self, ev: dict) -> None:
+        action = (ev.get("Action") or ev.get("status") or "").lower()
+        actor = ev.get("Actor") or {}
+        cid = actor.get("ID") or ev.get("id") or ""
+        if not cid:
+            return
+
+        if action in _START_ACTIONS:
+            self._ensure_stream(cid)
+        elif action in _STOP_ACTIONS:
+            self._drop_stream(cid)
+        if action == "destroy":
+            # история остановленного контейнера живёт до его удаления
+            self._store.remove(cid)
+
+    def resync(self) -> None:
+        """
+        Сверить подписки со списком запущенных контейнеров.
+        """
+        # без all — запущенные и приостановленные
+        running = {c["Id"] for c in self._client.api.containers()}
+        with self._lock:
+            gone = [cid for cid in self._streams if cid not in running]
+        for cid in gone:
+            self._drop_stream(cid)
+        for cid in running:
+            self._ensure_stream(cid)
+
+    def _resync_loop(self) -> None:
+        while not self._stop.is_set():
+            self._resync_now.wait(STATS_RESYNC_SECONDS)
+            self._resync_now.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.resync()
+            except Exception:
+                pass
+
+
+@lru_cache
+def get_stats_sampler() -> ContainerStatsSampler | None:
+    """
+    Общий на процесс сборщик. None, если выключен через MIRA_STATS=0.
+    """
+    if not STATS_ENABLED:
+        return None
+    return ContainerStatsSampler(get_docker_client(), get_events_hub(), get_metrics_store())
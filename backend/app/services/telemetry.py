@@ -0,0 +1,320 @@
+"""
+Метрики самого Mira в формате Prometheus (GET /metrics).
+
+  - HTTP: гистограмма задержки до начала ответа по шаблону роута
+    (/api/v1/containers/{container_id}), методу и классу статуса (2xx, 4xx...),
+    число запросов в работе по роуту;
+  - Docker Engine API: вызовы по эндпоинту и статусу ответа демона,
+    гистограмма задержек, занятые слоты и ожидание слота (EngineMetrics);
+  - хаб событий: подписчики, глубина их очередей, потерянные события;
+  - логи: открытые стримы, прочитанные у демона байты и строки;
+  - размеры хранилища шаблонов и кэшей (инвентарь, ряды метрик, задачи...).
+
+На горячем пути только HTTP: дочерние метрики со значениями меток создаются
+один раз при старте для каждого роута, запрос берёт готовые — без словарей
+меток и поиска по ним. Остальное собирается в момент scrape из счётчиков,
+которые сервисы и так ведут для /api/v1/system.
+
+MIRA_METRICS=0 (или не установлен prometheus_client) — ни обёрток роутов,
+ни /metrics.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from functools import lru_cache
+from typing import Callable
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        GC_COLLECTOR,
+        CollectorRegistry,
+        Gauge,
+        Histogram,
+        ProcessCollector,
+        generate_latest,
+    )
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+except ImportError:  # pragma: no cover - без prometheus_client метрик нет
+    CollectorRegistry = None
+
+from app.deps import get_docker_engine
+from app.services.containers_inventory import get_container_inventory
+from app.services.docker_engine import LATENCY_BUCKETS
+from app.services.events_hub import get_events_hub
+from app.services.image_prewarm import get_image_prewarmer
+from app.services.image_pull import get_pull_manager
+from app.services.jobs import get_job_registry
+from app.services.log_stream import stream_metrics
+from app.services.metrics_store import get_metrics_store
+from app.services.stats_sampler import get_stats_sampler
+from app.services.templates_store import get_templates_store
+
+METRICS_ENABLED = os.getenv("MIRA_METRICS", "1").lower() not in ("0", "false", "no")
+
+# границы гистограммы HTTP (секунды): до начала ответа, стримы — до заголовков
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+class _RouteMetrics:
+    """
+    Дочерние метрики одного роута. Гистограмма на класс статуса создаётся
+    при первом таком ответе и дальше берётся из списка по индексу — пустых
+    рядов для статусов, которых у роута не бывает, нет.
+    """
+
+    __slots__ = ("in_flight", "_latency", "_route", "_method", "_children")
+
+    def __init__(self, latency: Histogram, in_flight: Gauge, route: str, method: str):
+        self.in_flight = in_flight.labels(route, method)
+        self._latency = latency
+        self._route = route
+        self._method = method
+        self._children: list = [None] * len(_STATUS_CLASSES)
+
+    def observe(self, status: int, seconds: float) -> None:
+        index = status // 100 - 1
+        if not 0 <= index < len(_STATUS_CLASSES):
+            index = len(_STATUS_CLASSES) - 1
+        child = self._children[index]
+        if child is None:
+            child = self._children[index] = self._latency.labels(
+                self._route, self._method, _STATUS_CLASSES[index]
+            )
+        child.observe(seconds)
+
+
+def _instrumented(app: ASGIApp, metrics: _RouteMetrics) -> ASGIApp:
+    async def call(scope: Scope, receive: Receive, send: Send) -> None:
+        started = time.perf_counter()
+        observed = False
+
+        async def send_timed(message: Message) -> None:
+            nonlocal observed
+            if not observed and message["type"] == "http.response.start":
+                observed = True
+                metrics.observe(message["status"], time.perf_counter() - started)
+            await send(message)
+
+        metrics.in_flight.inc()
+        try:
+            await app(scope, receive, send_timed)
+        except Exception as e:
+            # ответ сформируют обработчики исключений выше по стеку
+            if not observed:
+                observed = True
+                status = e.status_code if isinstance(e, HTTPException) else 500
+                metrics.observe(status, time.perf_counter() - started)
+            raise
+        finally:
+            metrics.in_flight.dec()
+
+    return call
+
+
+def _existing(factory: Callable):
+    """
+    Уже созданный сервис из lru_cache-фабрики или None: scrape не должен
+    запускать сервисы (и ходить в демон), которыми никто не пользовался.
+    """
+    if not factory.cache_info().currsize:
+        return None
+    try:
+        return factory()
+    except Exception:
+        return None
+
+
+class _ServicesCollector:
+    """
+    Счётчики сервисов -> метрики, в момент scrape.
+    """
+
+    def collect(self):
+        yield from self._engine()
+        yield from self._events()
+        yield from self._logs()
+        yield from self._caches()
+
+    def _engine(self):
+        engine = _existing(get_docker_engine)
+        if engine is None:
+            return
+        metrics = engine.metrics
+
+        calls = CounterMetricFamily(
+            "mira_docker_requests",
+            "Вызовы Docker Engine API по эндпоинту и статусу ответа демона",
+            labels=["endpoint", "status"],
+        )
+        latency = HistogramMetricFamily(
+            "mira_docker_request_duration_seconds",
+            "Задержка вызовов Docker Engine API (стримы — за всё время стрима)",
+            labels=["endpoint"],
+        )
+        for endpoint, stats in sorted(metrics.endpoints().items()):
+            for status, count in sorted(stats.statuses.items()):
+                calls.add_metric([endpoint, status], count)
+            buckets, cumulative = [], 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += count
+                buckets.append((repr(bound), cumulative))
+            buckets.append(("+Inf", stats.count))
+            latency.add_metric([endpoint], buckets, sum_value=stats.total)
+        yield calls
+        yield latency
+
+        yield GaugeMetricFamily(
+            "mira_docker_in_flight", "Вызовы Docker Engine API в работе", value=metrics.in_flight
+        )
+        yield GaugeMetricFamily(
+            "mira_docker_waiting", "Вызовы в ожидании свободного слота", value=metrics.waiting
+        )
+        yield GaugeMetricFamily(
+            "mira_docker_streams", "Открытые стримы Docker Engine API", value=metrics.streams
+        )
+        yield CounterMetricFamily(
+            "mira_docker_slot_wait_seconds",
+            "Суммарное ожидание свободного слота",
+            value=metrics.wait_total,
+        )
+        yield CounterMetricFamily(
+            "mira_docker_slot_timeouts",
+            "Вызовы, не дождавшиеся свободного слота",
+            value=metrics.wait_timeouts,
+        )
+
+    def _events(self):
+        hub = _existing(get_events_hub)
+        if hub is None:
+            return
+        stats = hub.stats()
+        yield GaugeMetricFamily(
+            "mira_events_upstream_connected",
+            "Подключён ли хаб событий к демону",
+            value=int(stats["upstream_connected"]),
+        )
+        yield GaugeMetricFamily(
+            "mira_events_subscribers", "Подписчики стрима событий", value=stats["subscribers"]
+        )
+        yield GaugeMetricFamily(
+            "mira_events_listeners", "Внутренние слушатели хаба", value=stats["listeners"]
+        )
+        yield GaugeMetricFamily(
+            "mira_events_queue_depth",
+            "События в очередях подписчиков, всего",
+            value=stats["queue_depth_total"],
+        )
+        yield GaugeMetricFamily(
+            "mira_events_queue_depth_max",
+            "Самая длинная очередь подписчика",
+            value=max((s["queue_depth"] for s in stats["subscribers_detail"]), default=0),
+        )
+        yield CounterMetricFamily(
+            "mira_events_received", "События, полученные от демона", value=stats["events_total"]
+        )
+        yield CounterMetricFamily(
+            "mira_events_dropped", "События, не доставленные подписчикам", value=stats["dropped_total"]
+        )
+
+    def _logs(self):
+        yield GaugeMetricFamily(
+            "mira_log_streams", "Открытые стримы логов контейнеров", value=stream_metrics.streams
+        )
+        yield CounterMetricFamily(
+            "mira_log_stream_bytes",
+            "Байты логов, прочитанные у демона",
+            value=stream_metrics.bytes_total,
+        )
+        yield CounterMetricFamily(
+            "mira_log_stream_lines", "Строки логов, отданные клиентам", value=stream_metrics.lines_total
+        )
+
+    def _caches(self):
+        store = _existing(get_templates_store)
+        if store is not None:
+            yield GaugeMetricFamily("mira_templates", "Шаблоны в хранилище", value=len(store))
+
+        entries = GaugeMetricFamily(
+            "mira_cache_entries", "Записи во внутренних кэшах", labels=["cache"]
+        )
+        inventory = _existing(get_container_inventory)
+        if inventory is not None:
+            entries.add_metric(["containers_inventory"], inventory.status()["containers"])
+        metrics_store = _existing(get_metrics_store)
+        if metrics_store is not None:
+            entries.add_metric(["metrics_series"], len(metrics_store))
+        sampler = _existing(get_stats_sampler)
+        if sampler is not None:
+            entries.add_metric(["stats_samples"], sampler.status()["samples"])
+        prewarmer = _existing(get_image_prewarmer)
+        if prewarmer is not None:
+            entries.add_metric(["local_images"], prewarmer.stats()["local_images"])
+        jobs = _existing(get_job_registry)
+        if jobs is not None:
+            entries.add_metric(["jobs"], len(jobs))
+        yield entries
+
+        pulls = _existing(get_pull_manager)
+        if pulls is not None:
+            yield GaugeMetricFamily(
+                "mira_image_pulls_active", "Загрузки образов в работе", value=len(pulls.active())
+            )
+
+
+class Telemetry:
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        ProcessCollector(registry=self.registry)
+        self.registry.register(GC_COLLECTOR)
+        self.registry.register(_ServicesCollector())
+
+        self._latency = Histogram(
+            "mira_http_request_duration_seconds",
+            "Задержка HTTP-запросов до начала ответа",
+            ["route", "method", "status"],
+            buckets=HTTP_BUCKETS,
+            registry=self.registry,
+        )
+        self._in_flight = Gauge(
+            "mira_http_requests_in_flight",
+            "HTTP-запросы в работе (стримы — пока открыты)",
+            ["route", "method"],
+            registry=self.registry,
+        )
+
+    def instrument(self, app: FastAPI) -> None:
+        """
+        Обернуть каждый роут приложения. Звать после include_router.
+        """
+        for route in app.routes:
+            if not isinstance(route, APIRoute) or getattr(route, "_mira_instrumented", False):
+                continue
+            method = ",".join(sorted(route.methods))
+            route.app = _instrumented(
+                route.app, _RouteMetrics(self._latency, self._in_flight, route.path, method)
+            )
+            route._mira_instrumented = True
+
+    def render(self) -> tuple[bytes, str]:
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+
+@lru_cache
+def get_telemetry() -> Telemetry | None:
+    """
+    Общие на процесс метрики. None, если выключены через MIRA_METRICS=0
+    или не установлен prometheus_client.
+    """
+    if not METRICS_ENABLED or CollectorRegistry is None:
+        return None
+    return Telemetry()
@@ -0,0 +1,286 @@
+"""
+Потоковый импорт и экспорт шаблонов.
+
+Импорт читает тело запроса кусками и не собирает бандл целиком:
+  - NDJSON — по шаблону на строку;
+  - JSON — массив шаблонов или прежний {"templates": [...]}; элементы
+    массива вырезаются из потока сканером скобок и строк, без разбора
+    всего документа.
+Элементы валидируются и пишутся в хранилище пачками по
+MIRA_TEMPLATES_IMPORT_CHUNK (одна транзакция на пачку). Слияние — по id
+через индекс хранилища, без вложенных циклов. Битый элемент не прерывает
+импорт, а попадает в отчёт.
+
+Экспорт отдаёт NDJSON или JSON-массив кусками по мере сериализации.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import AsyncIterator, Iterator
+
+import anyio
+from pydantic import ValidationError
+
+from app.schemas import TemplateSummary
+from app.services.templates_store import TemplatesStore
+
+IMPORT_CHUNK = int(os.getenv("MIRA_TEMPLATES_IMPORT_CHUNK", "500"))
+IMPORT_MAX_ITEM = int(os.getenv("MIRA_TEMPLATES_IMPORT_MAX_ITEM", str(1024 * 1024)))
+IMPORT_MAX_ERRORS = int(os.getenv("MIRA_TEMPLATES_IMPORT_MAX_ERRORS", "100"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+_STRUCTURAL = re.compile(rb'[\[\]{},"]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+
+
+class BundleFormatError(ValueError):
+    pass
+
+
+class JsonArraySplitter:
+    """
+    Поток байтов JSON-массива -> сырые байты его элементов.
+    Перед массивом допускается обёртка-объект ({"templates": [...]}):
+    берётся первый встреченный массив.
+    """
+
+    def __init__(self, max_item: int = IMPORT_MAX_ITEM):
+        self._max_item = max_item
+        self._buf = bytearray()
+        self._pos = 0
+        self._start: int | None = None  # начало текущего элемента
+        self._depth = 0
+        self._in_string = False
+        self._checked = False
+        self._done = False
+
+    def feed(self, data: bytes) -> list[bytes]:
+        if self._done:
+            return []
+        buf = self._buf
+        buf += data
+        out: list[bytes] = []
+        pos = self._pos
+
+        if not self._checked:
+            head = bytes(buf).lstrip()
+            if not head:
+                return out
+            if head[:1] not in (b"[", b"{"):
+                raise BundleFormatError("Expected a JSON array of templates")
+            self._checked = True
+
+        while pos < len(buf):
+            if self._in_string:
+                m = _STRING_SPECIAL.search(buf, pos)
+                if m is None:
+                    pos = len(buf)
+                    break
+                if m[0] == b"\\":
+                    # экранированный символ пропускаем, даже если он в следующем куске
+                    pos = m.end() + 1
+                else:
+                    self._in_string = False
+                    pos = m.end()
+                continue
+
+            m = _STRUCTURAL.search(buf, pos)
+            if m is None:
+                pos = len(buf)
+                break
+            char = m[0]
+            pos = m.end()
+
+            if char == b'"':
+                self._in_string = True
+            elif self._start is None:
+                if char == b"[":
+                    self._start = pos
+            elif char in b"[{":
+                self._depth += 1
+            elif char in b"]}":
+                if self._depth == 0:
+                    self._emit(out, m.start())
+                    self._done = True
+                    break
+                self._depth -= 1
+            elif self._depth == 0:  # запятая между элементами
+                self._emit(out, m.start())
+                self._start = pos
+
+        # уже разобранное больше не нужно
+        keep_from = self._start if self._start is not None else min(pos, len(buf))
+        del buf[:keep_from]
+        pos -= keep_from
+        if self._start is not None:
+            self._start = 0
+            if len(buf) > self._max_item:
+                raise BundleFormatError(f"Template exceeds {self._max_item} bytes")
+        self._pos = pos
+        return out
+
+    def _emit(self, out: list[bytes], end: int) -> None:
+        item = bytes(self._buf[self._start:end]).strip()
+        if item:
+            out.append(item)
+
+    def close(self) -> list[bytes]:
+        if not self._done:
+            raise BundleFormatError("Unexpected end of JSON array")
+        return []
+
+
+class NdjsonSplitter:
+    """
+    Поток байтов NDJSON -> непустые строки.
+    """
+
+    def __init__(self, max_item: int = IMPORT_MAX_ITEM):
+        self._max_item = max_item
+        self._pending = b""
+
+    def feed(self, data: bytes) -> list[bytes]:
+        lines = (self._pending + data).split(b"\n")
+        self._pending = lines.pop()
+        if len(self._pending) > self._max_item:
+            raise BundleFormatError(f"Template exceeds {self._max_item} bytes")
+        return [line for line in (line.strip() for line in lines) if line]
+
+    def close(self) -> list[bytes]:
+        line, self._pending = self._pending.strip(), b""
+        return [line] if line else []
+
+
+def _item_id(raw: bytes):
+    try:
+        obj = json.loads(raw)
+    except ValueError:
+        return None
+    return obj.get("id") if isinstance(obj, dict) else None
+
+
+def _validation_message(e: ValidationError) -> str:
+    parts = []
+    for err in e.errors(include_url=False)[:3]:
+        loc = ".".join(str(p) for p in err.get("loc") or ())
+        parts.append(f"{loc}: {err['msg']}" if loc else err["msg"])
+    return "; ".join(parts)
+
+
+class TemplatesImport:
+    """
+    Состояние одного импорта: счётчики, ошибки, id из бандла (для replace).
+    """
+
+    def __init__(self, store: TemplatesStore, replace: bool = False):
+        self._store = store
+        self._replace = replace
+        self._seen: set[str] = set()
+        self._index = 0
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+        self.aborted: str | None = None
+
+    def _error(self, index: int, raw: bytes, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"index": index, "id": _item_id(raw), "error": message})
+
+    def write(self, items: list[bytes]) -> None:
+        """
+        Валидировать и записать пачку. Блокирующий — вызывать в потоке.
+        """
+        batch: list[TemplateSummary] = []
+        for raw in items:
+            index = self._index
+            self._index += 1
+            try:
+                template = TemplateSummary.model_validate_json(raw)
+            except ValidationError as e:
+                self._error(index, raw, _validation_message(e))
+                continue
+            batch.append(template)
+            if self._replace:
+                self._seen.add(str(template.id))
+
+        if batch:
+            created, updated = self._store.upsert_many(batch)
+            self.created += created
+            self.updated += updated
+
+    def finish(self) -> None:
+        # оборванный или целиком битый бандл не должен стирать каталог;
+        # корректный пустой бандл ([] или пустой NDJSON) очищает его, как раньше
+        if self._replace and self.aborted is None and (self._seen or self._index == 0):
+            self.deleted = self._store.delete_missing(self._seen)
+
+    def report(self) -> dict:
+        return {
+            "total": self._index,
+            "created": self.created,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "aborted": self.aborted,
+        }
+
+
+async def import_bundle(
+    store: TemplatesStore,
+    chunks: AsyncIterator[bytes],
+    splitter: JsonArraySplitter | NdjsonSplitter,
+    replace: bool = False,
+    chunk_size: int = IMPORT_CHUNK,
+) -> dict:
+    """
+    Импорт из потока байтов. В памяти — не больше пачки элементов.
+    """
+    state = TemplatesImport(store, replace=replace)
+    pending: list[bytes] = []
+    try:
+        async for data in chunks:
+            pending.extend(splitter.feed(data))
+            if len(pending) >= chunk_size:
+                await anyio.to_thread.run_sync(state.write, pending)
+                pending = []
+        pending.extend(splitter.close())
+    except BundleFormatError as e:
+        state.aborted = str(e)
+
+    if pending:
+        await anyio.to_thread.run_sync(state.write, pending)
+    await anyio.to_thread.run_sync(state.finish)
+    return state.report()
+
+
+def export_bundle(store: TemplatesStore, fmt: str = "json") -> Iterator[bytes]:
+    """
+    NDJSON или JSON-массив кусками ~EXPORT_CHUNK_BYTES.
+    """
+    ndjson = fmt == "ndjson"
+    parts: list[bytes] = [] if ndjson else [b"["]
+    size = 0
+    first = True
+    for template in store.list():
+        data = template.model_dump_json().encode()
+        if ndjson:
+            parts.append(data + b"\n")
+        else:
+            parts.append(data if first else b"," + data)
+        first = False
+        size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b"".join(parts)
+            parts, size = [], 0
+    if not ndjson:
+        parts.append(b"]")
+    if parts:
+        yield b"".join(parts)
@@ -1,13 +1,48 @@
+"""
+Хранилище шаблонов. Реализации взаимозаменяемы (MIRA_TEMPLATES_BACKEND):
+
+  sqlite (по умолчанию) — /data/templates.db в режиме WAL. Шаблон — строка
+    таблицы с id в первичном ключе и индексами по image и name; изменение
+    одного шаблона — запись одной строки, а не всего каталога. При первом
+    запуске один раз переносит templates.json (файл переименовывается
+    в *.migrated). JSON остаётся форматом экспорта/импорта.
+  json — прежний файл templates.json, для совместимости.
+
+Обе держат каталог в памяти в dict по id (поиск O(1)) и сбрасывают кэш,
+только если данные поменял кто-то ещё: у JSON — по mtime/inode/размеру
+файла, у SQLite — по PRAGMA data_version.
+"""
+
+
+import fcntl
 import json
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Iterable, List
 
 from app.schemas import TemplateSummary, TemplateVolumeMount, PortMapping
 
 TEMPLATES_FILE = Path(
     os.getenv("MIRA_TEMPLATES_FILE", "/data/templates.json")
 )
+TEMPLATES_DB = Path(
+    os.getenv("MIRA_TEMPLATES_DB", "/data/templates.db")
+)
+TEMPLATES_BACKEND = os.getenv("MIRA_TEMPLATES_BACKEND", "sqlite").lower()
+
+
+class TemplateNotFound(KeyError):
+    pass
+
+
+class TemplateExists(ValueError):
+    pass
 
 
 def _default_templates() -> List[TemplateSummary]:
@@ -57,24 +92,505 @@ def _default_templates() -> List[TemplateSummary]:
     ]
 
 
-def load_templates() -> List[TemplateSummary]:
-    if not TEMPLATES_FILE.exists():
-        # первая инициализация — записываем дефолт
-        templates = _default_templates()
-        save_templates(templates)
-        return templates
+def _key(template_id) -> str:
+    # id бывает int (старые файлы), а из URL всегда приходит строка
+    return str(template_id)
+
+
+def _stamp(st: os.stat_result) -> tuple[int, int, int]:
+    return st.st_mtime_ns, st.st_ino, st.st_size
 
+
+def _read_json_file(path: Path) -> dict[str, TemplateSummary]:
+    templates = {}
+    for obj in json.loads(path.read_bytes()):
+        template = TemplateSummary.model_validate(obj)
+        templates[_key(template.id)] = template
+    return templates
+
+
+def _set_aside_corrupt(path: Path) -> None:
+    backup = path.with_name(f"{path.name}.corrupt-{int(time.time())}")
     try:
-        data = json.loads(TEMPLATES_FILE.read_text("utf-8"))
-        return [TemplateSummary.model_validate(obj) for obj in data]
-    except Exception:
-        # если файл битый — не падаем, а откатываемся к дефолту
-        templates = _default_templates()
-        save_templates(templates)
+        os.replace(path, backup)
+    except OSError:
+        pass
+
+
+def _renamed(templates: dict[str, TemplateSummary], old_key: str, new_key: str, template) -> dict:
+    # смена id без потери места в списке
+    return {
+        (new_key if key == old_key else key): (template if key == old_key else value)
+        for key, value in templates.items()
+    }
+
+
+class TemplatesStore:
+    """
+    Общий интерфейс хранилищ. Ошибки — TemplateNotFound / TemplateExists.
+    """
+
+    backend = ""
+
+    def list(self) -> List[TemplateSummary]:
+        raise NotImplementedError
+
+    def get(self, template_id) -> TemplateSummary:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def create(self, template: TemplateSummary) -> TemplateSummary:
+        raise NotImplementedError
+
+    def update(self, template_id, template: TemplateSummary) -> TemplateSummary:
+        """
+        Замена шаблона; id можно поменять, если новый не занят.
+        Порядок в списке сохраняется.
+        """
+        raise NotImplementedError
+
+    def delete(self, template_id) -> None:
+        raise NotImplementedError
+
+    def upsert_many(self, incoming: Iterable[TemplateSummary]) -> tuple[int, int]:
+        """
+        Добавить новые и заменить существующие по id одной транзакцией.
+        Повтор id внутри пачки — побеждает последний. -> (created, updated).
+        """
+        raise NotImplementedError
+
+    def delete_missing(self, keep: set[str]) -> int:
+        """
+        Удалить шаблоны, чьих id нет в keep (импорт с mode=replace).
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonTemplatesStore(TemplatesStore):
+    """
+    Весь каталог — один JSON-массив. Запись атомарная (временный файл +
+    fsync + rename) под threading.Lock и flock между процессами. Битый файл
+    не заменяется молча дефолтом: при живом кэше он игнорируется, иначе
+    откладывается рядом как *.corrupt-<время>.
+    """
+
+    backend = "json"
+
+    def __init__(self, path: Path = TEMPLATES_FILE):
+        self._path = path
+        self._lock_path = path.with_name(path.name + ".lock")
+        self._lock = threading.Lock()
+        self._templates: dict[str, TemplateSummary] | None = None
+        self._stamp: tuple[int, int, int] | None = None
+        self._lock_file = None
+
+    # ===== чтение =====
+
+    def list(self) -> List[TemplateSummary]:
+        with self._lock:
+            return list(self._fresh().values())
+
+    def get(self, template_id) -> TemplateSummary:
+        with self._lock:
+            template = self._fresh().get(_key(template_id))
+        if template is None:
+            raise TemplateNotFound(template_id)
+        return template
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._fresh())
+
+    # ===== запись =====
+
+    def create(self, template: TemplateSummary) -> TemplateSummary:
+        with self._writing() as templates:
+            key = _key(template.id)
+            if key in templates:
+                raise TemplateExists(template.id)
+            templates[key] = template
+        return template
+
+    def update(self, template_id, template: TemplateSummary) -> TemplateSummary:
+        with self._writing() as templates:
+            old_key, new_key = _key(template_id), _key(template.id)
+            if old_key not in templates:
+                raise TemplateNotFound(template_id)
+            if new_key == old_key:
+                templates[old_key] = template
+            else:
+                if new_key in templates:
+                    raise TemplateExists(template.id)
+                items = _renamed(templates, old_key, new_key, template)
+                templates.clear()
+                templates.update(items)
+        return template
+
+    def delete(self, template_id) -> None:
+        with self._writing() as templates:
+            if templates.pop(_key(template_id), None) is None:
+                raise TemplateNotFound(template_id)
+
+    def upsert_many(self, incoming: Iterable[TemplateSummary]) -> tuple[int, int]:
+        created = updated = 0
+        with self._writing() as templates:
+            for template in incoming:
+                key = _key(template.id)
+                if key in templates:
+                    updated += 1
+                else:
+                    created += 1
+                templates[key] = template
+        return created, updated
+
+    def delete_missing(self, keep: set[str]) -> int:
+        with self._writing() as templates:
+            missing = [key for key in templates if key not in keep]
+            for key in missing:
+                del templates[key]
+        return len(missing)
+
+    # ===== внутреннее =====
+
+    def _fresh(self) -> dict[str, TemplateSummary]:
+        """
+        Кэш, если файл не менялся; иначе перечитать. Вызывать под self._lock.
+        """
+        try:
+            st = os.stat(self._path)
+        except FileNotFoundError:
+            # первая инициализация (или файл удалили) — записываем дефолт
+            with self._file_lock():
+                if not self._path.exists():
+                    self._write({_key(t.id): t for t in _default_templates()})
+                    return self._templates
+            st = os.stat(self._path)
+
+        if self._templates is not None and _stamp(st) == self._stamp:
+            return self._templates
+
+        try:
+            templates = _read_json_file(self._path)
+        except Exception:
+            if self._templates is not None:
+                # битый файл не затирает то, что уже в памяти;
+                # следующая запись перезапишет его из кэша
+                self._stamp = _stamp(st)
+                return self._templates
+            _set_aside_corrupt(self._path)
+            with self._file_lock():
+                self._write({_key(t.id): t for t in _default_templates()})
+            return self._templates
+
+        self._templates = templates
+        self._stamp = _stamp(st)
         return templates
 
+    @contextmanager
+    def _writing(self):
+        """
+        Изменение под блокировками: копия актуального dict отдаётся
+        наружу и записывается, только если блок завершился без исключения.
+        """
+        with self._lock, self._file_lock():
+            templates = dict(self._fresh())
+            yield templates
+            self._write(templates)
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        flock между процессами. Вызывать под self._lock; вложенный вызов
+        (_fresh внутри _writing) повторно не блокирует.
+        """
+        if self._lock_file is not None:
+            yield
+            return
+        self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._lock_file = lock_file
+            try:
+                yield
+            finally:
+                self._lock_file = None
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, templates: dict[str, TemplateSummary]) -> None:
+        payload = [t.model_dump(mode="json") for t in templates.values()]
+        data = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+        directory = self._path.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=self._path.name + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        # rename должен пережить сбой питания вместе с содержимым
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+        self._templates = templates
+        self._stamp = _stamp(os.stat(self._path))
+
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS templates (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        image TEXT NOT NULL,
+        data TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS templates_image ON templates (image)",
+    "CREATE INDEX IF NOT EXISTS templates_name ON templates (name)",
+)
+
+# PRAGMA user_version: 0 — пустая база, 1 — схема создана и каталог заполнен
+_SCHEMA_VERSION = 1
+
+
+def _row(template: TemplateSummary) -> tuple:
+    data = json.dumps(template.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":"))
+    return _key(template.id), template.name, template.image, data, time.time()
+
+
+class SqliteTemplatesStore(TemplatesStore):
+    """
+    Одна строка на шаблон. Порядок списка — порядок вставки (rowid):
+    upsert и смена id строку не пересоздают.
+
+    Соединение одно на процесс и используется под threading.Lock; между
+    процессами запись сериализует сама SQLite (BEGIN IMMEDIATE + busy_timeout),
+    читатели в WAL писателю не мешают.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: Path = TEMPLATES_DB, legacy_file: Path = TEMPLATES_FILE):
+        self._path = path
+        self._legacy_file = legacy_file
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._templates: dict[str, TemplateSummary] | None = None
+        self._data_version: int | None = None
+
+    # ===== чтение =====
+
+    def list(self) -> List[TemplateSummary]:
+        with self._lock:
+            return list(self._fresh().values())
+
+    def get(self, template_id) -> TemplateSummary:
+        with self._lock:
+            template = self._fresh().get(_key(template_id))
+        if template is None:
+            raise TemplateNotFound(template_id)
+        return template
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._fresh())
+
+    # ===== запись =====
+
+    def create(self, template: TemplateSummary) -> TemplateSummary:
+        key = _key(template.id)
+        with self._writing() as (conn, templates):
+            try:
+                conn.execute("INSERT INTO templates VALUES (?, ?, ?, ?, ?)", _row(template))
+            except sqlite3.IntegrityError:
+                raise TemplateExists(template.id) from None
+            templates[key] = template
+        return template
+
+    def update(self, template_id, template: TemplateSummary) -> TemplateSummary:
+        old_key, new_key = _key(template_id), _key(template.id)
+        with self._writing() as (conn, templates):
+            try:
+                cur = conn.execute(
+                    "UPDATE templates SET id = ?, name = ?, image = ?, data = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (*_row(template), old_key),
+                )
+            except sqlite3.IntegrityError:
+                raise TemplateExists(template.id) from None
+            if cur.rowcount == 0:
+                raise TemplateNotFound(template_id)
+
+            if new_key == old_key:
+                templates[old_key] = template
+            else:
+                items = _renamed(templates, old_key, new_key, template)
+                templates.clear()
+                templates.update(items)
+        return template
+
+    def delete(self, template_id) -> None:
+        key = _key(template_id)
+        with self._writing() as (conn, templates):
+            if conn.execute("DELETE FROM templates WHERE id = ?", (key,)).rowcount == 0:
+                raise TemplateNotFound(template_id)
+            templates.pop(key, None)
+
+    def upsert_many(self, incoming: Iterable[TemplateSummary]) -> tuple[int, int]:
+        with self._writing() as (conn, templates):
+            return self._upsert(conn, incoming, templates)
+
+    def delete_missing(self, keep: set[str]) -> int:
+        with self._writing() as (conn, templates):
+            missing = [key for key in templates if key not in keep]
+            conn.executemany("DELETE FROM templates WHERE id = ?", ((key,) for key in missing))
+            for key in missing:
+                del templates[key]
+        return len(missing)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._templates = None
+
+    # ===== внутреннее =====
+
+    @staticmethod
+    def _upsert(
+        conn: sqlite3.Connection,
+        incoming: Iterable[TemplateSummary],
+        templates: dict,
+    ) -> tuple[int, int]:
+        created = updated = 0
+        for template in incoming:
+            conn.execute(
+                "INSERT INTO templates VALUES (?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET "
+                "name = excluded.name, image = excluded.image, "
+                "data = excluded.data, updated_at = excluded.updated_at",
+                _row(template),
+            )
+            key = _key(template.id)
+            if key in templates:
+                updated += 1
+            else:
+                created += 1
+            templates[key] = template
+        return created, updated
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None — транзакции открываем сами (BEGIN IMMEDIATE)
+        conn = sqlite3.connect(
+            self._path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+        if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # другой процесс мог успеть раньше, пока ждали блокировку
+                if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                    # не executescript: он коммитит открытую транзакцию
+                    for statement in _SCHEMA:
+                        conn.execute(statement)
+                    migrated = self._initial_templates()
+                    self._upsert(conn, migrated.values(), {})
+                    conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                conn.close()
+                raise
+            self._retire_legacy_file()
+
+        self._conn = conn
+        return conn
+
+    def _initial_templates(self) -> dict[str, TemplateSummary]:
+        """
+        Одноразовая миграция: содержимое templates.json, если он есть и читается,
+        иначе дефолтные шаблоны.
+        """
+        if self._legacy_file.exists():
+            try:
+                return _read_json_file(self._legacy_file)
+            except Exception:
+                _set_aside_corrupt(self._legacy_file)
+        return {_key(t.id): t for t in _default_templates()}
+
+    def _retire_legacy_file(self) -> None:
+        # чтобы правки старого файла руками не терялись молча
+        if self._legacy_file.exists():
+            try:
+                os.replace(self._legacy_file, self._legacy_file.with_name(self._legacy_file.name + ".migrated"))
+            except OSError:
+                pass
+
+    def _fresh(self) -> dict[str, TemplateSummary]:
+        """
+        Кэш, если базу не менял другой процесс; иначе перечитать.
+        Вызывать под self._lock.
+        """
+        conn = self._connect()
+        # data_version меняется только от коммитов других соединений
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._templates is not None and version == self._data_version:
+            return self._templates
+
+        templates = {}
+        for (data,) in conn.execute("SELECT data FROM templates ORDER BY rowid"):
+            template = TemplateSummary.model_validate_json(data)
+            templates[_key(template.id)] = template
+        self._templates = templates
+        self._data_version = version
+        return templates
+
+    @contextmanager
+    def _writing(self):
+        """
+        Транзакция записи над копией кэша; копия становится кэшем
+        только после успешного COMMIT.
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # уже под блокировкой записи — чужие коммиты видны
+                templates = dict(self._fresh())
+                yield conn, templates
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._templates = templates
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+
 
-def save_templates(templates: List[TemplateSummary]) -> None:
-    TEMPLATES_FILE.parent.mkdir(parents=True, exist_ok=True)
-    payload = [t.model_dump(mode="json") for t in templates]
-    TEMPLATES_FILE.write_text(json.dumps(payload, ensure_ascii=False, indent=2), "utf-8")
+@lru_cache
+def get_templates_store() -> TemplatesStore:
+    if TEMPLATES_BACKEND == "json":
+        return JsonTemplatesStore()
+    return SqliteTemplatesStore()
@@ -15,6 +15,8 @@ export type TemplateSummary = {
   default_ports: PortMapping[];
   default_env: Record<string, string>;
   default_volumes: TemplateVolumeMount[];
+  // только в списке: скачан ли образ на хосте
+  image_status?: "warm" | "cold" | "pulling" | "failed" | null;
 };
 
 const API_BASE =
@@ -66,17 +68,36 @@ export function getTemplatesExportUrl(): string {
   return `${API_BASE}/templates/export`;
 }
 
+export type TemplatesImportReport = {
+  total: number;
+  created: number;
+  updated: number;
+  deleted: number;
+  failed: number;
+  errors: { index: number; id: string | number | null; error: string }[];
+  errors_truncated: boolean;
+  aborted: string | null;
+};
+
+// файл уходит как есть: JSON-массив, {"templates": [...]} или NDJSON
 export async function importTemplates(
-  templates: TemplateSummary[],
-  mode: "merge" | "replace" = "merge"
-): Promise<TemplateSummary[]> {
+  file: Blob,
+  mode: "merge" | "replace" = "merge",
+  ndjson = false
+): Promise<TemplatesImportReport> {
   const res = await fetch(`${API_BASE}/templates/import?mode=${mode}`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ templates }),
+    headers: {
+      "Content-Type": ndjson ? "application/x-ndjson" : "application/json",
+    },
+    body: file,
   });
-  if (!res.ok) {
+  if (!res.ok && res.status !== 400) {
     throw new Error(`API error ${res.status}: ${await res.text()}`);
   }
-  return (await res.json()) as TemplateSummary[];
+  const report = (await res.json()) as TemplatesImportReport;
+  if (report.aborted) {
+    throw new Error(`Import aborted: ${report.aborted}`);
+  }
+  return report;
 }
@@ -1,4 +1,4 @@
-import { useEffect } from "react";
+import { useEffect, useRef } from "react";
 import { EVENTS_WS_URL } from "../api/client";
 
 export type DockerEventMessage = {
@@ -9,38 +9,86 @@ export type DockerEventMessage = {
   status: string;
   raw_status?: string;
   time: string;
+  seq?: number;
 };
 
+// служебные кадры стрима: текущий курсор и требование перечитать списки
+type DockerEventControl = {
+  type: "hello" | "resync_required";
+  seq: number;
+};
+
+const RECONNECT_MIN_MS = 1000;
+const RECONNECT_MAX_MS = 30000;
+
 export function useDockerEvents(
-  onEvent?: (event: DockerEventMessage) => void
+  onEvent?: (event: DockerEventMessage) => void,
+  onResync?: () => void
 ) {
+  // последний увиденный seq — с него продолжаем после переподключения
+  const lastSeqRef = useRef<number | null>(null);
+
   useEffect(() => {
-    const ws = new WebSocket(EVENTS_WS_URL);
+    let ws: WebSocket | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let delay = RECONNECT_MIN_MS;
+    let stopped = false;
 
-    ws.onopen = () => {
-      console.log("[Mira] WebSocket connected:", EVENTS_WS_URL);
-    };
+    const connect = () => {
+      const since = lastSeqRef.current;
+      const url =
+        since !== null ? `${EVENTS_WS_URL}?since=${since}` : EVENTS_WS_URL;
+      ws = new WebSocket(url);
 
-    ws.onmessage = (ev) => {
-      try {
-        const data = JSON.parse(ev.data) as DockerEventMessage;
-        console.log("[Mira] event:", data);
-        onEvent?.(data);
-      } catch (err) {
-        console.warn("[Mira] bad WS message:", err);
-      }
-    };
+      ws.onopen = () => {
+        delay = RECONNECT_MIN_MS;
+        console.log("[Mira] WebSocket connected:", url);
+      };
 
-    ws.onclose = () => {
-      console.log("[Mira] WebSocket closed");
-    };
+      ws.onmessage = (ev) => {
+        try {
+          const data = JSON.parse(ev.data) as
+            | DockerEventMessage
+            | DockerEventControl;
+
+          if (typeof data.seq === "number") {
+            lastSeqRef.current = data.seq;
+          }
+
+          if (data.type === "hello") {
+            return;
+          }
+          if (data.type === "resync_required") {
+            console.log("[Mira] events cursor lost, resync required");
+            onResync?.();
+            return;
+          }
 
-    ws.onerror = (e) => {
-      console.error("[Mira] WebSocket error:", e);
+          console.log("[Mira] event:", data);
+          onEvent?.(data);
+        } catch (err) {
+          console.warn("[Mira] bad WS message:", err);
+        }
+      };
+
+      ws.onclose = () => {
+        console.log("[Mira] WebSocket closed");
+        if (stopped) return;
+        reconnectTimer = setTimeout(connect, delay);
+        delay = Math.min(delay * 2, RECONNECT_MAX_MS);
+      };
+
+      ws.onerror = (e) => {
+        console.error("[Mira] WebSocket error:", e);
+      };
     };
 
+    connect();
+
     return () => {
-      ws.close();
+      stopped = true;
+      if (reconnectTimer) clearTimeout(reconnectTimer);
+      ws?.close();
     };
-  }, [onEvent]);
+  }, [onEvent, onResync]);
 }
@@ -64,22 +64,23 @@ export default function TemplatesListPage() {
 
     setImporting(true);
     try {
-      const text = await file.text();
-      let json: any = JSON.parse(text);
-
-      const templates: TemplateSummary[] = Array.isArray(json)
-        ? json
-        : Array.isArray(json.templates)
-        ? json.templates
-        : [];
+      const ndjson = /\.(ndjson|jsonl)$/i.test(file.name);
+      const report = await importTemplates(file, "merge", ndjson);
+      await load();
 
-      if (!templates.length) {
+      if (!report.total) {
         throw new Error("No templates found in file");
       }
-
-      await importTemplates(templates, "merge");
-      await load();
-      alert(`Imported ${templates.length} template(s).`);
+      const lines = [
+        `Imported ${report.created + report.updated} template(s): ${report.created} new, ${report.updated} updated.`,
+      ];
+      if (report.failed) {
+        lines.push(`${report.failed} failed:`);
+        for (const err of report.errors.slice(0, 5)) {
+          lines.push(`  #${err.index}${err.id != null ? ` (${err.id})` : ""}: ${err.error}`);
+        }
+      }
+      alert(lines.join("\n"));
     } catch (e: any) {
       alert(e.message || "Failed to import templates");
     } finally {
@@ -95,7 +96,7 @@ export default function TemplatesListPage() {
       <input
         ref={fileInputRef}
         type="file"
-        accept="application/json,.json"
+        accept="application/json,.json,.ndjson,.jsonl"
         className="hidden"
         onChange={handleImportFile}
       />
@@ -165,6 +166,20 @@ export default function TemplatesListPage() {
                 <div className="text-xs text-mira-textSecondary mt-1">
                   Image:{" "}
                   <span className="text-mira-textPrimary">{tpl.image}</span>
+                  {tpl.image_status && (
+                    <span
+                      className={
+                        "ml-2 font-mono " +
+                        (tpl.image_status === "warm"
+                          ? "text-emerald-400"
+                          : tpl.image_status === "failed"
+                          ? "text-red-400"
+                          : "text-mira-textSecondary")
+                      }
+                    >
+                      {tpl.image_status}
+                    </span>
+                  )}
                 </div>
               </div>
 